@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Action plugin of the ZPA modules, routed to it in meta/runtime.yml.
+
+By default the modules run on the target like any other module. When the
+zpa_controller_execution variable or the ZPA_CONTROLLER_EXECUTION controller
+environment variable is true, they run in-process on the controller instead,
+which skips AnsiballZ. The bearer token is shared across tasks through the
+token cache, and the connection pool across the items of a loop.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.utils.vars import merge_hash
+from ansible.vars.clean import remove_internal_keys
+from ansible_collections.willguibr.zpacloud.plugins.plugin_utils.zpa_local import (
+    run_module,
+)
+
+
+class ActionModule(ActionBase):
+
+    _supports_check_mode = True
+    _supports_async = True
+
+    def _controller_execution(self, task_vars):
+        value = task_vars.get("zpa_controller_execution")
+        if value is None:
+            value = os.environ.get("ZPA_CONTROLLER_EXECUTION", False)
+        return boolean(self._templar.template(value), strict=False)
+
+    def _parse_output(self, res):
+        try:
+            # ansible-core >= 2.19 decodes the output with a serialization profile
+            return self._parse_returned_data(res, "legacy")
+        except TypeError:
+            return self._parse_returned_data(res)
+
+    def _execute_on_controller(self, task_vars):
+        module_name = self._task.action.split(".")[-1]
+        module_args = self._task.args.copy()
+        self._update_module_args(self._task.action, module_args, task_vars)
+        # the task tmpdir is on the target, the modules create their own if needed
+        module_args["_ansible_tmpdir"] = None
+        env = {}
+        self._compute_environment_string(env)
+        data = self._parse_output(run_module(module_name, module_args, env))
+        remove_internal_keys(data)
+        return data
+
+    def run(self, tmp=None, task_vars=None):
+        task_vars = task_vars or {}
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        wrap_async = self._task.async_val and not self._connection.has_native_async
+        if not wrap_async and self._controller_execution(task_vars):
+            return merge_hash(result, self._execute_on_controller(task_vars))
+
+        result = merge_hash(
+            result, self._execute_module(task_vars=task_vars, wrap_async=wrap_async)
+        )
+        if not wrap_async:
+            # remove a temporary path we created
+            self._remove_tmp_path(self._connection._shell.tmpdir)
+        return result
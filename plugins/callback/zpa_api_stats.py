@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: zpa_api_stats
+type: aggregate
+short_description: Summarize the ZPA API usage of a playbook run
+description:
+    - Aggregates the C(api_stats) returned by the ZPA modules of every task and host, and
+      shows a summary at the end of the run with the top endpoints by number of calls and by time,
+      the logins, retries and rate limited calls, and the slowest tasks.
+    - The modules only return C(api_stats) when their C(collect_metrics) option is set, for example
+      with the C(ZPA_COLLECT_METRICS=true) environment variable.
+author:
+    - William Guilherme (@willguibr)
+version_added: '1.0.0'
+requirements:
+    - enable in configuration with C(callbacks_enabled = willguibr.zpacloud.zpa_api_stats)
+options:
+  output_format:
+    description: Format of the summary.
+    type: str
+    default: table
+    choices:
+      - table
+      - json
+    env:
+      - name: ZPA_API_STATS_FORMAT
+    ini:
+      - section: callback_zpa_api_stats
+        key: output_format
+  output_file:
+    description:
+      - Write the summary to this file instead of the display.
+    type: path
+    env:
+      - name: ZPA_API_STATS_FILE
+    ini:
+      - section: callback_zpa_api_stats
+        key: output_file
+  top:
+    description: Number of endpoints and tasks listed in each ranking.
+    type: int
+    default: 10
+    env:
+      - name: ZPA_API_STATS_TOP
+    ini:
+      - section: callback_zpa_api_stats
+        key: top
+"""
+
+import json
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = "aggregate"
+    CALLBACK_NAME = "willguibr.zpacloud.zpa_api_stats"
+    CALLBACK_NEEDS_ENABLED = True
+
+    COUNTERS = (
+        "calls",
+        "logins",
+        "retries",
+        "rate_limited",
+        "bytes",
+        "wire_bytes",
+        "time",
+    )
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.totals = dict((k, 0) for k in self.COUNTERS)
+        self.totals["tasks"] = 0
+        self.endpoints = {}
+        self.tasks = []
+
+    def _add(self, result, api_stats):
+        self.totals["tasks"] += 1
+        # results of older modules only have the decompressed size
+        api_stats = dict(api_stats)
+        api_stats.setdefault("wire_bytes", api_stats.get("bytes"))
+        for key in self.COUNTERS:
+            self.totals[key] += api_stats.get(key) or 0
+        for name, stats in (api_stats.get("endpoints") or {}).items():
+            endpoint = self.endpoints.setdefault(
+                name,
+                dict(
+                    calls=0,
+                    retries=0,
+                    time=0.0,
+                    max_time=0.0,
+                    bytes=0,
+                    wire_bytes=0,
+                    statuses={},
+                ),
+            )
+            endpoint["calls"] += stats.get("calls") or 0
+            endpoint["retries"] += stats.get("retries") or 0
+            endpoint["time"] += stats.get("time") or 0
+            endpoint["max_time"] = max(endpoint["max_time"], stats.get("max_time") or 0)
+            endpoint["bytes"] += stats.get("bytes") or 0
+            endpoint["wire_bytes"] += stats.get("wire_bytes", stats.get("bytes")) or 0
+            for status, count in (stats.get("statuses") or {}).items():
+                endpoint["statuses"][status] = (
+                    endpoint["statuses"].get(status, 0) + count
+                )
+        self.tasks.append(
+            dict(
+                task=result._task.get_name(),
+                host=result._host.get_name(),
+                elapsed=api_stats.get("elapsed") or 0,
+                calls=api_stats.get("calls") or 0,
+            )
+        )
+
+    def _collect(self, result):
+        results = [result._result]
+        # with loops, each item has its own module result
+        results.extend(
+            r for r in result._result.get("results") or [] if isinstance(r, dict)
+        )
+        for res in results:
+            api_stats = res.get("api_stats")
+            if isinstance(api_stats, dict):
+                self._add(result, api_stats)
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def summary(self):
+        top = self.get_option("top")
+        totals = dict(self.totals, time=round(self.totals["time"], 3))
+        endpoints = [
+            dict(
+                endpoint=name,
+                calls=e["calls"],
+                retries=e["retries"],
+                time=round(e["time"], 3),
+                max_time=round(e["max_time"], 3),
+                bytes=e["bytes"],
+                wire_bytes=e["wire_bytes"],
+                statuses=e["statuses"],
+            )
+            for name, e in self.endpoints.items()
+        ]
+        return dict(
+            totals=totals,
+            endpoints_by_calls=sorted(endpoints, key=lambda e: -e["calls"])[:top],
+            endpoints_by_time=sorted(endpoints, key=lambda e: -e["time"])[:top],
+            slowest_tasks=sorted(self.tasks, key=lambda t: -t["elapsed"])[:top],
+        )
+
+    def format_table(self, summary):
+        totals = summary["totals"]
+        lines = [
+            "ZPA API: %(calls)d calls in %(tasks)d tasks, %(logins)d logins, "
+            "%(retries)d retries, %(rate_limited)d rate limited, %(bytes)d bytes "
+            "(%(wire_bytes)d received), %(time).3fs" % totals
+        ]
+        for title, key in (
+            ("Top endpoints by calls", "endpoints_by_calls"),
+            ("Top endpoints by time", "endpoints_by_time"),
+        ):
+            lines.extend(["", title])
+            for e in summary[key]:
+                lines.append(
+                    "  %6d calls %4d retries %9.3fs (max %.3fs) %10d bytes "
+                    "%10d received  %s"
+                    % (
+                        e["calls"],
+                        e["retries"],
+                        e["time"],
+                        e["max_time"],
+                        e["bytes"],
+                        e["wire_bytes"],
+                        e["endpoint"],
+                    )
+                )
+        lines.extend(["", "Slowest tasks"])
+        for t in summary["slowest_tasks"]:
+            lines.append(
+                "  %9.3fs %6d calls  %s (%s)"
+                % (t["elapsed"], t["calls"], t["task"], t["host"])
+            )
+        return "\n".join(lines)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.totals["tasks"]:
+            return
+        summary = self.summary()
+        if self.get_option("output_format") == "json":
+            output = json.dumps(summary, indent=2, sort_keys=True)
+        else:
+            output = self.format_table(summary)
+        output_file = self.get_option("output_file")
+        if output_file:
+            with open(output_file, "w") as f:
+                f.write(output + "\n")
+        else:
+            self._display.banner("ZPA API STATS")
+            self._display.display(output)
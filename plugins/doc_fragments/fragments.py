@@ -33,3 +33,127 @@ options:
             - enabled
             - disabled
 """
+
+    CLIENT = """
+options:
+    base_url:
+        description:
+            - URL of the ZPA API.
+            - Can also be set with the C(ZPA_BASE_URL) environment variable.
+        type: str
+        default: https://config.private.zscaler.com
+    log_level:
+        description:
+            - Verbosity of the API call logs sent to the target's system log.
+            - C(off) logs nothing, C(summary) logs the method, path, status, size and latency of each call,
+              C(full) also logs the request data and the response body, with credentials masked.
+            - Can also be set with the C(ZPA_LOG_LEVEL) environment variable.
+        type: str
+        default: summary
+        choices:
+            - "off"
+            - summary
+            - full
+    collect_metrics:
+        description:
+            - Return an C(api_stats) block in the module result with the number of API calls, retries,
+              logins, rate limited responses, bytes and time, in total and per endpoint.
+            - C(bytes) counts the response bodies once decompressed, C(wire_bytes) as they were received.
+            - Can also be set with the C(ZPA_COLLECT_METRICS) environment variable.
+        type: bool
+        default: false
+    token_cache:
+        description:
+            - Reuse the ZPA bearer token across module runs instead of signing in on every task.
+            - Tokens are cached under the remote temporary directory in files readable only by the
+              current user, keyed by API URL, client ID and customer ID.
+            - A cached token is used until shortly before it expires and is refreshed transparently
+              when the API rejects it.
+            - Cached or not, a client replaces its token shortly before it expires, so long
+              paginations and bulk runs are not interrupted.
+            - Can also be set with the C(ZPA_TOKEN_CACHE) environment variable.
+        type: bool
+        default: true
+    max_workers:
+        description:
+            - Maximum number of concurrent requests used to fetch the pages of a collection.
+            - Set to C(1) to fetch pages sequentially.
+            - Can also be set with the C(ZPA_MAX_WORKERS) environment variable.
+        type: int
+        default: 4
+    rate_limit:
+        description:
+            - Maximum sustained number of requests per second sent to the API, shared by all
+              concurrent requests of a module run. Bursts of up to 10 seconds worth of requests are allowed.
+            - Rate limited C(429) responses pause every request until the time given by the
+              C(Retry-After) or C(X-RateLimit-Reset) headers.
+            - Set to C(0) to only rely on the API rate limit headers.
+            - Can also be set with the C(ZPA_RATE_LIMIT) environment variable.
+        type: float
+        default: 2.0
+    response_cache:
+        description:
+            - Cache the responses of GET requests on disk with their C(ETag) and C(Last-Modified)
+              validators, and revalidate them on later runs so unchanged resources are not downloaded again.
+            - Responses are cached under the remote temporary directory in files readable only by the
+              current user, keyed by API URL, client ID, customer ID and request URL.
+            - Can also be set with the C(ZPA_RESPONSE_CACHE) environment variable.
+        type: bool
+        default: false
+    response_cache_size:
+        description:
+            - Maximum size of the response cache in MiB, the least recently used responses are evicted
+              beyond it.
+            - Can also be set with the C(ZPA_RESPONSE_CACHE_SIZE) environment variable.
+        type: int
+        default: 100
+    connection_pool:
+        description:
+            - Send requests over a pool of persistent HTTPS connections kept alive for the
+              whole module run, instead of a new TCP and TLS handshake per request.
+            - The pool does not go through HTTP proxies, leave it disabled when a proxy is required.
+            - Can also be set with the C(ZPA_CONNECTION_POOL) environment variable.
+        type: bool
+        default: false
+    connection_pool_size:
+        description:
+            - Maximum number of persistent connections, defaults to I(max_workers).
+            - Can also be set with the C(ZPA_CONNECTION_POOL_SIZE) environment variable.
+        type: int
+    connection_idle_timeout:
+        description:
+            - Number of seconds an idle persistent connection is kept before it is discarded.
+            - Can also be set with the C(ZPA_CONNECTION_IDLE_TIMEOUT) environment variable.
+        type: int
+        default: 60
+    compression:
+        description:
+            - Ask the API for gzip or deflate compressed responses, decompressed as they are received.
+            - Can also be set with the C(ZPA_COMPRESSION) environment variable.
+        type: bool
+        default: true
+    api_broker:
+        description:
+            - Send the API calls through a broker process shared by every module run of the tenant on
+              the target, started by the first module run and listening on a Unix socket under the
+              remote temporary directory.
+            - The broker logs in once, applies I(rate_limit) to the calls of all the forks together,
+              sends identical GET requests in flight once and keeps their responses for
+              I(api_broker_cache_ttl) seconds, until a write.
+            - The broker keeps the options of the module run that started it.
+            - Can also be set with the C(ZPA_API_BROKER) environment variable.
+        type: bool
+        default: false
+    api_broker_cache_ttl:
+        description:
+            - Number of seconds the broker answers a GET request from its last response, C(0) disables it.
+            - Can also be set with the C(ZPA_API_BROKER_CACHE_TTL) environment variable.
+        type: int
+        default: 5
+    api_broker_idle_timeout:
+        description:
+            - Number of seconds without calls after which the broker exits.
+            - Can also be set with the C(ZPA_API_BROKER_IDLE_TIMEOUT) environment variable.
+        type: int
+        default: 60
+"""
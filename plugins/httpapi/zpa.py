@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: zpa
+short_description: HttpApi plugin keeping a ZPA API session for the play
+description:
+    - Runs the ZPA API calls of the modules in the persistent connection of the host, with the
+      C(ansible.netcommon.httpapi) connection and C(ansible_network_os=willguibr.zpacloud.zpa).
+    - The persistent connection logs in once and keeps the bearer token, the connection pool, the
+      response cache and the rate limit of every module run on the host, instead of each module
+      building its own client.
+    - The client options, credentials included, are still the module options, a client is kept per
+      distinct set of them.
+author:
+    - William Guilherme (@willguibr)
+version_added: '1.0.0'
+"""
+
+import json
+
+from ansible.plugins.httpapi import HttpApiBase
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+from ansible_collections.willguibr.zpacloud.plugins.plugin_utils.zpa_plugin import (
+    ZPAPluginModule,
+)
+
+
+class HttpApi(HttpApiBase):
+    def __init__(self, connection):
+        super(HttpApi, self).__init__(connection)
+        self._clients = {}
+
+    def _client(self, params):
+        key = json.dumps(params, sort_keys=True)
+        client = self._clients.get(key)
+        if client is None:
+            # the modules collect their own metrics, from the calls they proxy
+            module = ZPAPluginModule(dict(params, collect_metrics=False))
+            client = self._clients[key] = ZPAClientHelper(module)
+        return client
+
+    def zpa_request(self, params, method, path, data=None):
+        """
+        Send an API call with the client of params, the client options of the
+        module, and return its response as status, headers and body.
+        """
+        resp = self._client(params).send(method, path, data)
+        headers = dict(
+            (k, v)
+            for k, v in resp.info.items()
+            if k != "body" and isinstance(v, (str, int, float))
+        )
+        return dict(status=resp.status_code, headers=headers, body=resp.text)
+
+    def send_request(self, data, **message_kwargs):
+        return self.zpa_request(
+            message_kwargs["params"],
+            message_kwargs.get("method", "GET"),
+            message_kwargs["path"],
+            data,
+        )
+
+    def logout(self):
+        self._clients.clear()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: zpa
+short_description: ZPA App Connectors and Service Edges inventory source
+description:
+    - Get the App Connectors and the Service Edges of a ZPA tenant as inventory hosts.
+    - Hosts are named after the App Connector or Service Edge, followed by C(_<id>) when several of them
+      have the same name, for example an App Connector and a Service Edge. The name is in C(zpa_name).
+    - Hosts are grouped by App Connector or Service Edge group, country, version and control channel status.
+    - Uses a YAML configuration file that ends with C(zpa.yml) or C(zpa.yaml).
+    - Enable the inventory cache to avoid listing the whole fleet on every run.
+author:
+    - William Guilherme (@willguibr)
+version_added: '1.0.0'
+extends_documentation_fragment:
+    - constructed
+    - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for the plugin.
+    required: true
+    choices: ['willguibr.zpacloud.zpa']
+  client_id:
+    description: The ZPA API client ID.
+    type: str
+    env:
+      - name: ZPA_CLIENT_ID
+  client_secret:
+    description: The ZPA API client secret.
+    type: str
+    env:
+      - name: ZPA_CLIENT_SECRET
+  customer_id:
+    description: The ZPA tenant ID.
+    type: str
+    env:
+      - name: ZPA_CUSTOMER_ID
+  base_url:
+    description: The ZPA API base URL.
+    type: str
+    default: https://config.private.zscaler.com
+    env:
+      - name: ZPA_BASE_URL
+  sources:
+    description: The kinds of hosts to get.
+    type: list
+    elements: str
+    default: ['app_connectors', 'service_edges']
+    choices: ['app_connectors', 'service_edges']
+  group_by:
+    description:
+      - The groups every host is added to, in addition to the C(app_connectors) or C(service_edges) group.
+      - C(group) is the App Connector or Service Edge group, as C(app_connector_group_<name>) or C(service_edge_group_<name>).
+      - C(country) is C(country_<country code>), C(version) is C(version_<current version>) and
+        C(control_channel_status) is C(control_channel_<status>).
+    type: list
+    elements: str
+    default: ['group', 'country', 'version', 'control_channel_status']
+    choices: ['group', 'country', 'version', 'control_channel_status']
+"""
+
+EXAMPLES = """
+# zpa.yml
+plugin: willguibr.zpacloud.zpa
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/zpa_inventory
+cache_timeout: 3600
+keyed_groups:
+  - key: platform
+    prefix: platform
+compose:
+  ansible_host: private_ip
+"""
+
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_app_connector_controller import (
+    AppConnectorControllerService,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_service_edge_groups import (
+    ServiceEdgeGroupService,
+)
+from ansible_collections.willguibr.zpacloud.plugins.plugin_utils.zpa_plugin import (
+    ZPAPluginModule,
+)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = "willguibr.zpacloud.zpa"
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and path.endswith(
+            ("zpa.yml", "zpa.yaml")
+        )
+
+    def _fetch(self):
+        """Return the hosts, lists of (kind, group name, host vars)"""
+        module = ZPAPluginModule(
+            dict(
+                client_id=self.get_option("client_id"),
+                client_secret=self.get_option("client_secret"),
+                customer_id=self.get_option("customer_id"),
+                base_url=self.get_option("base_url"),
+            )
+        )
+        customer_id = module.params.get("customer_id")
+        hosts = []
+        sources = self.get_option("sources")
+        if "app_connectors" in sources:
+            service = AppConnectorControllerService(module, customer_id)
+            for connector in service.iterAll():
+                hosts.append(
+                    [
+                        "app_connector",
+                        connector.get("app_connector_group_name"),
+                        connector,
+                    ]
+                )
+        if "service_edges" in sources:
+            service = ServiceEdgeGroupService(module, customer_id)
+            for group in service.iterAll():
+                for edge in group.get("service_edges") or []:
+                    edge = dict(
+                        edge,
+                        service_edge_group_id=group.get("id"),
+                        service_edge_group_name=group.get("name"),
+                    )
+                    hosts.append(["service_edge", group.get("name"), edge])
+        return hosts
+
+    def _add_group(self, group, host):
+        group = self.inventory.add_group(self._sanitize_group_name(group))
+        self.inventory.add_child(group, host)
+
+    @staticmethod
+    def _host_names(hosts):
+        """The hostnames, with the ID appended to the names used more than once"""
+        counts = {}
+        for kind, group, hostvars in hosts:
+            counts[hostvars["name"]] = counts.get(hostvars["name"], 0) + 1
+        return [
+            (
+                "%s_%s" % (hostvars["name"], hostvars.get("id"))
+                if counts[hostvars["name"]] > 1
+                else hostvars["name"]
+            )
+            for kind, group, hostvars in hosts
+        ]
+
+    def _populate(self, hosts):
+        group_by = self.get_option("group_by")
+        strict = self.get_option("strict")
+        for hostname, (kind, group, hostvars) in zip(self._host_names(hosts), hosts):
+            host = self.inventory.add_host(hostname)
+            self._add_group(kind + "s", host)
+            if "group" in group_by and group:
+                self._add_group("%s_group_%s" % (kind, group), host)
+            for option, name, var in (
+                ("country", "country", "country_code"),
+                ("version", "version", "current_version"),
+                ("control_channel_status", "control_channel", "control_channel_status"),
+            ):
+                if option in group_by and hostvars.get(var):
+                    self._add_group("%s_%s" % (name, hostvars[var]), host)
+            hostvars = dict(hostvars, zpa_type=kind, zpa_name=hostvars["name"])
+            for var, value in hostvars.items():
+                # name is reserved, it is the inventory_hostname
+                if var != "name":
+                    self.inventory.set_variable(host, var, value)
+            self._set_composite_vars(
+                self.get_option("compose"), hostvars, host, strict=strict
+            )
+            self._add_host_to_composed_groups(
+                self.get_option("groups"), hostvars, host, strict=strict
+            )
+            self._add_host_to_keyed_groups(
+                self.get_option("keyed_groups"), hostvars, host, strict=strict
+            )
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        # cache may be True or False at this point to indicate if the inventory is being refreshed
+        # get the user's cache option too to see if we should save the cache if it is changing
+        user_cache_setting = self.get_option("cache")
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        hosts = None
+        if attempt_to_read_cache:
+            try:
+                hosts = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+        if hosts is None:
+            hosts = self._fetch()
+        if cache_needs_update:
+            self._cache[cache_key] = hosts
+
+        self._populate(hosts)
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+name: zpa_id
+short_description: Resolve the names of ZPA objects to their IDs
+description:
+    - Returns the ID of each of the given names of an object type, in the same order.
+    - The collection of the object type is listed once and its name to ID map is kept in memory for the
+      following lookups of the same process. With C(cache_ttl), the map is also written to a file cache
+      and reused by the other tasks of the run, and by the next runs, until it expires.
+author:
+    - William Guilherme (@willguibr)
+version_added: '1.0.0'
+options:
+  _terms:
+    description: The names to resolve.
+    required: true
+    type: list
+    elements: str
+  object_type:
+    description: The type of the named objects.
+    required: true
+    type: str
+    choices:
+      - app_connector_group
+      - application_segment
+      - application_server
+      - ba_certificate
+      - cloud_connector_group
+      - customer_version_profile
+      - enrollment_certificate
+      - idp
+      - machine_group
+      - posture_profile
+      - saml_attribute
+      - scim_attribute_header
+      - scim_group
+      - segment_group
+      - server_group
+      - service_edge_group
+      - trusted_network
+  idp_name:
+    description:
+      - The name of the IdP of the objects, required by the C(scim_group) and C(scim_attribute_header) object types.
+    type: str
+  id_key:
+    description:
+      - The field of the API object to return instead of its C(id), for example C(postureUdid) for the
+        posture profiles or C(networkId) for the trusted networks used in policy rule conditions.
+    type: str
+    default: id
+  on_missing:
+    description:
+      - What to do when a name is not found.
+      - C(error) fails, C(warn) returns null for the name with a warning and C(skip) returns null silently.
+    type: str
+    default: error
+    choices: ['error', 'warn', 'skip']
+  cache_ttl:
+    description:
+      - Seconds the name to ID maps are kept in the file cache, C(0) disables the file cache.
+    type: int
+    default: 0
+    env:
+      - name: ZPA_ID_CACHE_TTL
+  cache_dir:
+    description: Directory of the file cache.
+    type: path
+    default: ~/.ansible/tmp/zpa_id_cache
+    env:
+      - name: ZPA_ID_CACHE_DIR
+  client_id:
+    description: The ZPA API client ID.
+    type: str
+    env:
+      - name: ZPA_CLIENT_ID
+  client_secret:
+    description: The ZPA API client secret.
+    type: str
+    env:
+      - name: ZPA_CLIENT_SECRET
+  customer_id:
+    description: The ZPA tenant ID.
+    type: str
+    env:
+      - name: ZPA_CUSTOMER_ID
+  base_url:
+    description: The ZPA API base URL.
+    type: str
+    default: https://config.private.zscaler.com
+    env:
+      - name: ZPA_BASE_URL
+"""
+
+EXAMPLES = """
+- name: Create an application segment in groups referenced by name
+  willguibr.zpacloud.zpa_application_segment:
+    name: Example
+    segment_group_id: "{{ lookup('willguibr.zpacloud.zpa_id', 'Example Segment Group', object_type='segment_group') }}"
+    server_groups: "{{ query('willguibr.zpacloud.zpa_id', 'Group A', 'Group B', object_type='server_group')
+                       | map('community.general.dict_kv', 'id') }}"
+    domain_names:
+      - example.acme.com
+
+- name: Resolve SCIM groups, reusing the map in every task for an hour
+  ansible.builtin.set_fact:
+    scim_group_ids: "{{ query('willguibr.zpacloud.zpa_id', *scim_groups, object_type='scim_group',
+                              idp_name='IdP_Name', cache_ttl=3600) }}"
+"""
+
+RETURN = """
+_raw:
+    description: The IDs of the names, in the same order.
+    type: list
+    elements: str
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import to_text
+from ansible.plugins.lookup import LookupBase
+from ansible.utils.display import Display
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+from ansible_collections.willguibr.zpacloud.plugins.plugin_utils.zpa_plugin import (
+    ZPAPluginModule,
+)
+
+display = Display()
+
+IDP_PATH = "/mgmtconfig/v2/admin/customers/%(customer_id)s/idp"
+
+OBJECT_PATHS = dict(
+    app_connector_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/appConnectorGroup",
+    application_segment="/mgmtconfig/v1/admin/customers/%(customer_id)s/application",
+    application_server="/mgmtconfig/v1/admin/customers/%(customer_id)s/server",
+    ba_certificate="/mgmtconfig/v2/admin/customers/%(customer_id)s/clientlessCertificate/issued",
+    cloud_connector_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/cloudConnectorGroup",
+    customer_version_profile="/mgmtconfig/v1/admin/customers/%(customer_id)s/visible/versionProfiles",
+    enrollment_certificate="/mgmtconfig/v2/admin/customers/%(customer_id)s/enrollmentCert",
+    idp=IDP_PATH,
+    machine_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/machineGroup",
+    posture_profile="/mgmtconfig/v2/admin/customers/%(customer_id)s/posture",
+    saml_attribute="/mgmtconfig/v2/admin/customers/%(customer_id)s/samlAttribute",
+    scim_attribute_header="/mgmtconfig/v1/admin/customers/%(customer_id)s/idp/%(idp_id)s/scimattribute",
+    scim_group="/userconfig/v1/customers/%(customer_id)s/scimgroup/idpId/%(idp_id)s",
+    segment_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/segmentGroup",
+    server_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/serverGroup",
+    service_edge_group="/mgmtconfig/v1/admin/customers/%(customer_id)s/serviceEdgeGroup",
+    trusted_network="/mgmtconfig/v2/admin/customers/%(customer_id)s/network",
+)
+
+# name to ID maps of the process, keyed like the file cache
+_id_maps = {}
+
+
+class IdMapCache(object):
+    """File cache of name to ID maps, one file per map, expiring after ttl seconds"""
+
+    PREFIX = "zpa-id-"
+
+    def __init__(self, directory, ttl):
+        self.directory = os.path.expanduser(directory)
+        self.ttl = ttl
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "%s%s.json" % (self.PREFIX, name))
+
+    def load(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = json.loads(to_text(f.read()))
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get("key") != key or entry.get("expires_at", 0) < time.time():
+            return None
+        return entry.get("ids")
+
+    def store(self, key, ids):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        content = json.dumps(dict(key=key, expires_at=time.time() + self.ttl, ids=ids))
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content.encode("utf-8"))
+            # replaced atomically, readers see either the old or the new map
+            os.rename(tmp, self._path(key))
+        except (IOError, OSError):
+            os.unlink(tmp)
+
+
+class LookupModule(LookupBase):
+    def _client(self):
+        if self.rest is None:
+            self.rest = ZPAClientHelper(self.module)
+        return self.rest
+
+    def _id_map(self, path, id_key, file_cache, names):
+        """
+        Return the name to id_key map of the collection at path. A cached map
+        missing one of names may predate its object, the collection is listed again.
+        """
+        params = self.module.params
+        key = "|".join((params["base_url"], params["client_id"] or "", path, id_key))
+        ids = _id_maps.get(key)
+        if ids is None and file_cache is not None:
+            ids = file_cache.load(key)
+        if ids is None or any(name not in ids for name in names):
+            ids = {}
+            for item in self._client().iter_paginated_data(
+                base_url=path, data_key_name="list"
+            ):
+                # keep the first match, as the modules do
+                ids.setdefault(item.get("name"), item.get(id_key))
+            if file_cache is not None:
+                file_cache.store(key, ids)
+        _id_maps[key] = ids
+        return ids
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        self.module = ZPAPluginModule(
+            dict(
+                client_id=self.get_option("client_id"),
+                client_secret=self.get_option("client_secret"),
+                customer_id=self.get_option("customer_id"),
+                base_url=self.get_option("base_url"),
+            )
+        )
+        self.rest = None
+        object_type = self.get_option("object_type")
+        on_missing = self.get_option("on_missing")
+        file_cache = None
+        if self.get_option("cache_ttl"):
+            file_cache = IdMapCache(
+                self.get_option("cache_dir"), self.get_option("cache_ttl")
+            )
+
+        values = dict(customer_id=self.module.params.get("customer_id"))
+        path = OBJECT_PATHS[object_type]
+        if "%(idp_id)s" in path:
+            idp_name = self.get_option("idp_name")
+            if not idp_name:
+                raise AnsibleError("idp_name is required for %s" % object_type)
+            idp_id = self._id_map(IDP_PATH % values, "id", file_cache, [idp_name]).get(
+                idp_name
+            )
+            if idp_id is None:
+                raise AnsibleError("IdP not found: %s" % idp_name)
+            values["idp_id"] = idp_id
+        ids = self._id_map(path % values, self.get_option("id_key"), file_cache, terms)
+
+        result = []
+        for name in terms:
+            id = ids.get(name)
+            if id is None:
+                msg = "%s not found: %s" % (object_type, name)
+                if on_missing == "error":
+                    raise AnsibleError(msg)
+                if on_missing == "warn":
+                    display.warning(msg)
+            result.append(id)
+        return result
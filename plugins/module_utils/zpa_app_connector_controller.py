@@ -34,22 +34,24 @@ class AppConnectorControllerService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for connector in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/connector" % (self.customer_id),
             data_key_name="list",
-        )
-        connectors = []
-        for connector in list:
-            connectors.append(self.mapRespJSONToApp(connector))
-        return connectors
+        ):
+            yield self.mapRespJSONToApp(connector)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        connectors = self.getAll()
-        for connector in connectors:
-            if connector.get("name") == name:
-                return connector
-        return None
+        connector = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/connector" % (self.customer_id),
+            name=name,
+        )
+        if connector is None:
+            return None
+        return self.mapRespJSONToApp(connector)
 
     def mapConnectorsJSONToList(self, connectors):
         if connectors is None:
@@ -111,7 +113,7 @@ class AppConnectorControllerService:
             "platform": resp_json.get("platform"),
             "previous_version": resp_json.get("previousVersion"),
             "private_ip": resp_json.get("privateIp"),
-            "public_ip": resp_json.get("c"),
+            "public_ip": resp_json.get("publicIp"),
             "sarge_version": resp_json.get("sargeVersion"),
             "enrollment_cert": resp_json.get("enrollmentCert"),
             "upgrade_attempt": resp_json.get("upgradeAttempt"),
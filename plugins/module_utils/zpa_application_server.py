@@ -31,22 +31,24 @@ class ApplicationServerService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for application_server in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/server" % (self.customer_id),
             data_key_name="list",
-        )
-        application_servers = []
-        for application_server in list:
-            application_servers.append(self.mapRespJSONToApp(application_server))
-        return application_servers
+        ):
+            yield self.mapRespJSONToApp(application_server)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        application_servers = self.getAll()
-        for application_server in application_servers:
-            if application_server.get("name") == name:
-                return application_server
-        return None
+        application_server = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/server" % (self.customer_id),
+            name=name,
+        )
+        if application_server is None:
+            return None
+        return self.mapRespJSONToApp(application_server)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
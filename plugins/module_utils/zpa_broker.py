@@ -0,0 +1,310 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+"""
+Local API broker shared by the module runs of a host.
+
+Every fork of a run otherwise builds its own client, logs in, lists the same
+collections and retries into the rate limiter on its own. With the api_broker
+option, the first module run of a tenant forks a broker process listening on
+a Unix socket, and the clients of every module run send their calls through
+it. The broker keeps one client, so one token, one rate limit and one
+connection pool for the whole tenant, answers identical GETs in flight with
+a single API call and keeps their results for a few seconds, until a write.
+It exits once idle.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import errno
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    import socketserver
+
+    HAS_BROKER = hasattr(socket, "AF_UNIX")
+except ImportError:
+    HAS_BROKER = False
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.connection import ConnectionError, recv_data, send_data
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_memo import (
+    RequestMemo,
+)
+
+
+class BrokerError(Exception):
+    pass
+
+
+class BrokerModule(object):
+    """The parts of AnsibleModule used by ZPAClientHelper, in the broker process"""
+
+    check_mode = False
+
+    def __init__(self, params, remote_tmp, tmpdir):
+        self.params = params
+        self._remote_tmp = remote_tmp
+        # outlives the module run, whose own tmpdir is removed at exit
+        self.tmpdir = tmpdir
+
+    def fail_json(self, msg, **kwargs):
+        raise BrokerError(msg)
+
+    def exit_json(self, **kwargs):
+        pass
+
+    def warn(self, warning):
+        pass
+
+    def log(self, msg):
+        pass
+
+    def jsonify(self, data):
+        return json.dumps(data)
+
+
+class Broker(object):
+    """
+    Sends the calls of every connected client with one ZPAClientHelper.
+    Identical GETs in flight are sent once, successful GET results are kept
+    for cache_ttl seconds and a write drops the ones of its tenant.
+    """
+
+    def __init__(self, make_client, cache_ttl):
+        self.make_client = make_client
+        self.client = None
+        self.memo = RequestMemo(ttl=cache_ttl)
+        self._client_lock = threading.Lock()
+
+    def _client(self):
+        # built on the first call, so login errors go to the module that made it
+        with self._client_lock:
+            if self.client is None:
+                self.client = self.make_client()
+            return self.client
+
+    def _send(self, method, path, data):
+        resp = self._client().send(method, path, data)
+        headers = dict(
+            (k, v)
+            for k, v in resp.info.items()
+            if k != "body" and isinstance(v, (str, int, float))
+        )
+        return dict(status=resp.status_code, headers=headers, body=resp.text)
+
+    def request(self, method, path, data=None):
+        if method != "GET":
+            try:
+                return self._send(method, path, data)
+            finally:
+                # after the write, GETs in flight during it may predate it
+                self.memo.invalidate(path)
+        if data is not None:
+            return self._send(method, path, data)
+        return self.memo.get(
+            path,
+            lambda: self._send(method, path, data),
+            lambda result: result["status"] == 200,
+        )
+
+
+if HAS_BROKER:
+
+    class _Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            server = self.server
+            with server.activity_lock:
+                server.active += 1
+            try:
+                request = json.loads(to_text(recv_data(self.request)))
+                try:
+                    response = dict(
+                        result=server.broker.request(
+                            request["method"], request["path"], request.get("data")
+                        )
+                    )
+                except Exception as e:
+                    response = dict(error=to_text(e))
+                send_data(self.request, to_bytes(json.dumps(response)))
+            finally:
+                with server.activity_lock:
+                    server.active -= 1
+                    server.last_activity = time.time()
+
+    class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, listener, broker, idle_timeout):
+            socketserver.UnixStreamServer.__init__(
+                self, listener.getsockname(), _Handler, bind_and_activate=False
+            )
+            self.socket.close()
+            self.socket = listener
+            self.broker = broker
+            self.idle_timeout = idle_timeout
+            self.timeout = 1
+            self.active = 0
+            self.last_activity = time.time()
+            self.activity_lock = threading.Lock()
+
+        def idle(self):
+            with self.activity_lock:
+                return (
+                    not self.active
+                    and time.time() - self.last_activity > self.idle_timeout
+                )
+
+        def serve_until_idle(self):
+            while not self.idle():
+                self.handle_request()
+
+
+def broker_path(directory, baseurl, client_id, customer_id):
+    """Socket of the broker of a tenant, keyed like the token cache"""
+    key = hashlib.sha256(
+        ("%s|%s|%s" % (baseurl, client_id, customer_id)).encode("utf-8")
+    ).hexdigest()
+    # short, socket paths are limited to about 100 bytes
+    return os.path.join(directory, "zpa-broker-%s.sock" % key[:16])
+
+
+def _daemonize(run):
+    """Run run() in a detached grandchild process, return in the caller once it started"""
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+    try:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        # let go of the module's output, Ansible waits for it to be closed
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        run()
+    finally:
+        os._exit(0)
+
+
+class BrokerClient(object):
+    """
+    Sends the calls of a ZPAClientHelper through the broker at path, started
+    with make_client when it is not running. zpa_request() has the signature
+    of the httpapi plugin method, so the client uses either the same way.
+    """
+
+    def __init__(self, path, make_client, cache_ttl=5, idle_timeout=60):
+        self.path = path
+        self.make_client = make_client
+        self.cache_ttl = cache_ttl
+        self.idle_timeout = idle_timeout
+        self.ensure()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+        except socket.error:
+            sock.close()
+            raise
+        return sock
+
+    @contextmanager
+    def _spawn_lock(self):
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def ensure(self):
+        """Start the broker unless one is already listening"""
+        try:
+            self._connect().close()
+            return
+        except socket.error:
+            pass
+        with self._spawn_lock():
+            # another module run may have started it in the meantime
+            try:
+                self._connect().close()
+                return
+            except socket.error:
+                pass
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old_umask = os.umask(0o077)
+            try:
+                listener.bind(self.path)
+            finally:
+                os.umask(old_umask)
+            # listening before the fork, clients can connect as soon as this returns
+            listener.listen(128)
+            inode = os.stat(self.path).st_ino
+            broker = Broker(self.make_client, self.cache_ttl)
+
+            def run():
+                server = _Server(listener, broker, self.idle_timeout)
+                try:
+                    server.serve_until_idle()
+                finally:
+                    listener.close()
+                    try:
+                        # unless a newer broker took over the path
+                        if os.stat(self.path).st_ino == inode:
+                            os.unlink(self.path)
+                    except OSError:
+                        pass
+
+            _daemonize(run)
+            listener.close()
+
+    def zpa_request(self, params, method, path, data=None):
+        """Send an API call through the broker, params are the broker's own"""
+        request = to_bytes(json.dumps(dict(method=method, path=path, data=data)))
+        try:
+            try:
+                sock = self._connect()
+            except socket.error as e:
+                if e.errno not in (errno.ENOENT, errno.ECONNREFUSED):
+                    raise
+                # the broker exited while idle, nothing was sent yet
+                self.ensure()
+                sock = self._connect()
+            try:
+                send_data(sock, request)
+                response = recv_data(sock)
+            finally:
+                sock.close()
+        except socket.error as e:
+            raise ConnectionError("API broker %s: %s" % (self.path, to_text(e)))
+        if response is None:
+            raise ConnectionError("API broker %s closed the connection" % self.path)
+        response = json.loads(to_text(response))
+        if "error" in response:
+            raise ConnectionError(response["error"])
+        return response["result"]
@@ -32,23 +32,26 @@ class BrowserCertificateService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for certificate in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/clientlessCertificate/issued"
             % (self.customer_id),
             data_key_name="list",
-        )
-        certificates = []
-        for certificate in list:
-            certificates.append(self.mapRespJSONToApp(certificate))
-        return certificates
+        ):
+            yield self.mapRespJSONToApp(certificate)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        certificates = self.getAll()
-        for certificate in certificates:
-            if certificate.get("name") == name:
-                return certificate
-        return None
+        certificate = self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/clientlessCertificate/issued"
+            % (self.customer_id),
+            name=name,
+        )
+        if certificate is None:
+            return None
+        return self.mapRespJSONToApp(certificate)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
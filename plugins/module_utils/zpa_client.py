@@ -15,38 +15,283 @@ from ansible.module_utils.common.text.converters import jsonify
 
 __metaclass__ = type
 
+import base64
+import hashlib
+import io
 import json
+import os
 import random
+import tempfile
+import threading
 import time
 import urllib.parse
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.utils import mktime_tz, parsedate_tz
+from inspect import signature
+from itertools import islice
+
+try:
+    import fcntl
+
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 from ansible.module_utils._text import to_text
 from ansible.module_utils.basic import env_fallback
+from ansible.module_utils.connection import Connection, ConnectionError
 from ansible.module_utils.urls import fetch_url
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_broker import (
+    HAS_BROKER,
+    BrokerClient,
+    BrokerModule,
+    broker_path,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_memo import (
+    RequestMemo,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_transport import (
+    PooledTransport,
+)
+
+_json_decoder = json.JSONDecoder()
+
+# fetch_url decompresses gzip itself since ansible-core 2.14, Response does it instead
+FETCH_URL_DECOMPRESS = "decompress" in signature(fetch_url).parameters
+
+# size of the chunks read from a compressed response
+CHUNK_SIZE = 64 * 1024
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def decompress_body(read, encoding):
+    """
+    Read a gzip or deflate encoded body with read(size) and decompress it
+    chunk by chunk as it arrives. Returns (body, size of the encoded body).
+    """
+    wbits = zlib.MAX_WBITS
+    if encoding in ("gzip", "x-gzip"):
+        wbits |= 16
+    decoder = zlib.decompressobj(wbits)
+    chunks = []
+    size = 0
+    while True:
+        chunk = read(CHUNK_SIZE)
+        if not chunk:
+            break
+        try:
+            chunks.append(decoder.decompress(chunk))
+        except zlib.error:
+            if size or encoding != "deflate":
+                raise
+            # deflate is sometimes sent without its zlib header
+            decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            chunks.append(decoder.decompress(chunk))
+        size += len(chunk)
+    if not size:
+        return b"", 0
+    chunks.append(decoder.flush())
+    if not decoder.eof:
+        raise zlib.error("truncated body")
+    return b"".join(chunks), size
+
+
+def json_loads(data):
+    """Decode a JSON document, with orjson when it is installed"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(to_text(data))
+
+
+def iter_json_list(text, key, meta):
+    """
+    Yield the items of the top-level key array of the JSON object in text one
+    at a time, without building the whole list. The other top-level values
+    are decoded into meta as they are reached, so values that come after the
+    array are only there once the generator is exhausted.
+    """
+    ws = _whitespace.match
+    idx = ws(text, 0).end()
+    if text[idx : idx + 1] != "{":
+        return
+    idx = ws(text, idx + 1).end()
+    if text[idx : idx + 1] == "}":
+        return
+    while True:
+        name, idx = _json_decoder.raw_decode(text, idx)
+        idx = ws(text, idx).end()
+        if text[idx : idx + 1] != ":":
+            raise ValueError("Expecting ':' delimiter at char %d" % idx)
+        idx = ws(text, idx + 1).end()
+        if name == key and text[idx : idx + 1] == "[":
+            idx = ws(text, idx + 1).end()
+            if text[idx : idx + 1] == "]":
+                idx += 1
+            else:
+                while True:
+                    item, idx = _json_decoder.raw_decode(text, idx)
+                    yield item
+                    idx = ws(text, idx).end()
+                    delimiter = text[idx : idx + 1]
+                    idx += 1
+                    if delimiter == "]":
+                        break
+                    if delimiter != ",":
+                        raise ValueError("Expecting ',' delimiter at char %d" % idx)
+                    idx = ws(text, idx).end()
+        else:
+            meta[name], idx = _json_decoder.raw_decode(text, idx)
+        idx = ws(text, idx).end()
+        if text[idx : idx + 1] == "}":
+            return
+        if text[idx : idx + 1] != ",":
+            raise ValueError("Expecting ',' delimiter at char %d" % idx)
+        idx = ws(text, idx + 1).end()
+
+
+# verbosity of the API call logs, each level includes the ones before it
+LOG_LEVELS = {"off": 0, "summary": 1, "full": 2}
+
+
+# methods resent after a connection failure, a write may have been applied before it
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+def is_retryable(status_code, method=None):
+    """
+    Rate limited (429) and server errors (5xx) are worth retrying, connection
+    failures (-1) only for idempotent methods. method is None for calls
+    without side effects, e.g. signin.
+    """
+    if status_code == -1:
+        return method is None or method in IDEMPOTENT_METHODS
+    return status_code == 429 or status_code >= 500
+
+
+def rate_limit_delay(info, exhausted_only=False):
+    """
+    Return the number of seconds the API asks clients to wait, from the
+    Retry-After or X-RateLimit-Reset response headers, or None.
+    With exhausted_only the reset is only honoured once X-RateLimit-Remaining is 0.
+    """
+    if not isinstance(info, dict):
+        return None
+    retry_after = info.get("retry-after")
+    if retry_after and not exhausted_only:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, mktime_tz(parsedate_tz(retry_after)) - time.time())
+            except TypeError:
+                pass
+    reset = info.get("x-ratelimit-reset")
+    if not reset:
+        return None
+    if exhausted_only and str(info.get("x-ratelimit-remaining")) != "0":
+        return None
+    try:
+        reset = float(reset)
+    except ValueError:
+        return None
+    # either an epoch timestamp or a number of seconds
+    if reset > 1000000000:
+        reset -= time.time()
+    return max(0.0, reset)
+
+
+class Throttle(object):
+    """
+    Token bucket shared by every thread of a client. Each request takes a token,
+    tokens refill at rate per second up to burst. When the API asks to slow down,
+    pause() holds every thread until the deadline instead of each one sleeping
+    on its own schedule.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.time()
+        self.paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.time()
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if not self.rate:
+                        return
+                    self.tokens = min(
+                        self.burst, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self.tokens = 0
+            self.updated = max(self.updated, self.paused_until)
 
 
-def retry_with_backoff(retries=5, backoff_in_seconds=1):
+def retry_with_backoff(retries=5, backoff_in_seconds=1, endpoint=None):
     """
     This decorator should be used on functions that make HTTP calls and
-    returns Response
+    returns Response. Only retryable responses are retried, after the delay
+    requested by the API or an exponential backoff, other errors are returned
+    to the caller as is. The HTTP method and path, when the function takes
+    them, are its first arguments, otherwise endpoint is the (method, path)
+    its retries are counted against.
     """
 
     def decorator(f):
         def wrapper(*args):
+            method = args[1] if len(args) > 1 else None
+            call = endpoint or tuple(args[1:3])
             x = 0
             while True:
                 resp = f(*args)
-                if resp.status_code < 299 or resp.status_code == 400:
+                if not is_retryable(resp.status_code, method):
                     return resp
                 if x == retries:
                     raise Exception("Reached max retries: %s" % (resp.json))
                 else:
-                    sleep = backoff_in_seconds * 2 ** x + random.uniform(0, 1)
-                    args[0].module.log(
-                        "\n[INFO] args: %s\nretrying after %d seconds...\n"
-                        % (str(args), sleep)
+                    sleep = rate_limit_delay(resp.info)
+                    if sleep is None:
+                        sleep = backoff_in_seconds * 2 ** x + random.uniform(0, 1)
+                    args[0].log(
+                        "summary",
+                        "[INFO] %s %s: status %s, retrying after %d seconds...",
+                        f.__name__,
+                        " ".join(str(a) for a in args[1:3]),
+                        resp.status_code,
+                        sleep,
                     )
-                    time.sleep(sleep)
+                    if getattr(args[0], "metrics", None) is not None:
+                        args[0].metrics.retry(*call)
+                    throttle = getattr(args[0], "throttle", None)
+                    if throttle is not None:
+                        # hold every thread sharing the client, the retry waits in acquire()
+                        throttle.pause(sleep)
+                    else:
+                        time.sleep(sleep)
                     x += 1
 
         return wrapper
@@ -99,40 +344,520 @@ def snakecaseToCamelcase(obj):
     return new_obj
 
 
+def jwt_expiry(resp_json, access_token):
+    """Return the epoch time at which a signin token expires, or None if unknown"""
+    expires_in = resp_json.get("expires_in")
+    if expires_in:
+        try:
+            return time.time() + int(expires_in)
+        except ValueError:
+            pass
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(to_text(base64.urlsafe_b64decode(payload))).get("exp")
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+
+
+class TokenCache(object):
+    """
+    On-disk cache of ZPA bearer tokens, shared by every module run on a host.
+    Entries are keyed by (baseurl, client_id, customer_id), stored in files only
+    readable by the current user and guarded by an exclusive lock so that
+    concurrent forks log in once and reuse the same token.
+    """
+
+    # tokens are considered stale this many seconds before they really expire
+    EXPIRY_MARGIN = 300
+
+    def __init__(self, directory, baseurl, client_id, customer_id):
+        key = hashlib.sha256(
+            ("%s|%s|%s" % (baseurl, client_id, customer_id)).encode("utf-8")
+        ).hexdigest()
+        self.directory = directory
+        self.path = os.path.join(directory, "zpa-token-%s.json" % key)
+        self._fd = None
+
+    @contextmanager
+    def lock(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            self._fd = fd
+            yield self
+        finally:
+            self._fd = None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def load(self):
+        """Return (access_token, expires_at) if a usable token is cached, else None"""
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        content = b""
+        while True:
+            chunk = os.read(self._fd, 4096)
+            if not chunk:
+                break
+            content += chunk
+        try:
+            entry = json.loads(to_text(content))
+        except ValueError:
+            return None
+        access_token = entry.get("access_token")
+        expires_at = entry.get("expires_at")
+        if not access_token or not expires_at:
+            return None
+        if time.time() + self.EXPIRY_MARGIN >= expires_at:
+            return None
+        return access_token, expires_at
+
+    def store(self, access_token, expires_at):
+        content = json.dumps({"access_token": access_token, "expires_at": expires_at})
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.ftruncate(self._fd, 0)
+        os.write(self._fd, content.encode("utf-8"))
+
+    def clear(self):
+        os.ftruncate(self._fd, 0)
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of GET response bodies with their ETag and Last-Modified
+    validators. Cached URLs are requested with If-None-Match/If-Modified-Since
+    and a 304 is answered from the cache instead of downloading the body again.
+    Entries are keyed by (baseurl, client_id, customer_id, url), stored in files
+    only readable by the current user, and the least recently used ones are
+    evicted once the cache grows over max_size bytes.
+    """
+
+    PREFIX = "zpa-response-"
+
+    def __init__(self, directory, baseurl, client_id, customer_id, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.key = "%s|%s|%s" % (baseurl, client_id, customer_id)
+
+    def _path(self, url):
+        name = hashlib.sha256(("%s|%s" % (self.key, url)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "%s%s.json" % (self.PREFIX, name))
+
+    def load(self, url):
+        """Return the cached entry of url, a dict with body, etag and last_modified"""
+        try:
+            with open(self._path(url), "rb") as f:
+                entry = json.loads(to_text(f.read()))
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def touch(self, url):
+        """Mark the entry of url as recently used"""
+        try:
+            os.utime(self._path(url), None)
+        except OSError:
+            pass
+
+    def store(self, url, body, info):
+        etag = info.get("etag")
+        last_modified = info.get("last-modified")
+        if not etag and not last_modified:
+            return
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+        content = json.dumps(
+            {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "body": to_text(body),
+            }
+        )
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content.encode("utf-8"))
+            # replaced atomically, readers see either the old or the new entry
+            os.rename(tmp, self._path(url))
+        except (IOError, OSError):
+            os.unlink(tmp)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.startswith(self.PREFIX):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        entries.sort()
+        for mtime, size, name in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+class ApiStats(object):
+    """
+    Metrics of the API calls of a module run, aggregated per endpoint. Every
+    client of the module records into the same instance, which is returned
+    as api_stats by the module's exit_json and fail_json.
+    """
+
+    _ids = re.compile(r"/\d+(?=/|$)")
+
+    def __init__(self):
+        self.started = time.time()
+        self.calls = 0
+        self.retries = 0
+        self.logins = 0
+        self.rate_limited = 0
+        self.bytes = 0
+        # bytes received, as sent by the API, i.e. compressed when it compressed them
+        self.wire_bytes = 0
+        self.time = 0.0
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def attach(cls, module):
+        """Return the stats of module, adding api_stats to its results on first use"""
+        stats = getattr(module, "_zpa_api_stats", None)
+        if isinstance(stats, cls):
+            return stats
+        stats = cls()
+        module._zpa_api_stats = stats
+        exit_json = module.exit_json
+        fail_json = module.fail_json
+
+        def exit_with_stats(**kwargs):
+            kwargs.setdefault("api_stats", stats.as_dict())
+            exit_json(**kwargs)
+
+        def fail_with_stats(**kwargs):
+            kwargs.setdefault("api_stats", stats.as_dict())
+            fail_json(**kwargs)
+
+        module.exit_json = exit_with_stats
+        module.fail_json = fail_with_stats
+        return stats
+
+    @classmethod
+    def endpoint(cls, method, path):
+        """Normalize path to its endpoint, ids are replaced so calls group together"""
+        path = path.split("?", 1)[0]
+        return "%s %s" % (method, cls._ids.sub("/{id}", path))
+
+    def record(self, method, path, status, elapsed, size, wire_size=None):
+        if wire_size is None:
+            wire_size = size
+        key = self.endpoint(method, path)
+        with self._lock:
+            self.calls += 1
+            self.bytes += size
+            self.wire_bytes += wire_size
+            self.time += elapsed
+            if path == "/signin":
+                self.logins += 1
+            if status == 429:
+                self.rate_limited += 1
+            endpoint = self._endpoint(key)
+            endpoint["calls"] += 1
+            endpoint["time"] += elapsed
+            endpoint["max_time"] = max(endpoint["max_time"], elapsed)
+            endpoint["bytes"] += size
+            endpoint["wire_bytes"] += wire_size
+            status = str(status)
+            endpoint["statuses"][status] = endpoint["statuses"].get(status, 0) + 1
+
+    def _endpoint(self, key):
+        endpoint = self.endpoints.get(key)
+        if endpoint is None:
+            endpoint = self.endpoints[key] = dict(
+                calls=0,
+                retries=0,
+                time=0.0,
+                max_time=0.0,
+                bytes=0,
+                wire_bytes=0,
+                statuses={},
+            )
+        return endpoint
+
+    def retry(self, method=None, path=None):
+        """Count a retry, against the endpoint of method and path when known"""
+        with self._lock:
+            self.retries += 1
+            if method is not None and path is not None:
+                if not path.startswith("/"):
+                    path = "/" + path
+                self._endpoint(self.endpoint(method, path))["retries"] += 1
+
+    def as_dict(self):
+        with self._lock:
+            endpoints = {}
+            for key, endpoint in self.endpoints.items():
+                endpoint = dict(endpoint, statuses=dict(endpoint["statuses"]))
+                endpoint["time"] = round(endpoint["time"], 3)
+                endpoint["max_time"] = round(endpoint["max_time"], 3)
+                endpoints[key] = endpoint
+            return dict(
+                calls=self.calls,
+                retries=self.retries,
+                logins=self.logins,
+                rate_limited=self.rate_limited,
+                bytes=self.bytes,
+                wire_bytes=self.wire_bytes,
+                time=round(self.time, 3),
+                elapsed=round(time.time() - self.started, 3),
+                endpoints=endpoints,
+            )
+
+
+# collection indexes shared by every client of the process, keyed by collection URL
+_collection_indexes = {}
+_collection_indexes_lock = threading.Lock()
+
+# GET responses shared by every client of the process, until a write to their tenant
+_request_memo = RequestMemo()
+
+
+class CollectionIndex(object):
+    """
+    Lookup tables over the raw items of a collection listing. The table of a
+    key (id, name, postureUdid, ...) is built on its first lookup, every lookup
+    after that is a dict access instead of another listing.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self._tables = {}
+
+    def get(self, key, value):
+        table = self._tables.get(key)
+        if table is None:
+            table = {}
+            for item in self.items:
+                # keep the first match, as a linear scan would
+                table.setdefault(item.get(key), item)
+            self._tables[key] = table
+        return table.get(value)
+
+
 class Response(object):
+    """
+    Response of an API call. The body is decoded on first access and the result
+    is kept, so the status checks, logging and lookups that read it again do
+    not decode the same payload each time.
+    """
+
+    _unset = object()
+
+    # encodings decompressed from the body, others are kept as is
+    ENCODINGS = ("gzip", "x-gzip", "deflate")
+
     def __init__(self, resp, info):
         self.body = None
-        if resp:
+        # bytes received when the body was compressed, None otherwise
+        self.compressed_size = None
+        encoding = (info.get("content-encoding") or "").strip().lower()
+        if encoding in self.ENCODINGS:
+            info = dict(info)
+            del info["content-encoding"]
+            try:
+                if resp:
+                    self.body, self.compressed_size = decompress_body(
+                        resp.read, encoding
+                    )
+                if not self.body and info.get("body"):
+                    # error bodies are read by fetch_url, still compressed, and
+                    # the HTTPError it returns as resp is already drained
+                    body = info["body"]
+                    info["body"], self.compressed_size = decompress_body(
+                        io.BytesIO(body).read, encoding
+                    )
+            except zlib.error as e:
+                # a truncated or corrupt transfer, failed like a connection so GETs
+                # are retried, writes are not as the server already applied them
+                info = dict(info, status=-1, msg="Invalid %s body: %s" % (encoding, e))
+                info.pop("body", None)
+                self.body = None
+        elif resp:
             self.body = resp.read()
         self.info = info
+        self._text = self._unset
+        self._json = self._unset
+
+    @property
+    def text(self):
+        if self._text is self._unset:
+            body = self.body
+            if not body:
+                body = self.info.get("body")
+            self._text = None if body is None else to_text(body)
+        return self._text
 
     @property
     def json(self):
-        if not self.body:
-            if "body" in self.info:
-                return json.loads(to_text(self.info.get("body")))
-            return None
-        try:
-            return json.loads(to_text(self.body))
-        except ValueError:
-            return None
+        if self._json is self._unset:
+            if not self.body:
+                if "body" in self.info:
+                    self._json = json_loads(self.info.get("body"))
+                    return self._json
+                self._json = None
+                return None
+            try:
+                self._json = json_loads(self.body)
+            except ValueError:
+                self._json = None
+        return self._json
+
+    def iter_list(self, key, meta):
+        """
+        Yield the items of the key array of the body, the other top-level values
+        are stored in meta. Without a fast decoder, or when the body was already
+        decoded, the items are decoded one at a time instead of all at once.
+        """
+        if HAS_ORJSON or self._json is not self._unset or self.text is None:
+            resp_json = self.json
+            if not isinstance(resp_json, dict):
+                return
+            meta.update((k, v) for k, v in resp_json.items() if k != key)
+            items = resp_json.get(key)
+        else:
+            items = iter_json_list(self.text, key, meta)
+        for item in items or []:
+            yield item
 
     @property
     def status_code(self):
         return self.info.get("status")
 
+    def copy(self):
+        """Return a Response of the same body, decoded again for callers that modify it"""
+        info = dict(self.info)
+        if self.body:
+            info["body"] = self.body
+        return Response(None, info)
+
 
 class ZPAClientHelper:
     def __init__(self, module):
-        self.baseurl = "https://config.private.zscaler.com"
+        self.baseurl = (
+            module.params.get("base_url") or "https://config.private.zscaler.com"
+        ).rstrip("/")
         # self.private_baseurl = "https://api.private.zscaler.com"
         self.timeout = 240
         self.module = module
         self.client_id = module.params.get("client_id")
         self.client_secret = module.params.get("client_secret")
         self.customer_id = module.params.get("customer_id")
+        self.max_workers = module.params.get("max_workers") or 1
+        self.log_level = module.params.get("log_level") or "summary"
+        self.metrics = None
+        if module.params.get("collect_metrics"):
+            self.metrics = ApiStats.attach(module)
+        rate_limit = module.params.get("rate_limit")
+        if rate_limit is None:
+            rate_limit = 2.0
+        # allow bursts of up to 10 seconds worth of requests
+        self.throttle = Throttle(rate_limit, rate_limit * 10)
+        self.connection = None
+        socket_path = getattr(module, "_socket_path", None)
+        if socket_path:
+            # the persistent connection of the willguibr.zpacloud.zpa httpapi
+            # plugin owns the token, connections and caches, calls go through it
+            self.connection = Connection(socket_path)
+        elif module.params.get("api_broker") and HAS_BROKER:
+            self.connection = BrokerClient(
+                broker_path(
+                    self._cache_dir("zpa_broker"),
+                    self.baseurl,
+                    self.client_id,
+                    self.customer_id,
+                ),
+                self._broker_client,
+                cache_ttl=module.params.get("api_broker_cache_ttl") or 0,
+                idle_timeout=module.params.get("api_broker_idle_timeout") or 60,
+            )
+        self.transport = None
+        if module.params.get("connection_pool") and self.connection is None:
+            self.transport = PooledTransport.shared(
+                pool_size=module.params.get("connection_pool_size") or self.max_workers,
+                idle_timeout=module.params.get("connection_idle_timeout") or 60,
+                validate_certs=module.params.get("validate_certs", True),
+            )
         self.tries = 0
-        # login
+        self.access_token = None
+        # epoch time at which the token is refreshed before a request, None if unknown
+        self.refresh_at = None
+        self._auth_lock = threading.Lock()
+        self.headers = {  # 'referer': self.baseurl,
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        if module.params.get("compression", True):
+            self.headers["Accept-Encoding"] = "gzip, deflate"
+        self.token_cache = None
+        if module.params.get("token_cache", True) and HAS_FCNTL:
+            self.token_cache = TokenCache(
+                self._cache_dir("zpa_token_cache"),
+                self.baseurl,
+                self.client_id,
+                self.customer_id,
+            )
+        self.response_cache = None
+        if module.params.get("response_cache"):
+            self.response_cache = ResponseCache(
+                self._cache_dir("zpa_response_cache"),
+                self.baseurl,
+                self.client_id,
+                self.customer_id,
+                (module.params.get("response_cache_size") or 100) * 1024 * 1024,
+            )
+        if self.connection is None:
+            self.authenticate()
+
+    def _broker_client(self):
+        """Build the client of the broker process, which sends the calls itself"""
+        params = dict(
+            self._client_params(),
+            api_broker=False,
+            collect_metrics=False,
+            log_level="off",
+        )
+        return ZPAClientHelper(
+            BrokerModule(
+                params,
+                getattr(self.module, "_remote_tmp", None),
+                self._cache_dir("zpa_broker"),
+            )
+        )
+
+    def _cache_dir(self, name):
+        basedir = getattr(self.module, "_remote_tmp", None)
+        if basedir:
+            basedir = os.path.expanduser(os.path.expandvars(basedir))
+        else:
+            basedir = tempfile.gettempdir()
+        return os.path.join(basedir, name)
+
+    def _signin(self):
         response = self.login()
         if response is None or response.status_code > 299 or response.json is None:
             self.module.fail_json(
@@ -140,15 +865,47 @@ class ZPAClientHelper:
                 % (response)
             )
         resp_json = response.json
-        self.access_token = resp_json.get("access_token")
-        self.module.log("[INFO] access_token: '%s'" % (self.access_token))
-        self.headers = {  # 'referer': self.baseurl,
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": "Bearer %s" % (self.access_token),
-        }
+        access_token = resp_json.get("access_token")
+        return access_token, jwt_expiry(resp_json, access_token)
 
-    @retry_with_backoff(retries=5)
+    def authenticate(self, stale_token=None):
+        """
+        Set the bearer token, reusing a cached one when possible.
+        stale_token is a token the API just rejected, it is never reused.
+        """
+        with self._auth_lock:
+            if stale_token is not None and self.access_token != stale_token:
+                # another thread already replaced it
+                return
+            if self.token_cache is None:
+                access_token, expires_at = self._signin()
+            else:
+                with self.token_cache.lock() as cache:
+                    cached = cache.load()
+                    if cached is not None and cached[0] != stale_token:
+                        access_token, expires_at = cached
+                    else:
+                        access_token, expires_at = self._signin()
+                        if expires_at is not None:
+                            cache.store(access_token, expires_at)
+                        else:
+                            cache.clear()
+            self.refresh_at = None
+            if expires_at is not None:
+                # short lived tokens are refreshed half way through their lifetime
+                lifetime = expires_at - time.time()
+                self.refresh_at = expires_at - min(
+                    TokenCache.EXPIRY_MARGIN, lifetime / 2
+                )
+            self.access_token = access_token
+            self.headers["Authorization"] = "Bearer %s" % (self.access_token)
+
+    def refresh_token(self):
+        """Replace the token before it expires, long paginations and bulk runs outlive it"""
+        if self.refresh_at is not None and time.time() >= self.refresh_at:
+            self.authenticate(stale_token=self.access_token)
+
+    @retry_with_backoff(retries=5, endpoint=("POST", "/signin"))
     def login(self):
         """get jwt token"""
         data = urllib.parse.urlencode(
@@ -160,16 +917,7 @@ class ZPAClientHelper:
         }
         try:
             url = "%s/signin" % self.baseurl
-            resp, info = fetch_url(
-                module=self.module, url=url, data=data, method="POST", headers=headers
-            )
-            resp = Response(resp, info)
-            self.module.log(
-                "[INFO] calling: %s %s %s\n response: %s"
-                % ("POST", url, str(data), str("" if resp is None else resp.json))
-            )
-            # self.module.log("[INFO] %s\n" % (to_text(resp.read())))
-            return resp
+            return self._request("POST", url, data, headers=headers)
         except Exception as e:
             self._fail("login", str(e))
 
@@ -191,35 +939,189 @@ class ZPAClientHelper:
             path = path[1:]
         return "%s/%s" % (self.baseurl, path)
 
-    @retry_with_backoff(retries=5)
-    def send(self, method, path, data=None, fail_safe=False):
-        url = self._url_builder(path)
-        data = self.module.jsonify(data)
-        if method == "DELETE":
-            if data == "null":
-                data = None
+    def _request(self, method, url, data, headers=None):
+        if headers is None:
+            headers = self.headers
+        self.throttle.acquire()
+        start = time.time()
+        if self.transport is not None:
+            resp, info = self.transport.request(
+                method, url, data=data, headers=headers, timeout=self.timeout
+            )
+        else:
+            kwargs = {}
+            if FETCH_URL_DECOMPRESS:
+                kwargs["decompress"] = False
+            resp, info = fetch_url(
+                self.module,
+                url,
+                data=data,
+                headers=headers,
+                method=method,
+                timeout=self.timeout,
+                **kwargs
+            )
+        response = Response(resp, info)
+        self._record_request(method, url, data, response, time.time() - start)
+        # slow down before the API starts rejecting requests
+        delay = rate_limit_delay(info, exhausted_only=True)
+        if delay:
+            self.throttle.pause(delay)
+        return response
+
+    def log(self, level, msg, *args):
+        """Log msg % args if level is enabled, nothing is formatted otherwise"""
+        if LOG_LEVELS[level] > LOG_LEVELS[self.log_level]:
+            return
+        self.module.log(msg % args if args else msg)
 
-        resp, info = fetch_url(
-            self.module,
+    def _record_request(self, method, url, data, response, elapsed):
+        """Log the call and add it to the metrics, as enabled"""
+        if self.log_level == "off" and self.metrics is None:
+            return
+        path = url[len(self.baseurl) :] if url.startswith(self.baseurl) else url
+        size = len(response.body or response.info.get("body") or b"")
+        wire_size = size
+        if response.compressed_size is not None:
+            wire_size = response.compressed_size
+        if self.metrics is not None:
+            self.metrics.record(
+                method, path, response.status_code, elapsed, size, wire_size
+            )
+        if self.log_level == "off":
+            return
+        sizes = "%d bytes" % size
+        if response.compressed_size is not None:
+            sizes += " (%d compressed)" % response.compressed_size
+        if self.log_level == "summary":
+            self.log(
+                "summary",
+                "[INFO] %s %s: status %s, %s in %.3fs",
+                method,
+                path,
+                response.status_code,
+                sizes,
+                elapsed,
+            )
+            return
+        if path == "/signin":
+            data = "client_id=%s&client_secret=********" % self.client_id
+            text = "********"
+        else:
+            text = response.text
+        self.log(
+            "full",
+            "[INFO] calling: %s %s %s\n status %s, %s in %.3fs\n response: %s",
+            method,
             url,
-            data=data,
-            headers=self.headers,
-            method=method,
-            timeout=self.timeout,
-        )
-        resp = Response(resp, info)
-        self.module.log(
-            "[INFO] calling: %s %s %s\n response: %s"
-            % (method, url, str(data), str("" if resp is None else resp.json))
+            data,
+            response.status_code,
+            sizes,
+            elapsed,
+            text,
         )
+
+    def _conditional_headers(self, cached):
+        """Return the headers that revalidate a cached response, or None"""
+        if cached is None:
+            return None
+        headers = dict(self.headers)
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    def send(self, method, path, data=None, fail_safe=False):
+        if method != "GET":
+            self.invalidate_indexes()
+        try:
+            if self.connection is not None:
+                resp = self._send_persistent(method, path, data)
+            else:
+                resp = self._send(method, path, data)
+        finally:
+            if method != "GET":
+                # after the write, GETs in flight during it may predate it
+                _request_memo.invalidate(self._url_builder(path))
+        return self._check_bad_request(resp, fail_safe)
+
+    def _check_bad_request(self, resp, fail_safe):
         if resp.status_code == 400 and fail_safe:
             self.module.fail_json(
                 msg="Operation failed. API response: %s\n" % (resp.json)
             )
         return resp
 
+    def _client_params(self):
+        return dict(
+            (name, self.module.params.get(name)) for name in self.zpa_argument_spec()
+        )
+
+    def _send_persistent(self, method, path, data):
+        """Send the call through the persistent connection, which retries it as needed"""
+        url = self._url_builder(path)
+        start = time.time()
+        try:
+            result = self.connection.zpa_request(
+                self._client_params(), method, path, data
+            )
+        except ConnectionError as e:
+            self.module.fail_json(msg="%s %s: %s" % (method, path, to_text(e)))
+        info = dict(result.get("headers") or {}, status=result["status"], url=url)
+        if result.get("body"):
+            info["body"] = result["body"]
+        resp = Response(None, info)
+        self._record_request(method, url, data, resp, time.time() - start)
+        return resp
+
+    @retry_with_backoff(retries=5)
+    def _send(self, method, path, data=None):
+        url = self._url_builder(path)
+        data = self.module.jsonify(data)
+        if method == "DELETE":
+            if data == "null":
+                data = None
+
+        # every attempt, retries included, is sent with a valid token
+        self.refresh_token()
+        token = self.access_token
+        cached = None
+        if method == "GET" and self.response_cache is not None:
+            cached = self.response_cache.load(url)
+        resp = self._request(method, url, data, self._conditional_headers(cached))
+        if resp.status_code == 401:
+            # the token may have been revoked or expired since it was cached,
+            # replace it once and replay the request
+            self.authenticate(stale_token=token)
+            resp = self._request(method, url, data, self._conditional_headers(cached))
+        if cached is not None and resp.status_code == 304:
+            self.response_cache.touch(url)
+            resp = Response(None, {"status": 200, "body": cached["body"], "url": url})
+        elif (
+            method == "GET"
+            and self.response_cache is not None
+            and resp.status_code == 200
+        ):
+            self.response_cache.store(url, resp.body, resp.info)
+        return resp
+
     def get(self, path, data=None, fail_safe=False):
-        return self.send("GET", path, data, fail_safe)
+        if data is not None:
+            return self.send("GET", path, data, fail_safe)
+        item = self._indexed_item(path)
+        if item is not None:
+            return Response(None, {"status": 200, "body": json.dumps(item)})
+        # identical GETs in flight are sent once, successful ones are kept until a
+        # write, but for listing pages, which would otherwise stay in memory after
+        # their items were consumed
+        memoize = "?" not in path
+        resp = _request_memo.get(
+            self._url_builder(path),
+            lambda: self.send("GET", path),
+            lambda response: memoize and response.status_code == 200,
+        )
+        return self._check_bad_request(resp.copy(), fail_safe)
 
     def put(self, path, data=None):
         return self.send("PUT", path, data)
@@ -254,61 +1156,327 @@ class ZPAClientHelper:
                     ["ZPA_CUSTOMER_ID"],
                 ),
             ),
+            base_url=dict(
+                type="str",
+                default="https://config.private.zscaler.com",
+                fallback=(
+                    env_fallback,
+                    ["ZPA_BASE_URL"],
+                ),
+            ),
+            log_level=dict(
+                type="str",
+                default="summary",
+                choices=["off", "summary", "full"],
+                fallback=(
+                    env_fallback,
+                    ["ZPA_LOG_LEVEL"],
+                ),
+            ),
+            collect_metrics=dict(
+                type="bool",
+                default=False,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_COLLECT_METRICS"],
+                ),
+            ),
+            token_cache=dict(
+                type="bool",
+                default=True,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_TOKEN_CACHE"],
+                ),
+            ),
+            max_workers=dict(
+                type="int",
+                default=4,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_MAX_WORKERS"],
+                ),
+            ),
+            rate_limit=dict(
+                type="float",
+                default=2.0,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_RATE_LIMIT"],
+                ),
+            ),
+            response_cache=dict(
+                type="bool",
+                default=False,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_RESPONSE_CACHE"],
+                ),
+            ),
+            response_cache_size=dict(
+                type="int",
+                default=100,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_RESPONSE_CACHE_SIZE"],
+                ),
+            ),
+            connection_pool=dict(
+                type="bool",
+                default=False,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_CONNECTION_POOL"],
+                ),
+            ),
+            connection_pool_size=dict(
+                type="int",
+                fallback=(
+                    env_fallback,
+                    ["ZPA_CONNECTION_POOL_SIZE"],
+                ),
+            ),
+            connection_idle_timeout=dict(
+                type="int",
+                default=60,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_CONNECTION_IDLE_TIMEOUT"],
+                ),
+            ),
+            compression=dict(
+                type="bool",
+                default=True,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_COMPRESSION"],
+                ),
+            ),
+            api_broker=dict(
+                type="bool",
+                default=False,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_API_BROKER"],
+                ),
+            ),
+            api_broker_cache_ttl=dict(
+                type="int",
+                default=5,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_API_BROKER_CACHE_TTL"],
+                ),
+            ),
+            api_broker_idle_timeout=dict(
+                type="int",
+                default=60,
+                fallback=(
+                    env_fallback,
+                    ["ZPA_API_BROKER_IDLE_TIMEOUT"],
+                ),
+            ),
         )
 
+    def _get_page(self, base_url, page, data_per_page, search=None):
+        url = "{0}?page={1}&pagesize={2}".format(base_url, page, data_per_page)
+        if search is not None:
+            url += "&search={0}".format(urllib.parse.quote(search, safe=""))
+        return self.get(url)
+
+    def _check_page(self, response, base_url, data_key_name, expected_status_code):
+        # stop if any error during pagination
+        if response.status_code != expected_status_code:
+            msg = "Failed to fetch %s from %s" % (data_key_name, base_url)
+            if response.json is not None:
+                msg += " due to error : %s" % response.json.get("message")
+            self.module.fail_json(msg=msg)
+
+    def iter_paginated_data(
+        self,
+        base_url=None,
+        data_key_name=None,
+        data_per_page=500,
+        expected_status_code=200,
+        max_workers=None,
+        search=None,
+    ):
+        """
+        Generator yielding the items of all pages of given URL, in page order.
+        The first page is fetched alone to read totalPages, up to max_workers of
+        the following pages are then kept in flight while items are consumed, so
+        a caller that stops early does not download the rest of the collection.
+        Args:
+            base_url: Base URL to get data from
+            data_key_name: Name of data key value
+            data_per_page: Number results per page (Default: 500)
+            expected_status_code: Expected returned code from ZPA (Default: 200)
+            max_workers: Maximum number of pages fetched in parallel (Default: max_workers option)
+            search: Only list items matching this server-side search string (Default: None)
+        Returns: Generator of data
+
+        """
+        if max_workers is None:
+            max_workers = self.max_workers
+        # ZPA pages are numbered from 1
+        response = self._get_page(base_url, 1, data_per_page, search)
+        self._check_page(response, base_url, data_key_name, expected_status_code)
+        meta = {}
+        for item in response.iter_list(data_key_name, meta):
+            yield item
+        # drop the page so only the items being consumed are kept
+        response = None
+        try:
+            total_pages = int(meta.get("totalPages") or 1)
+        except ValueError:
+            total_pages = 1
+
+        def fetch(page):
+            return self._get_page(base_url, page, data_per_page, search)
+
+        pages = iter(range(2, total_pages + 1))
+        if max_workers <= 1:
+            futures = None
+            responses = (fetch(page) for page in pages)
+        else:
+            pool = ThreadPoolExecutor(max_workers=max_workers)
+            futures = deque(
+                pool.submit(fetch, page) for page in islice(pages, max_workers)
+            )
+
+            def responses_from_pool():
+                while futures:
+                    response = futures.popleft().result()
+                    for page in islice(pages, 1):
+                        futures.append(pool.submit(fetch, page))
+                    yield response
+
+            responses = responses_from_pool()
+        try:
+            for response in responses:
+                self._check_page(
+                    response, base_url, data_key_name, expected_status_code
+                )
+                items = response.iter_list(data_key_name, {})
+                response = None
+                for item in items:
+                    yield item
+        finally:
+            if futures is not None:
+                for future in futures:
+                    future.cancel()
+                pool.shutdown(wait=True)
+
     def get_paginated_data(
         self,
         base_url=None,
         data_key_name=None,
         data_per_page=500,
         expected_status_code=200,
+        max_workers=None,
     ):
         """
         Function to get all paginated data from given URL
         Args:
             base_url: Base URL to get data from
             data_key_name: Name of data key value
-            data_per_page: Number results per page (Default: 40)
-            expected_status_code: Expected returned code from DigitalOcean (Default: 200)
+            data_per_page: Number results per page (Default: 500)
+            expected_status_code: Expected returned code from ZPA (Default: 200)
+            max_workers: Maximum number of pages fetched in parallel (Default: max_workers option)
         Returns: List of data
 
         """
-        page = 0
-        has_next = True
-        ret_data = []
-        status_code = None
-        response = None
-        while has_next or status_code != expected_status_code:
-            required_url = "{0}?page={1}&pagesize={2}".format(
-                base_url, page, data_per_page
+        return list(
+            self.iter_paginated_data(
+                base_url=base_url,
+                data_key_name=data_key_name,
+                data_per_page=data_per_page,
+                expected_status_code=expected_status_code,
+                max_workers=max_workers,
             )
-            response = self.get(required_url)
-            status_code = response.status_code
-            # stop if any error during pagination
-            if status_code != expected_status_code:
-                break
-            page += 1
-            if (
-                response is None
-                or response.json is None
-                or response.json.get(data_key_name) is None
-            ):
-                has_next = False
-                continue
-            ret_data.extend(response.json[data_key_name])
-            try:
-                has_next = (
-                    response.json.get("totalPages") is not None
-                    and int(response.json["totalPages"]) != 0
-                    and int(response.json["totalPages"]) < page
-                )
-            except KeyError:
-                has_next = False
+        )
 
-        if status_code != expected_status_code:
-            msg = "Failed to fetch %s from %s" % (data_key_name, base_url)
-            if response:
-                msg += " due to error : %s" % response.json.get("message")
-            self.module.fail_json(msg=msg)
+    def get_index(self, base_url, data_key_name="list"):
+        """
+        Function to get the CollectionIndex of given URL. The collection is only
+        listed the first time it is requested in the process, until a write.
+        Args:
+            base_url: Base URL to get data from
+            data_key_name: Name of data key value (Default: list)
+        Returns: CollectionIndex
+
+        """
+        url = self._url_builder(base_url)
+        index = _collection_indexes.get(url)
+        if index is None:
+            index = CollectionIndex(
+                self.get_paginated_data(base_url=base_url, data_key_name=data_key_name)
+            )
+            with _collection_indexes_lock:
+                index = _collection_indexes.setdefault(url, index)
+        return index
+
+    def cached_index(self, base_url):
+        """Return the CollectionIndex of given URL if it is already built, else None"""
+        return _collection_indexes.get(self._url_builder(base_url))
 
-        return ret_data
+    @staticmethod
+    def invalidate_indexes():
+        # writes have side effects across collections (e.g. an application
+        # segment write changes its segment group), drop every index
+        with _collection_indexes_lock:
+            _collection_indexes.clear()
+
+    @staticmethod
+    def invalidate_memo():
+        """Drop the memoized GET responses of the process"""
+        _request_memo.invalidate()
+
+    def _indexed_item(self, path):
+        """Return the item at path, e.g. .../application/<id>, if its collection is indexed"""
+        if "?" in path:
+            return None
+        collection, _, id = path.rstrip("/").rpartition("/")
+        index = self.cached_index(collection) if collection else None
+        if index is None:
+            return None
+        return index.get("id", id)
+
+    def search_by_name(self, base_url, name, data_key_name="list", name_key="name"):
+        """
+        Function to find the item of given URL whose name is exactly name.
+        The API search parameter narrows the listing to a page or so, results
+        are always verified on the client side. The full collection is only
+        walked when the search is ambiguous, i.e. it returned candidates but not
+        exactly one exact match (the API search is a case-insensitive partial match).
+        Args:
+            base_url: Base URL to get data from
+            name: Name of the item
+            data_key_name: Name of data key value (Default: list)
+            name_key: Name of the key holding the item name (Default: name)
+        Returns: Raw JSON of the item, or None when not found
+
+        """
+        if name is None:
+            return None
+        index = self.cached_index(base_url)
+        if index is not None:
+            return index.get(name_key, name)
+        candidates = 0
+        matches = []
+        for item in self.iter_paginated_data(
+            base_url=base_url, data_key_name=data_key_name, search=name
+        ):
+            candidates += 1
+            if item.get(name_key) == name:
+                matches.append(item)
+        if len(matches) == 1:
+            return matches[0]
+        if candidates == 0:
+            return None
+        for item in self.iter_paginated_data(
+            base_url=base_url, data_key_name=data_key_name
+        ):
+            if item.get(name_key) == name:
+                return item
+        return None
@@ -32,23 +32,26 @@ class CloudConnectorGroupService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for app in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/cloudConnectorGroup"
             % (self.customer_id),
             data_key_name="list",
-        )
-        cloud_connectors = []
-        for app in list:
-            cloud_connectors.append(self.mapRespJSONToApp(app))
-        return cloud_connectors
+        ):
+            yield self.mapRespJSONToApp(app)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        cloud_connectors = self.getAll()
-        for cloud_connector in cloud_connectors:
-            if cloud_connector.get("name") == name:
-                return cloud_connector
-        return None
+        app = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/cloudConnectorGroup"
+            % (self.customer_id),
+            name=name,
+        )
+        if app is None:
+            return None
+        return self.mapRespJSONToApp(app)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
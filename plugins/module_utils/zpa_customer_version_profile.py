@@ -35,23 +35,26 @@ class ProfileVersionService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for network in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/visible/versionProfiles"
             % (self.customer_id),
             data_key_name="list",
-        )
-        networks = []
-        for network in list:
-            networks.append(self.mapRespJSONToApp(network))
-        return networks
+        ):
+            yield self.mapRespJSONToApp(network)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        networks = self.getAll()
-        for network in networks:
-            if network.get("name") == name:
-                return network
-        return None
+        network = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/visible/versionProfiles"
+            % (self.customer_id),
+            name=name,
+        )
+        if network is None:
+            return None
+        return self.mapRespJSONToApp(network)
 
     def mapJSONCustomScopeCustomerIds(self, d):
         if d is None:
@@ -0,0 +1,104 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+from ansible.module_utils.six import integer_types, string_types
+
+
+def is_empty(value):
+    return value is None or value == "" or value == [] or value == {}
+
+
+def normalize(value):
+    """
+    Canonical form of a mapped value for comparison: {id} references reduce
+    to their id, lists are order-insensitive, numbers compare as strings and
+    empty values (None, "", [], {}) as None.
+    """
+    if is_empty(value):
+        return None
+    if isinstance(value, dict):
+        if value.get("id") is not None:
+            return normalize(value.get("id"))
+        return (
+            dict((k, normalize(v)) for k, v in value.items() if not is_empty(v)) or None
+        )
+    if isinstance(value, list):
+        items = [normalize(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True))
+    if isinstance(value, bool) or isinstance(value, string_types):
+        return value
+    if isinstance(value, integer_types) or isinstance(value, float):
+        return str(value)
+    return value
+
+
+def differs(existing, desired):
+    """
+    Whether the desired value differs from the existing one. Unset desired
+    values (None) are not managed and never differ, and only the keys set in
+    a desired dict are compared so server-side fields are ignored.
+    """
+    if desired is None:
+        return False
+    if (
+        isinstance(desired, dict)
+        and desired.get("id") is None
+        and isinstance(existing, dict)
+    ):
+        return any(differs(existing.get(k), v) for k, v in desired.items())
+    if (
+        isinstance(desired, list)
+        and isinstance(existing, list)
+        and any(is_structure(item) for item in desired)
+    ):
+        return not matches(existing, desired)
+    return normalize(existing) != normalize(desired)
+
+
+def is_structure(value):
+    """Whether value is a nested object, e.g. a condition, rather than an {id} reference"""
+    return isinstance(value, dict) and value.get("id") is None
+
+
+def matches(existing, desired):
+    """
+    Whether each desired item matches its own existing item, in any order.
+    Items are compared with differs(), so the IDs the server assigns to
+    nested objects and the fields they do not set are ignored.
+    """
+    desired = [item for item in desired if not is_empty(item)]
+    existing = [item for item in existing if not is_empty(item)]
+    if len(desired) != len(existing):
+        return False
+    if not desired:
+        return True
+    item = desired[0]
+    for i, candidate in enumerate(existing):
+        if not differs(candidate, item) and matches(
+            existing[:i] + existing[i + 1 :], desired[1:]
+        ):
+            return True
+    return False
+
+
+def field_diff(existing, desired, ignore=("id",)):
+    """
+    Compare the desired mapped dict of a resource with the existing one.
+    Returns None when nothing differs, otherwise a diff suitable for the
+    module result, with the before and after values of the fields that differ.
+    """
+    existing = existing or {}
+    before = {}
+    after = {}
+    for key, value in desired.items():
+        if key in ignore or not differs(existing.get(key), value):
+            continue
+        if existing.get(key) is not None:
+            before[key] = existing.get(key)
+        after[key] = value
+    if not after:
+        return None
+    return dict(before=before, after=after)
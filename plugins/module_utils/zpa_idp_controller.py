@@ -31,22 +31,24 @@ class IDPControllerService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for idp in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/idp" % (self.customer_id),
             data_key_name="list",
-        )
-        idps = []
-        for idp in list:
-            idps.append(self.mapRespJSONToApp(idp))
-        return idps
+        ):
+            yield self.mapRespJSONToApp(idp)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        idps = self.getAll()
-        for idp in idps:
-            if idp.get("name") == name:
-                return idp
-        return None
+        idp = self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/idp" % (self.customer_id),
+            name=name,
+        )
+        if idp is None:
+            return None
+        return self.mapRespJSONToApp(idp)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -35,19 +35,18 @@ class LSSConfigControllerService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for lss_config in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/lssConfig" % (self.customer_id),
             data_key_name="list",
-        )
-        lss_configs = []
-        for lss_config in list:
-            lss_configs.append(self.mapRespJSONToApp(lss_config))
-        return lss_configs
+        ):
+            yield self.mapRespJSONToApp(lss_config)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        lss_configs = self.getAll()
-        for lss_config in lss_configs:
+        for lss_config in self.iterAll():
             if lss_config.get("config", {}).get("name") == name:
                 return lss_config
         return None
@@ -31,23 +31,26 @@ class MachineGroupService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for machineGroup in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/machineGroup"
             % (self.customer_id),
             data_key_name="list",
-        )
-        machineGroups = []
-        for machineGroup in list:
-            machineGroups.append(self.mapRespJSONToApp(machineGroup))
-        return machineGroups
+        ):
+            yield self.mapRespJSONToApp(machineGroup)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        machineGroups = self.getAll()
-        for machineGroup in machineGroups:
-            if machineGroup.get("name") == name:
-                return machineGroup
-        return None
+        machineGroup = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/machineGroup"
+            % (self.customer_id),
+            name=name,
+        )
+        if machineGroup is None:
+            return None
+        return self.mapRespJSONToApp(machineGroup)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -0,0 +1,100 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import re
+import threading
+import time
+
+_tenant = re.compile(r"^(\w+://[^/]+)?(?:[^?]*?(/customers/[^/?]+))?")
+
+
+def write_scope(url):
+    """
+    Return the part of url a write to it may change, its host and customers/<id>.
+    Writes have side effects across collections (e.g. an application segment
+    write changes its segment group), so a write overlaps every GET of its
+    tenant, whatever the collection and API version.
+    """
+    match = _tenant.match(url)
+    return (match.group(1) or "") + (match.group(2) or "")
+
+
+class _Call(object):
+    """A GET in flight, the result of its first caller is shared with the others"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestMemo(object):
+    """
+    Results of GET requests by URL. Identical requests in flight are sent once
+    and their callers share the result. The results that keep() accepts are
+    memoized for ttl seconds, or until invalidated with ttl None, and a write
+    invalidates the ones of its tenant.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._results = {}
+        self._inflight = {}
+        # bumped by every invalidation, GETs in flight across one are not memoized
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, fetch, keep):
+        with self._lock:
+            entry = self._results.get(url)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                return entry[1]
+            key = (self._generation, url)
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _Call()
+        if not owner:
+            call.done.wait()
+        else:
+            try:
+                call.result = fetch()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                    if (
+                        call.error is None
+                        and self.ttl != 0
+                        and key[0] == self._generation
+                        and keep(call.result)
+                    ):
+                        expires_at = None
+                        if self.ttl is not None:
+                            expires_at = time.time() + self.ttl
+                        self._results[url] = (expires_at, call.result)
+                call.done.set()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def invalidate(self, url=None):
+        """Drop the results of the tenant of url, every result without url"""
+        with self._lock:
+            self._generation += 1
+            if url is None:
+                self._results.clear()
+                return
+            scope = write_scope(url)
+            for key in [k for k in self._results if write_scope(k) == scope]:
+                del self._results[key]
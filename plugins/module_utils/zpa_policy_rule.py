@@ -0,0 +1,718 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+    camelcaseToSnakeCase,
+    delete_none,
+)
+
+# distinct IDs of a kind above which its collection is listed once instead of
+# getting every ID
+LIST_THRESHOLD = 5
+
+# kind -> (collection path, key of the ID in the listing, getter by ID)
+REFERENCES = dict(
+    app=("/mgmtconfig/v1/admin/customers/%s/application", "id", "getAppSegmentByID"),
+    segment_group=(
+        "/mgmtconfig/v1/admin/customers/%s/segmentGroup",
+        "id",
+        "getSegmentGroupByID",
+    ),
+    idp=("/mgmtconfig/v2/admin/customers/%s/idp", "id", "getIDPControllerByID"),
+    cloud_connector_group=(
+        "/mgmtconfig/v1/admin/customers/%s/cloudConnectorGroup",
+        "id",
+        "getCloudConnectorGroupByID",
+    ),
+    machine_group=(
+        "/mgmtconfig/v1/admin/customers/%s/machineGroup",
+        "id",
+        "getMachineGroupByID",
+    ),
+    posture=("/mgmtconfig/v2/admin/customers/%s/posture", "postureUdid", None),
+    trusted_network=("/mgmtconfig/v2/admin/customers/%s/network", "networkId", None),
+    saml_attribute=(
+        "/mgmtconfig/v2/admin/customers/%s/samlAttribute",
+        "id",
+        "getSamlAttribute",
+    ),
+    scim_attribute=(None, "id", "getScimAttributeByID"),
+    scim_group=(None, "id", "getScimGroupByID"),
+)
+
+# operand object type -> (operand side, kind) of the objects it refers to
+OPERAND_REFERENCES = dict(
+    APP=[("rhs", "app")],
+    APP_GROUP=[("rhs", "segment_group")],
+    IDP=[("rhs", "idp")],
+    EDGE_CONNECTOR_GROUP=[("rhs", "cloud_connector_group")],
+    MACHINE_GRP=[("rhs", "machine_group")],
+    POSTURE=[("lhs", "posture")],
+    TRUSTED_NETWORK=[("lhs", "trusted_network")],
+    SAML=[("lhs", "saml_attribute")],
+    SCIM=[("lhs", "scim_attribute")],
+    SCIM_GROUP=[("lhs", "idp"), ("rhs", "scim_group")],
+)
+
+
+class PolicyRuleService(object):
+    """
+    Rules of a policy set. The services of the access, timeout and forwarding
+    policies only differ by their field maps and the operands they accept.
+    """
+
+    # snake_case key -> API key of the rule fields, besides the conditions
+    FIELDS = dict(
+        id="id",
+        name="name",
+        description="description",
+        action="action",
+        action_id="actionId",
+        custom_msg="customMsg",
+        default_rule="defaultRule",
+        operator="operator",
+        policy_set_id="policySetId",
+        policy_type="policyType",
+        priority="priority",
+        rule_order="ruleOrder",
+    )
+    # fields of FIELDS only read from the API, or only sent to it
+    READ_ONLY_FIELDS = ()
+    WRITE_ONLY_FIELDS = ()
+    # snake_case key -> API key of the lists of {id} references
+    REFERENCE_FIELDS = {}
+    # object types of the operands accepted in the conditions
+    OPERAND_TYPES = (
+        "APP",
+        "APP_GROUP",
+        "IDP",
+        "EDGE_CONNECTOR_GROUP",
+        "CLIENT_TYPE",
+        "MACHINE_GRP",
+        "POSTURE",
+        "TRUSTED_NETWORK",
+        "SAML",
+        "SCIM",
+        "SCIM_GROUP",
+    )
+    CLIENT_TYPES = (
+        "zpn_client_type_zapp",
+        "zpn_client_type_exporter",
+        "zpn_client_type_ip_anchoring",
+        "zpn_client_type_browser_isolation",
+        "zpn_client_type_machine_tunnel",
+        "zpn_client_type_edge_connector",
+    )
+
+    def __init__(self, module, customer_id, rest=None):
+        self.module = module
+        self.customer_id = customer_id
+        self.rest = rest if rest is not None else ZPAClientHelper(module)
+
+    def getByIDOrName(self, id, name, policy_set_id, policy_type):
+        policy_rule = None
+        if id is not None:
+            policy_rule = self.getByID(id, policy_set_id)
+        if policy_rule is None and name is not None:
+            policy_rule = self.getByNameAndType(name, policy_type)
+        return policy_rule
+
+    def getByPolicyType(self, policyType):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/policyType/%s"
+            % (self.customer_id, policyType)
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return camelcaseToSnakeCase(response.json)
+
+    def getByID(self, id, policy_set_id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/%s/rule/%s"
+            % (self.customer_id, policy_set_id, id)
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return self.mapRespJSONToPolicy(response.json)
+
+    def iterAllByPolicyType(self, policy_type):
+        for policy_rule in self.rest.iter_paginated_data(
+            base_url="/mgmtconfig/v1/admin/customers/%s/policySet/rules/policyType/%s"
+            % (self.customer_id, policy_type),
+            data_key_name="list",
+        ):
+            yield self.mapRespJSONToPolicy(policy_rule)
+
+    def getAllByPolicyType(self, policy_type):
+        return list(self.iterAllByPolicyType(policy_type))
+
+    def getByNameAndType(self, name, type):
+        policy_rule = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/policySet/rules/policyType/%s"
+            % (self.customer_id, type),
+            name=name,
+        )
+        if policy_rule is None:
+            return None
+        return self.mapRespJSONToPolicy(policy_rule)
+
+    def mapListJSONToList(self, entities):
+        if entities is None:
+            return []
+        l = []
+        for s in entities:
+            l.append(camelcaseToSnakeCase(s))
+        return l
+
+    def mapListToJSONObjList(self, entities):
+        if entities is None:
+            return []
+        l = []
+        for e in entities:
+            l.append(dict(id=e.get("id")))
+        return l
+
+    def mapOperandsToList(self, operandsJSON):
+        ops = []
+        for op in operandsJSON:
+            ops.append(
+                {
+                    "id": op.get("id"),
+                    "creation_time": op.get("creationTime"),
+                    "modified_by": op.get("modifiedBy"),
+                    "object_type": op.get("objectType"),
+                    "lhs": op.get("lhs"),
+                    "rhs": op.get("rhs"),
+                    "name": op.get("name"),
+                    "idp_id": op.get("idpId"),
+                }
+            )
+        return ops
+
+    def mapOperandsToListJSON(self, operandsJSON):
+        ops = []
+        for op in operandsJSON:
+            ops.append(
+                {
+                    "objectType": op.get("object_type"),
+                    "lhs": op.get("lhs"),
+                    "rhs": op.get("rhs"),
+                    "name": op.get("name"),
+                    "idpId": op.get("idp_id"),
+                }
+            )
+        return ops
+
+    def mapConditionsToList(self, conditionsJSON):
+        conds = []
+        if conditionsJSON is None:
+            return conds
+        for cond in conditionsJSON:
+            """ """
+            conds.append(
+                {
+                    "id": cond.get("id"),
+                    "modified_time": cond.get("modifiedTime"),
+                    "creation_time": cond.get("creationTime"),
+                    "modified_by": cond.get("modifiedBy"),
+                    "operator": cond.get("operator"),
+                    "negated": cond.get("negated"),
+                    "operands": self.mapOperandsToList(cond.get("operands")),
+                }
+            )
+        return conds
+
+    def mapConditionsToJSONList(self, conditions):
+        conds = []
+        if conditions is None:
+            return conds
+        for cond in conditions:
+            """ """
+            conds.append(
+                {
+                    "operator": cond.get("operator"),
+                    "negated": cond.get("negated"),
+                    "operands": self.mapOperandsToListJSON(cond.get("operands")),
+                }
+            )
+        return conds
+
+    @delete_none
+    def mapRespJSONToPolicy(self, resp_json):
+        if resp_json is None:
+            return {}
+        policy_rule = dict(
+            (key, resp_json.get(api_key))
+            for key, api_key in self.FIELDS.items()
+            if key not in self.WRITE_ONLY_FIELDS
+        )
+        for key, api_key in self.REFERENCE_FIELDS.items():
+            policy_rule[key] = self.mapListJSONToList(resp_json.get(api_key))
+        policy_rule["conditions"] = self.mapConditionsToList(
+            resp_json.get("conditions")
+        )
+        return policy_rule
+
+    @delete_none
+    def mapAppToJSON(self, policy_rule):
+        if policy_rule is None:
+            return {}
+        ruleJson = dict(
+            (api_key, policy_rule.get(key))
+            for key, api_key in self.FIELDS.items()
+            if key not in self.READ_ONLY_FIELDS
+        )
+        for key, api_key in self.REFERENCE_FIELDS.items():
+            ruleJson[api_key] = self.mapListToJSONObjList(policy_rule.get(key))
+        ruleJson["conditions"] = self.mapConditionsToJSONList(
+            policy_rule.get("conditions")
+        )
+        return ruleJson
+
+    def customValidate(self, operand, expectedLHS, expectedRHS, getByID):
+        if operand.get("lhs", "") == "" or not operand.get("lhs") in expectedLHS:
+            return self.lhsWarn(
+                operand.get("objectType"), expectedLHS, operand.get("lhs"), None
+            )
+        if operand.get("rhs", "") == "":
+            return self.rhsWarn(
+                operand.get("objectType"), expectedRHS, operand.get("rhs"), None
+            )
+        resp = getByID(operand.get("rhs"))
+        if resp:
+            return True
+        return self.rhsWarn(
+            operand.get("objectType"), expectedRHS, operand.get("rhs"), resp
+        )
+
+    def rhsWarn(self, objType, expected, rhs, err):
+        return (
+            '[WARN] when operand object type is %s RHS must be an existing %s, value is "%s", %s\n'
+            % (objType, expected, rhs, err)
+        )
+
+    def lhsWarn(self, objType, expected, lhs, err):
+        return (
+            '[WARN] when operand object type is %s LHS must be an existing %s value is "%s", %s\n'
+            % (objType, expected, lhs, err)
+        )
+
+    def reorder(self, rule_id, policy_set_id, order):
+        """reorder the Policy rule"""
+        response = self.rest.put(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/%s/rule/%s/reorder/%s"
+            % (self.customer_id, policy_set_id, rule_id, order)
+        )
+        status_code = response.status_code
+        if status_code > 299:
+            return None
+        return self.getByID(rule_id, policy_set_id)
+
+    def getAppSegmentByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/application/%s" % (self.customer_id, id)
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getSegmentGroupByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/segmentGroup/%s"
+            % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getIDPControllerByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/idp/%s" % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getCloudConnectorGroupByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/cloudConnectorGroup/%s"
+            % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def validClientType(self, id):
+        if id not in self.CLIENT_TYPES:
+            return "RHS values must be %s when object type is CLIENT_TYPE" % (
+                " or ".join("'%s'" % t for t in self.CLIENT_TYPES)
+            )
+        return True
+
+    def getMachineGroupByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/machineGroup/%s"
+            % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getByPostureUDID(self, postureUDID):
+        postures = self.rest.get_index(
+            "/mgmtconfig/v2/admin/customers/%s/posture" % (self.customer_id)
+        )
+        if postures.get("postureUdid", postureUDID) is None:
+            return None
+        return True
+
+    def getTrustedNetworkByNetID(self, networkID):
+        networks = self.rest.get_index(
+            "/mgmtconfig/v2/admin/customers/%s/network" % (self.customer_id)
+        )
+        if networks.get("networkId", networkID) is None:
+            return None
+        return True
+
+    def getSamlAttribute(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/samlAttribute/%s"
+            % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getScimAttributeByID(self, id):
+        response = self.rest.get(
+            "/mgmtconfig/v1/admin/customers/%s/idp/scimattribute/%s"
+            % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def getScimGroupByID(self, id):
+        response = self.rest.get(
+            "/userconfig/v1/customers/%s/scimgroup/%s" % (self.customer_id, id),
+            fail_safe=True,
+        )
+        status_code = response.status_code
+        if status_code != 200:
+            return None
+        return True
+
+    def operandReferences(self, operand):
+        """Return the (kind, id) of the objects operand refers to"""
+        refs = []
+        for side, kind in OPERAND_REFERENCES.get(operand.get("objectType"), []):
+            if operand.get(side) is not None and operand.get(side) != "":
+                refs.append((kind, operand.get(side)))
+        return refs
+
+    def resolveReferences(self, refs):
+        """
+        Return the set of the (kind, id) of refs that exist. The IDs of a kind
+        are deduplicated, and checked with a single listing of its collection
+        when there are more than LIST_THRESHOLD of them, or when the kind is
+        not looked up by ID, else with concurrent GETs.
+        """
+        ids_by_kind = {}
+        for kind, id in refs:
+            ids_by_kind.setdefault(kind, set()).add(id)
+        found = set()
+        gets = []
+        for kind, ids in ids_by_kind.items():
+            path, key, getter = REFERENCES[kind]
+            if path is not None and (getter is None or len(ids) > LIST_THRESHOLD):
+                index = self.rest.get_index(path % (self.customer_id))
+                found.update((kind, id) for id in ids if index.get(key, id) is not None)
+            else:
+                gets.extend((kind, id) for id in ids)
+
+        def exists(ref):
+            kind, id = ref
+            return ref if getattr(self, REFERENCES[kind][2])(id) else None
+
+        if len(gets) == 1:
+            results = [exists(gets[0])]
+        elif gets:
+            with ThreadPoolExecutor(max_workers=self.rest.max_workers) as executor:
+                results = list(executor.map(exists, gets))
+        else:
+            results = []
+        found.update(ref for ref in results if ref is not None)
+        return found
+
+    def referenceExists(self, kind, id):
+        return (kind, id) in self.resolveReferences([(kind, id)])
+
+    def validateOperand(self, operand, exists=None):
+        """
+        Validate operand, exists(kind, id) tells whether the object it refers
+        to exists (by default it is looked up).
+        """
+        exists = exists or self.referenceExists
+        objType = operand.get("objectType")
+        if objType not in self.OPERAND_TYPES:
+            return "[WARN] invalid operand object type %s\n" % (objType)
+        if objType == "APP":
+            return self.customValidate(
+                operand, ["id"], "application segment ID", partial(exists, "app")
+            )
+        elif objType == "APP_GROUP":
+            return self.customValidate(
+                operand, ["id"], "Segment Group ID", partial(exists, "segment_group")
+            )
+        elif objType == "IDP":
+            return self.customValidate(
+                operand, ["id"], "IDP ID", partial(exists, "idp")
+            )
+        elif objType == "EDGE_CONNECTOR_GROUP":
+            return self.customValidate(
+                operand,
+                ["id"],
+                "cloud connector group ID",
+                partial(exists, "cloud_connector_group"),
+            )
+        elif objType == "CLIENT_TYPE":
+            return self.customValidate(
+                operand,
+                ["id"],
+                " or ".join("'%s'" % t for t in self.CLIENT_TYPES),
+                lambda id: self.validClientType(id) is True,
+            )
+        elif objType == "MACHINE_GRP":
+            return self.customValidate(
+                operand, ["id"], "machine group ID", partial(exists, "machine_group")
+            )
+        elif objType == "POSTURE":
+            if operand.get("lhs") is None or operand.get("lhs") == "":
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid posture profile ID",
+                    operand.get("lhs"),
+                    None,
+                )
+            resp = exists("posture", operand.get("lhs"))
+            if not resp:
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid posture profile ID",
+                    operand.get("lhs"),
+                    resp,
+                )
+            if not operand.get("rhs") in ["true", "false"]:
+                return self.rhsWarn(
+                    operand.get("objectType"),
+                    '"true"/"false"',
+                    operand.get("rhs"),
+                    None,
+                )
+            return True
+        elif objType == "TRUSTED_NETWORK":
+            if operand.get("lhs") is None or operand.get("lhs") == "":
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid trusted network ID",
+                    operand.get("lhs"),
+                    None,
+                )
+            resp = exists("trusted_network", operand.get("lhs"))
+            if not resp:
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid trusted network ID",
+                    operand.get("lhs"),
+                    resp,
+                )
+            if operand.get("rhs") != "true":
+                return self.rhsWarn(
+                    operand.get("objectType"), '"true"', operand.get("rhs"), None
+                )
+            return True
+        elif objType == "SAML":
+            if operand.get("lhs") is None or operand.get("lhs") == "":
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid SAML Attribute ID",
+                    operand.get("lhs"),
+                    None,
+                )
+            resp = exists("saml_attribute", operand.get("lhs"))
+            if not resp:
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid SAML Attribute ID",
+                    operand.get("lhs"),
+                    resp,
+                )
+            if operand.get("rhs") is None or operand.get("rhs") == "":
+                return self.rhsWarn(
+                    operand.get("objectType"),
+                    "SAML Attribute Value",
+                    operand.get("rhs"),
+                    None,
+                )
+            return True
+        elif objType == "SCIM":
+            if operand.get("lhs") is None or operand.get("lhs") == "":
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid SCIM Attribute ID",
+                    operand.get("lhs"),
+                    None,
+                )
+            resp = exists("scim_attribute", operand.get("lhs"))
+            if not resp:
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid SCIM Attribute ID",
+                    operand.get("lhs"),
+                    resp,
+                )
+            if operand.get("rhs") is None or operand.get("rhs") == "":
+                return self.rhsWarn(
+                    operand.get("objectType"),
+                    "SCIM Attribute Value",
+                    operand.get("rhs"),
+                    None,
+                )
+            return True
+        elif objType == "SCIM_GROUP":
+            if operand.get("lhs") is None or operand.get("lhs") == "":
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid IDP Controller ID",
+                    operand.get("lhs"),
+                    None,
+                )
+            resp = exists("idp", operand.get("lhs"))
+            if not resp:
+                return self.lhsWarn(
+                    operand.get("objectType"),
+                    "valid IDP Controller ID",
+                    operand.get("lhs"),
+                    resp,
+                )
+            if operand.get("rhs") is None or operand.get("rhs") == "":
+                return self.rhsWarn(
+                    operand.get("objectType"), "SCIM Group ID", operand.get("rhs"), None
+                )
+            resp = exists("scim_group", operand.get("rhs"))
+            if not resp:
+                return self.rhsWarn(
+                    operand.get("objectType"), "SCIM Group ID", operand.get("rhs"), resp
+                )
+            return True
+        else:
+            return "[WARN] invalid operand object type %s\n" % (
+                operand.get("objectType")
+            )
+
+    def validateConditions(self, conditions):
+        """
+        Validate the operands of all conditions, resolving the objects they
+        refer to in batch. Returns True, or the warnings of every invalid operand.
+        """
+        operands = [
+            operand
+            for condition in conditions or []
+            for operand in condition.get("operands") or []
+        ]
+        refs = []
+        for operand in operands:
+            refs.extend(self.operandReferences(operand))
+        found = self.resolveReferences(refs)
+        errors = []
+        for operand in operands:
+            check = self.validateOperand(operand, lambda kind, id: (kind, id) in found)
+            if check is not True:
+                errors.append(check)
+        if errors:
+            return "".join(errors)
+        return True
+
+    def create(self, policy_rule, policy_set_id):
+        """Create new Policy rule"""
+        ruleJson = self.mapAppToJSON(policy_rule)
+        check = self.validateConditions(
+            [] if ruleJson is None else ruleJson.get("conditions")
+        )
+        if check is not True:
+            self.module.fail_json(
+                msg="validating policy rule conditions failed: %s" % (check)
+            )
+        response = self.rest.post(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/%s/rule"
+            % (self.customer_id, policy_set_id),
+            data=ruleJson,
+        )
+        status_code = response.status_code
+        if status_code > 299:
+            return None
+        rule = self.getByID(response.json.get("id"), policy_set_id)
+        if (
+            policy_rule.get("rule_order") is not None
+            and policy_rule.get("rule_order") != ""
+        ):
+            return self.reorder(
+                rule.get("id"), policy_set_id, policy_rule.get("rule_order")
+            )
+        return rule
+
+    def update(self, policy_rule, policy_set_id):
+        """update the Policy rule"""
+        ruleJson = self.mapAppToJSON(policy_rule)
+        check = self.validateConditions(
+            [] if ruleJson is None else ruleJson.get("conditions")
+        )
+        if check is not True:
+            self.module.fail_json(
+                msg="validating policy rule conditions failed: %s" % (check)
+            )
+        response = self.rest.put(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/%s/rule/%s"
+            % (self.customer_id, policy_set_id, ruleJson.get("id")),
+            data=ruleJson,
+        )
+        status_code = response.status_code
+        if status_code > 299:
+            return None
+        rule = self.getByID(ruleJson.get("id"), policy_set_id)
+        if (
+            policy_rule.get("rule_order") is not None
+            and policy_rule.get("rule_order") != ""
+        ):
+            return self.reorder(
+                rule.get("id"), policy_set_id, policy_rule.get("rule_order")
+            )
+        return rule
+
+    def delete(self, id, policy_set_id):
+        """delete the Policy rule"""
+        response = self.rest.delete(
+            "/mgmtconfig/v1/admin/customers/%s/policySet/%s/rule/%s"
+            % (self.customer_id, policy_set_id, id)
+        )
+        return response.status_code
@@ -31,22 +31,24 @@ class PostureProfileService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for posture in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/posture" % (self.customer_id),
             data_key_name="list",
-        )
-        postures = []
-        for posture in list:
-            postures.append(self.mapRespJSONToApp(posture))
-        return postures
+        ):
+            yield self.mapRespJSONToApp(posture)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        postures = self.getAll()
-        for posture in postures:
-            if posture.get("name") == name:
-                return posture
-        return None
+        posture = self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/posture" % (self.customer_id),
+            name=name,
+        )
+        if posture is None:
+            return None
+        return self.mapRespJSONToApp(posture)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
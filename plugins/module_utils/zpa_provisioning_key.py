@@ -35,16 +35,16 @@ class ProvisioningKeyService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self, association_type):
-        list = self.rest.get_paginated_data(
+    def iterAll(self, association_type):
+        for provisioning_key in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/associationType/%s/provisioningKey"
             % (self.customer_id, association_type),
             data_key_name="list",
-        )
-        provisioning_keys = []
-        for provisioning_key in list:
-            provisioning_keys.append(self.mapRespJSONToApp(provisioning_key))
-        return provisioning_keys
+        ):
+            yield self.mapRespJSONToApp(provisioning_key)
+
+    def getAll(self, association_type):
+        return list(self.iterAll(association_type))
 
     def getByNameAllAssociations(self, name):
         for assoc_type in self.association_types:
@@ -61,11 +61,14 @@ class ProvisioningKeyService:
             return None
 
     def getByName(self, name, association_type):
-        provisioning_keys = self.getAll(association_type)
-        for provisioning_key in provisioning_keys:
-            if provisioning_key.get("name") == name:
-                return provisioning_key
-        return None
+        provisioning_key = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/associationType/%s/provisioningKey"
+            % (self.customer_id, association_type),
+            name=name,
+        )
+        if provisioning_key is None:
+            return None
+        return self.mapRespJSONToApp(provisioning_key)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -32,23 +32,26 @@ class SamlAttributeService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for samlAttribute in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/samlAttribute"
             % (self.customer_id),
             data_key_name="list",
-        )
-        samlAttributes = []
-        for samlAttribute in list:
-            samlAttributes.append(self.mapRespJSONToApp(samlAttribute))
-        return samlAttributes
+        ):
+            yield self.mapRespJSONToApp(samlAttribute)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        samlAttributes = self.getAll()
-        for samlAttribute in samlAttributes:
-            if samlAttribute.get("name") == name:
-                return samlAttribute
-        return None
+        samlAttribute = self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/samlAttribute"
+            % (self.customer_id),
+            name=name,
+        )
+        if samlAttribute is None:
+            return None
+        return self.mapRespJSONToApp(samlAttribute)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -43,32 +43,37 @@ class ScimAttributeHeaderService:
         return list
 
     def getIDPByName(self, idpName):
-        idps = self.getAllIDPControllersRaw()
-        for idp in idps:
-            if idp.get("name") == idpName:
-                return idp
-        return None
+        return self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/idp" % (self.customer_id),
+            name=idpName,
+        )
 
-    def getAllByIDPName(self, idpName):
+    def iterAllByIDPName(self, idpName):
         idp = self.getIDPByName(idpName)
         if idp is None or idp.get("id") is None:
-            return []
-        list = self.rest.get_paginated_data(
+            return
+        for scimAttribute in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/idp/%s/scimattribute"
             % (self.customer_id, idp.get("id")),
             data_key_name="list",
-        )
-        scimAttributes = []
-        for scimAttribute in list:
-            scimAttributes.append(self.mapRespJSONToApp(scimAttribute))
-        return scimAttributes
+        ):
+            yield self.mapRespJSONToApp(scimAttribute)
+
+    def getAllByIDPName(self, idpName):
+        return list(self.iterAllByIDPName(idpName))
 
     def getByName(self, name, idpName):
-        samlAttributes = self.getAllByIDPName(idpName)
-        for samlAttribute in samlAttributes:
-            if samlAttribute.get("name") == name:
-                return samlAttribute
-        return None
+        idp = self.getIDPByName(idpName)
+        if idp is None or idp.get("id") is None:
+            return None
+        scimAttribute = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/idp/%s/scimattribute"
+            % (self.customer_id, idp.get("id")),
+            name=name,
+        )
+        if scimAttribute is None:
+            return None
+        return self.mapRespJSONToApp(scimAttribute)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
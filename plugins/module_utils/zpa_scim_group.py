@@ -39,11 +39,10 @@ class ScimGroupService:
         return list
 
     def getIDPByName(self, idpName):
-        idps = self.getAllIDPControllersRaw()
-        for idp in idps:
-            if idp.get("name") == idpName:
-                return idp
-        return None
+        return self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/idp" % (self.customer_id),
+            name=idpName,
+        )
 
     def getAllByIDPName(self, idpName):
         idp = self.getIDPByName(idpName)
@@ -51,23 +50,29 @@ class ScimGroupService:
             return None
         return self.getAll(idp.get("id"))
 
-    def getAll(self, idp_id):
-        list = self.rest.get_paginated_data(
+    def iterAll(self, idp_id):
+        for group in self.rest.iter_paginated_data(
             base_url="/userconfig/v1/customers/%s/scimgroup/idpId/%s"
             % (self.customer_id, idp_id),
             data_key_name="list",
-        )
-        groups = []
-        for group in list:
-            groups.append(self.mapRespJSONToApp(group))
-        return groups
+        ):
+            yield self.mapRespJSONToApp(group)
+
+    def getAll(self, idp_id):
+        return list(self.iterAll(idp_id))
 
     def getByName(self, name, idpName):
-        groups = self.getAllByIDPName(idpName)
-        for group in groups:
-            if group.get("name") == name:
-                return group
-        return None
+        idp = self.getIDPByName(idpName)
+        if idp is None:
+            return None
+        group = self.rest.search_by_name(
+            base_url="/userconfig/v1/customers/%s/scimgroup/idpId/%s"
+            % (self.customer_id, idp.get("id")),
+            name=name,
+        )
+        if group is None:
+            return None
+        return self.mapRespJSONToApp(group)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -33,23 +33,26 @@ class SegmentGroupService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for segment_group in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/segmentGroup"
             % (self.customer_id),
             data_key_name="list",
-        )
-        segment_groups = []
-        for segment_group in list:
-            segment_groups.append(self.mapRespJSONToApp(segment_group))
-        return segment_groups
+        ):
+            yield self.mapRespJSONToApp(segment_group)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        segment_groups = self.getAll()
-        for segment_group in segment_groups:
-            if segment_group.get("name") == name:
-                return segment_group
-        return None
+        segment_group = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/segmentGroup"
+            % (self.customer_id),
+            name=name,
+        )
+        if segment_group is None:
+            return None
+        return self.mapRespJSONToApp(segment_group)
 
     def mapListJSONToList(self, entities):
         if entities is None:
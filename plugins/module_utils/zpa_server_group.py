@@ -33,23 +33,26 @@ class ServerGroupService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for server_group in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/serverGroup"
             % (self.customer_id),
             data_key_name="list",
-        )
-        server_groups = []
-        for server_group in list:
-            server_groups.append(self.mapRespJSONToApp(server_group))
-        return server_groups
+        ):
+            yield self.mapRespJSONToApp(server_group)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        server_groups = self.getAll()
-        for server_group in server_groups:
-            if server_group.get("name") == name:
-                return server_group
-        return None
+        server_group = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/serverGroup"
+            % (self.customer_id),
+            name=name,
+        )
+        if server_group is None:
+            return None
+        return self.mapRespJSONToApp(server_group)
 
     def mapListJSONToList(self, entities):
         if entities is None:
@@ -35,23 +35,26 @@ class ServiceEdgeGroupService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for app in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v1/admin/customers/%s/serviceEdgeGroup"
             % (self.customer_id),
             data_key_name="list",
-        )
-        apps = []
-        for app in list:
-            apps.append(self.mapRespJSONToApp(app))
-        return apps
+        ):
+            yield self.mapRespJSONToApp(app)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        apps = self.getAll()
-        for app in apps:
-            if app.get("name") == name:
-                return app
-        return None
+        app = self.rest.search_by_name(
+            base_url="/mgmtconfig/v1/admin/customers/%s/serviceEdgeGroup"
+            % (self.customer_id),
+            name=name,
+        )
+        if app is None:
+            return None
+        return self.mapRespJSONToApp(app)
 
     def mapServiceEdgesJSONToList(self, serviceEdges):
         if serviceEdges is None:
@@ -0,0 +1,131 @@
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import http.client
+import io
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import deque
+
+from ansible.module_utils._text import to_bytes
+
+# errors of a kept-alive connection the server closed, RemoteDisconnected included
+STALE_CONNECTION_ERRORS = (ConnectionResetError, BrokenPipeError)
+
+
+class PooledTransport(object):
+    """
+    Persistent HTTP(S) connections to the ZPA API, kept alive and reused by
+    every request of the process instead of a new TCP+TLS handshake per call.
+    request() returns (resp, info) like fetch_url so callers can use either.
+    """
+
+    # transports shared by every client of the process, keyed by settings
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size=4, idle_timeout=60, validate_certs=True):
+        self.pool_size = max(1, pool_size)
+        self.idle_timeout = idle_timeout
+        self.validate_certs = validate_certs
+        self._idle = {}
+        self._lock = threading.Lock()
+        # bounds the number of open connections, i.e. concurrent requests
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._ssl_context = ssl.create_default_context()
+        if not validate_certs:
+            self._ssl_context.check_hostname = False
+            self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    @classmethod
+    def shared(cls, pool_size=4, idle_timeout=60, validate_certs=True):
+        key = (pool_size, idle_timeout, validate_certs)
+        with cls._shared_lock:
+            transport = cls._shared.get(key)
+            if transport is None:
+                transport = cls(pool_size, idle_timeout, validate_certs)
+                cls._shared[key] = transport
+            return transport
+
+    def _connect(self, scheme, host, port, timeout):
+        if scheme == "https":
+            return http.client.HTTPSConnection(
+                host, port, timeout=timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _checkout(self, key):
+        """Return an idle connection to key that has not timed out, or None"""
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout:
+                    return conn
+                conn.close()
+        return None
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            self._idle.setdefault(key, deque()).append((conn, time.time()))
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle.values():
+                for conn, last_used in idle:
+                    conn.close()
+            self._idle = {}
+
+    def request(self, method, url, data=None, headers=None, timeout=240):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        body = None if data is None else to_bytes(data, errors="surrogate_or_strict")
+        with self._slots:
+            conn = self._checkout(key)
+            reused = conn is not None
+            while True:
+                resp = None
+                if conn is None:
+                    conn = self._connect(
+                        parts.scheme, parts.hostname, parts.port, timeout
+                    )
+                try:
+                    conn.request(method, path, body=body, headers=headers or {})
+                    resp = conn.getresponse()
+                    content = resp.read()
+                    break
+                except STALE_CONNECTION_ERRORS as e:
+                    conn.close()
+                    conn = None
+                    if reused and resp is None:
+                        # the server closed the kept-alive connection before it
+                        # answered, retry on a new one
+                        reused = False
+                        continue
+                    return None, {"status": -1, "msg": str(e), "url": url}
+                except (http.client.HTTPException, OSError) as e:
+                    # e.g. a timeout, the request may have been applied, never resent
+                    conn.close()
+                    return None, {"status": -1, "msg": str(e), "url": url}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+        info = dict((k.lower(), v) for k, v in resp.getheaders())
+        info.update(status=resp.status, msg=resp.reason, url=url)
+        if resp.status >= 400:
+            info["body"] = content
+        return io.BytesIO(content), info
@@ -31,22 +31,24 @@ class TrustedNetworksService:
             return None
         return self.mapRespJSONToApp(response.json)
 
-    def getAll(self):
-        list = self.rest.get_paginated_data(
+    def iterAll(self):
+        for network in self.rest.iter_paginated_data(
             base_url="/mgmtconfig/v2/admin/customers/%s/network" % (self.customer_id),
             data_key_name="list",
-        )
-        networks = []
-        for network in list:
-            networks.append(self.mapRespJSONToApp(network))
-        return networks
+        ):
+            yield self.mapRespJSONToApp(network)
+
+    def getAll(self):
+        return list(self.iterAll())
 
     def getByName(self, name):
-        networks = self.getAll()
-        for network in networks:
-            if network.get("name") == name:
-                return network
-        return None
+        network = self.rest.search_by_name(
+            base_url="/mgmtconfig/v2/admin/customers/%s/network" % (self.customer_id),
+            name=name,
+        )
+        if network is None:
+            return None
+        return self.mapRespJSONToApp(network)
 
     @delete_none
     def mapRespJSONToApp(self, resp_json):
@@ -17,6 +17,8 @@ description:
 author:
     - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -231,6 +233,9 @@ from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_application
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 
 
 def core(module):
@@ -265,26 +270,38 @@ def core(module):
         app[param_name] = module.params.get(param_name)
     existing_app = service.getByIDOrName(app.get("id"), app.get("name"))
     if existing_app is not None:
+        diff = field_diff(existing_app, app)
         id = existing_app.get("id")
         existing_app.update(app)
         existing_app["id"] = id
     if state == "present":
         if existing_app is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_app)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_app, diff=diff)
             """Update"""
             app = service.update(existing_app)
-            module.exit_json(changed=True, data=app)
+            module.exit_json(changed=True, data=app, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, app)
+            if module.check_mode:
+                module.exit_json(changed=True, data=app, diff=diff)
             app = service.create(app)
-            module.exit_json(changed=False, data=app)
+            module.exit_json(changed=True, data=app, diff=diff)
     elif state == "absent":
         if existing_app is not None:
+            diff = dict(before=existing_app, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_app, diff=diff)
             # first detach it from the segment group
             service.detach_from_segment_group(
                 existing_app.get("id"), existing_app.get("segment_group_id")
             )
             service.delete(existing_app.get("id"))
-            module.exit_json(changed=True, data=existing_app)
+            module.exit_json(changed=True, data=existing_app, diff=diff)
     module.exit_json(changed=False, data={})
 
 
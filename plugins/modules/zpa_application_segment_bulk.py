@@ -0,0 +1,490 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+module: zpa_application_segment_bulk
+short_description: Create/Update/Delete many application segments at once
+description:
+    - This module reconciles a list of application segments in a single task.
+    - The application segment collection is listed once, the segments to create, update
+      and delete are computed from it, and the changes are applied concurrently, up to
+      C(max_workers) requests at a time.
+author:
+    - William Guilherme (@willguibr)
+version_added: '1.0.0'
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
+options:
+  client_id:
+    description: ""
+    required: false
+    type: str
+  client_secret:
+    description: ""
+    required: false
+    type: str
+  customer_id:
+    description: ""
+    required: false
+    type: str
+  segments:
+    description:
+      - List of application segments, each with the options of M(willguibr.zpacloud.zpa_application_segment).
+      - Segments are matched to the existing ones by C(id) when set, otherwise by C(name).
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description:
+          - Name of the application.
+        required: true
+        type: str
+      id:
+        description:
+          - ID of the application.
+        required: false
+        type: str
+      description:
+        description:
+          - Description of the application.
+        required: false
+        type: str
+      default_max_age:
+        description:
+          - default_max_age
+        required: false
+        type: str
+      ip_anchored:
+        description:
+          - Whether Source IP Anchoring for use with ZIA, is enabled or disabled for the app.
+        type: bool
+        required: false
+      tcp_port_range:
+        type: list
+        elements: dict
+        description:
+          - List of tcp port range pairs, e.g. [22, 22] for port 22-22, [80, 100] for 80-100.
+        required: false
+        suboptions:
+          from:
+            type: str
+            required: false
+            description:
+              - List of valid TCP ports. The application segment API supports multiple TCP and UDP port ranges.
+          to:
+            type: str
+            required: false
+            description:
+              - List of valid TCP ports. The application segment API supports multiple TCP and UDP port ranges.
+      udp_port_range:
+        type: list
+        elements: dict
+        description:
+          - List of udp port range pairs, e.g. ['35000', '35000'] for port 35000.
+        required: false
+        suboptions:
+          from:
+            type: str
+            required: false
+            description:
+              - List of valid UDP ports. The application segment API supports multiple TCP and UDP port ranges.
+          to:
+            type: str
+            required: false
+            description:
+              - List of valid UDP ports. The application segment API supports multiple TCP and UDP port ranges.
+      double_encrypt:
+        description:
+          - Whether Double Encryption is enabled or disabled for the app.
+        type: bool
+        required: false
+      icmp_access_type:
+        description:
+          - icmp access type.
+        type: str
+        required: false
+        choices:
+          - PING_TRACEROUTING
+          - PING
+          - NONE
+        default: NONE
+      default_idle_timeout:
+        description:
+          - default idle timeout.
+        type: str
+        required: false
+      passive_health_enabled:
+        description:
+          - passive health enabled.
+        type: bool
+        required: false
+      bypass_type:
+        description:
+          - Indicates whether users can bypass ZPA to access applications.
+        type: str
+        required: false
+        choices:
+          - ALWAYS
+          - NEVER
+          - ON_NET
+        default: NEVER
+      is_cname_enabled:
+        description:
+          - Indicates if the Zscaler Client Connector (formerly Zscaler App or Z App) receives CNAME DNS records from the connectors.
+        type: bool
+        required: false
+      config_space:
+        description:
+          - config space.
+        type: str
+        required: false
+        choices:
+          - DEFAULT
+          - SIEM
+        default: DEFAULT
+      health_reporting:
+        description:
+          - Whether health reporting for the app is Continuous or On Access. Supported values are NONE, ON_ACCESS, CONTINUOUS
+        type: str
+        required: false
+        choices:
+          - NONE
+          - ON_ACCESS
+          - CONTINUOUS
+        default: NONE
+      server_groups:
+        description:
+          - ID of the server group.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+          name:
+            required: false
+            type: str
+            description: ""
+          id:
+            required: true
+            type: str
+            description: ""
+      segment_group_id:
+        description:
+          - ID of the segment group.
+        type: str
+        required: true
+      segment_group_name:
+        description:
+          - segment group name.
+        type: str
+        required: false
+      health_check_type:
+        description:
+          - health check type.
+        type: str
+        required: false
+      enabled:
+        description:
+          - Whether this application is enabled or not.
+        type: bool
+        required: false
+      domain_names:
+        description:
+          - List of domains and IPs.
+        type: list
+        elements: str
+        required: true
+      state:
+        description: "Whether the app should be present or absent."
+        type: str
+        choices:
+            - present
+            - absent
+        default: present
+  purge:
+    description:
+      - Delete the existing application segments that are not listed in C(segments).
+    type: bool
+    required: false
+    default: false
+"""
+
+EXAMPLES = """
+- name: Create/Update/Delete application segments.
+  willguibr.zpacloud.zpa_application_segment_bulk:
+    segments:
+      - name: Example Application Segment 1
+        description: Example Application Segment
+        enabled: true
+        health_reporting: ON_ACCESS
+        tcp_port_range:
+          - from: "80"
+            to: "80"
+        domain_names:
+          - crm1.example.com
+        segment_group_id: "216196257331291896"
+        server_groups:
+          - id: "216196257331291969"
+      - name: Example Application Segment 2
+        state: absent
+        domain_names:
+          - crm2.example.com
+        segment_group_id: "216196257331291896"
+        server_groups:
+          - id: "216196257331291969"
+"""
+
+RETURN = """
+results:
+  description: The outcome for each listed (or purged) application segment, in order.
+  returned: always
+  type: list
+  elements: dict
+summary:
+  description: The number of application segments created, updated, deleted and left unchanged.
+  returned: always
+  type: dict
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from traceback import format_exc
+
+from ansible.module_utils._text import to_native
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_application_segment import (
+    ApplicationSegmentService,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
+
+PARAMS = [
+    "tcp_port_range",
+    "enabled",
+    "default_idle_timeout",
+    "bypass_type",
+    "udp_port_range",
+    "config_space",
+    "health_reporting",
+    "segment_group_id",
+    "double_encrypt",
+    "health_check_type",
+    "default_max_age",
+    "is_cname_enabled",
+    "passive_health_enabled",
+    "ip_anchored",
+    "name",
+    "description",
+    "icmp_access_type",
+    "id",
+    "server_groups",
+    "segment_group_name",
+    "domain_names",
+]
+
+
+def plan(existing_apps, segments, purge):
+    """Return the (action, app, diff) triples that bring existing_apps to segments"""
+    by_id = dict((a.get("id"), a) for a in existing_apps)
+    by_name = dict((a.get("name"), a) for a in existing_apps)
+    matched = set()
+    actions = []
+    for segment in segments:
+        app = dict((p, segment.get(p)) for p in PARAMS)
+        existing_app = by_id.get(app.get("id")) or by_name.get(app.get("name"))
+        if existing_app is not None:
+            matched.add(existing_app.get("id"))
+        if segment.get("state") == "absent":
+            if existing_app is not None:
+                actions.append(
+                    ("delete", existing_app, dict(before=existing_app, after={}))
+                )
+            else:
+                actions.append(("none", app, None))
+        elif existing_app is None:
+            actions.append(("create", app, field_diff(None, app)))
+        else:
+            diff = field_diff(existing_app, app)
+            if diff is None:
+                actions.append(("none", existing_app, None))
+                continue
+            merged = dict(existing_app)
+            merged.update(app)
+            merged["id"] = existing_app.get("id")
+            actions.append(("update", merged, diff))
+    if purge:
+        for existing_app in existing_apps:
+            if existing_app.get("id") not in matched:
+                actions.append(
+                    ("delete", existing_app, dict(before=existing_app, after={}))
+                )
+    return actions
+
+
+def apply(service, action, app):
+    if action == "create":
+        data = service.create(app)
+        if data is None:
+            raise Exception("failed to create application segment")
+        return data
+    if action == "update":
+        data = service.update(app)
+        if data is None:
+            raise Exception("failed to update application segment")
+        return data
+    if action == "delete":
+        # first detach it from the segment group
+        service.detach_from_segment_group(app.get("id"), app.get("segment_group_id"))
+        status_code = service.delete(app.get("id"))
+        if status_code > 299:
+            raise Exception(
+                "failed to delete application segment, status code %s" % status_code
+            )
+    return app
+
+
+def core(module):
+    customer_id = module.params.get("customer_id", None)
+    client = ZPAClientHelper(module)
+    service = ApplicationSegmentService(module, customer_id, client)
+    actions = plan(
+        service.getAll(), module.params.get("segments"), module.params.get("purge")
+    )
+    results = [
+        dict(
+            name=app.get("name"),
+            id=app.get("id"),
+            action=action,
+            changed=action != "none",
+            data=app,
+            diff=diff,
+        )
+        for action, app, diff in actions
+    ]
+
+    def run(indexes):
+        for i in indexes:
+            try:
+                results[i]["data"] = apply(service, *actions[i][:2])
+                results[i]["id"] = results[i]["data"].get("id")
+            except Exception as e:
+                results[i].update(failed=True, changed=False, msg=to_native(e))
+
+    if not module.check_mode:
+        writes = []
+        deletes = {}
+        for i, (action, app, diff) in enumerate(actions):
+            if action == "delete":
+                # detaching rewrites the segment group's application list, so the
+                # deletes of one segment group must not run concurrently
+                deletes.setdefault(app.get("segment_group_id"), []).append(i)
+            elif action != "none":
+                writes.append([i])
+        # the deletes run once the creates and updates are done, a segment added
+        # to a group while it is being rewritten would be dropped from it
+        for tasks in (writes, list(deletes.values())):
+            if tasks:
+                with ThreadPoolExecutor(max_workers=max(1, client.max_workers)) as pool:
+                    list(pool.map(run, tasks))
+
+    summary = dict(created=0, updated=0, deleted=0, unchanged=0, failed=0)
+    names = dict(create="created", update="updated", delete="deleted", none="unchanged")
+    for result in results:
+        if result.get("failed"):
+            summary["failed"] += 1
+        else:
+            summary[names[result["action"]]] += 1
+    changed = any(result["changed"] for result in results)
+    if summary["failed"]:
+        module.fail_json(
+            msg="%d application segment(s) failed" % summary["failed"],
+            changed=changed,
+            results=results,
+            summary=summary,
+        )
+    module.exit_json(changed=changed, results=results, summary=summary)
+
+
+def main():
+    argument_spec = ZPAClientHelper.zpa_argument_spec()
+    port_spec = dict(to=dict(type="str", required=False))
+    port_spec["from"] = dict(type="str", required=False)
+    id_name_spec = dict(
+        type="list",
+        elements="dict",
+        options=dict(
+            id=dict(type="str", required=True), name=dict(type="str", required=False)
+        ),
+        required=True,
+    )
+    segment_spec = dict(
+        tcp_port_range=dict(
+            type="list", elements="dict", options=port_spec, required=False
+        ),
+        enabled=dict(type="bool", required=False),
+        default_idle_timeout=dict(type="str", required=False, default=""),
+        bypass_type=dict(
+            type="str",
+            required=False,
+            default="NEVER",
+            choices=["ALWAYS", "NEVER", "ON_NET"],
+        ),
+        udp_port_range=dict(
+            type="list", elements="dict", options=port_spec, required=False
+        ),
+        config_space=dict(
+            type="str", required=False, default="DEFAULT", choices=["DEFAULT", "SIEM"]
+        ),
+        health_reporting=dict(
+            type="str",
+            required=False,
+            default="NONE",
+            choices=["NONE", "ON_ACCESS", "CONTINUOUS"],
+        ),
+        segment_group_id=dict(type="str", required=True),
+        double_encrypt=dict(type="bool", required=False),
+        health_check_type=dict(type="str"),
+        default_max_age=dict(type="str", required=False, default=""),
+        is_cname_enabled=dict(type="bool", required=False),
+        passive_health_enabled=dict(type="bool", required=False),
+        ip_anchored=dict(type="bool", required=False),
+        name=dict(type="str", required=True),
+        description=dict(type="str", required=False),
+        icmp_access_type=dict(
+            type="str",
+            required=False,
+            default="NONE",
+            choices=["PING_TRACEROUTING", "PING", "NONE"],
+        ),
+        id=dict(type="str"),
+        server_groups=id_name_spec,
+        segment_group_name=dict(type="str", required=False),
+        domain_names=dict(type="list", elements="str", required=True),
+        state=dict(type="str", choices=["present", "absent"], default="present"),
+    )
+    argument_spec.update(
+        segments=dict(
+            type="list", elements="dict", options=segment_spec, required=True
+        ),
+        purge=dict(type="bool", required=False, default=False),
+    )
+    module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+    try:
+        core(module)
+    except Exception as e:
+        module.fail_json(msg=to_native(e), exception=format_exc())
+
+
+if __name__ == "__main__":
+    main()
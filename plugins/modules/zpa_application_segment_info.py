@@ -16,6 +16,8 @@ description:
     - This module will allow the retrieval of information about an application segment.
 author: "William Guilherme (@willguibr)"
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -17,6 +17,8 @@ description:
 author:
     - William Guilherme (@willguibr)
 version_added: '1.0.0'
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
     client_id:
         description: ""
@@ -100,6 +102,9 @@ from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_application
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 
 
 def core(module):
@@ -122,22 +127,38 @@ def core(module):
         application_server.get("id"), application_server.get("name")
     )
     if existing_application_server is not None:
+        diff = field_diff(existing_application_server, application_server)
         id = existing_application_server.get("id")
         existing_application_server.update(application_server)
         existing_application_server["id"] = id
     if state == "present":
         if existing_application_server is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_application_server)
+            if module.check_mode:
+                module.exit_json(
+                    changed=True, data=existing_application_server, diff=diff
+                )
             """Update"""
             service.update(existing_application_server)
-            module.exit_json(changed=True, data=existing_application_server)
+            module.exit_json(changed=True, data=existing_application_server, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, application_server)
+            if module.check_mode:
+                module.exit_json(changed=True, data=application_server, diff=diff)
             application_server = service.create(application_server)
-            module.exit_json(changed=False, data=application_server)
+            module.exit_json(changed=True, data=application_server, diff=diff)
     elif state == "absent":
         if existing_application_server is not None:
+            diff = dict(before=existing_application_server, after={})
+            if module.check_mode:
+                module.exit_json(
+                    changed=True, data=existing_application_server, diff=diff
+                )
             service.delete(existing_application_server.get("id"))
-            module.exit_json(changed=False, data=existing_application_server)
+            module.exit_json(changed=True, data=existing_application_server, diff=diff)
     module.exit_json(changed=False, data={})
 
 
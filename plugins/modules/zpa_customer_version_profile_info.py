@@ -16,6 +16,8 @@ description:
   - This module will allow the retrieval of information about a customer version profile.
 author: William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 requirements:
   - supported starting from zpa_api >= 2.0
 options:
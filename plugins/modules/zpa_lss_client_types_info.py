@@ -17,6 +17,8 @@ description:
   - This can then be associated with the source_log_type parameter when creating an LSS Resource.
 author: William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 requirements:
   - supported starting from zpa_api >= 2.0
 options:
@@ -17,6 +17,8 @@ description:
 author:
   - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -253,6 +255,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_lss_config_controller import (
     LSSConfigControllerService,
 )
@@ -270,22 +275,34 @@ def core(module):
         lss_config.get("id"), lss_config.get("config", {}).get("name")
     )
     if existing_lss_config is not None:
+        diff = field_diff(existing_lss_config, lss_config)
         id = existing_lss_config.get("id")
         existing_lss_config.update(lss_config)
         existing_lss_config["id"] = id
     if state == "present":
         if existing_lss_config is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_lss_config)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_lss_config, diff=diff)
             """Update"""
             lss_config = service.update(existing_lss_config)
-            module.exit_json(changed=True, data=lss_config)
+            module.exit_json(changed=True, data=lss_config, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, lss_config)
+            if module.check_mode:
+                module.exit_json(changed=True, data=lss_config, diff=diff)
             lss_config = service.create(lss_config)
-            module.exit_json(changed=False, data=lss_config)
+            module.exit_json(changed=True, data=lss_config, diff=diff)
     elif state == "absent":
         if existing_lss_config is not None:
+            diff = dict(before=existing_lss_config, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_lss_config, diff=diff)
             service.delete(existing_lss_config.get("id"))
-            module.exit_json(changed=False, data=existing_lss_config)
+            module.exit_json(changed=True, data=existing_lss_config, diff=diff)
     module.exit_json(changed=False, data={})
 
 
@@ -16,6 +16,8 @@ description:
   - This module will allow the retrieval of LSS (Log Streaming Services) Status Codes information from the ZPA Cloud.
 author: William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 requirements:
   - supported starting from zpa_api >= 2.0
 options:
@@ -17,6 +17,8 @@ description:
 author:
   - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -237,6 +239,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_policy_access_rule import (
     PolicyAccessRuleService,
 )
@@ -275,22 +280,34 @@ def core(module):
         policy.get("id"), policy.get("name"), policy_set_id, "ACCESS_POLICY"
     )
     if existing_policy is not None:
+        diff = field_diff(existing_policy, policy)
         id = existing_policy.get("id")
         existing_policy.update(policy)
         existing_policy["id"] = id
     if state == "present":
         if existing_policy is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_policy)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_policy, diff=diff)
             """Update"""
             existing_policy = service.update(existing_policy, policy_set_id)
-            module.exit_json(changed=True, data=existing_policy)
+            module.exit_json(changed=True, data=existing_policy, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, policy)
+            if module.check_mode:
+                module.exit_json(changed=True, data=policy, diff=diff)
             policy = service.create(policy, policy_set_id)
-            module.exit_json(changed=False, data=policy)
+            module.exit_json(changed=True, data=policy, diff=diff)
     elif state == "absent":
         if existing_policy is not None:
+            diff = dict(before=existing_policy, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_policy, diff=diff)
             service.delete(existing_policy.get("id"), policy_set_id)
-            module.exit_json(changed=True, data=existing_policy)
+            module.exit_json(changed=True, data=existing_policy, diff=diff)
     module.exit_json(changed=False, data={})
 
 
@@ -17,6 +17,8 @@ description:
 author:
   - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -145,6 +147,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_provisioning_key import (
     ProvisioningKeyService,
 )
@@ -183,22 +188,34 @@ def core(module):
         provisioning_key.get("id"), provisioning_key.get("name"), association_type
     )
     if existing_key is not None:
+        diff = field_diff(existing_key, provisioning_key)
         id = existing_key.get("id")
         existing_key.update(provisioning_key)
         existing_key["id"] = id
     if state == "present":
         if existing_key is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_key)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_key, diff=diff)
             """Update"""
             existing_key = service.update(existing_key, association_type)
-            module.exit_json(changed=True, data=existing_key)
+            module.exit_json(changed=True, data=existing_key, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, provisioning_key)
+            if module.check_mode:
+                module.exit_json(changed=True, data=provisioning_key, diff=diff)
             provisioning_key = service.create(provisioning_key, association_type)
-            module.exit_json(changed=False, data=provisioning_key)
+            module.exit_json(changed=True, data=provisioning_key, diff=diff)
     elif state == "absent":
         if existing_key is not None:
+            diff = dict(before=existing_key, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_key, diff=diff)
             service.delete(existing_key.get("id"), association_type)
-            module.exit_json(changed=False, data=existing_key)
+            module.exit_json(changed=True, data=existing_key, diff=diff)
     module.exit_json(changed=False, data={})
 
 
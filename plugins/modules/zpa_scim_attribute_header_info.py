@@ -16,6 +16,8 @@ description:
   - This module will allow the retrieval of information about scim attribute header from a given IDP
 author: William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 requirements:
   - supported starting from zpa_api >= 1.0
 options:
@@ -17,6 +17,8 @@ description:
 author:
     - William Guilherme (@willguibr)
 version_added: '1.0.0'
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -102,6 +104,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_segment_group import (
     SegmentGroupService,
 )
@@ -128,22 +133,34 @@ def core(module):
         segment_group.get("id"), segment_group.get("name")
     )
     if existing_segment_group is not None:
+        diff = field_diff(existing_segment_group, segment_group)
         id = existing_segment_group.get("id")
         existing_segment_group.update(segment_group)
         existing_segment_group["id"] = id
     if state == "present":
         if existing_segment_group is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_segment_group)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_segment_group, diff=diff)
             """Update"""
             segment_group = service.update(existing_segment_group)
-            module.exit_json(changed=True, data=segment_group)
+            module.exit_json(changed=True, data=segment_group, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, segment_group)
+            if module.check_mode:
+                module.exit_json(changed=True, data=segment_group, diff=diff)
             segment_group = service.create(segment_group)
-            module.exit_json(changed=False, data=segment_group)
+            module.exit_json(changed=True, data=segment_group, diff=diff)
     elif state == "absent":
         if existing_segment_group is not None:
+            diff = dict(before=existing_segment_group, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_segment_group, diff=diff)
             service.delete(existing_segment_group.get("id"))
-            module.exit_json(changed=True, data=existing_segment_group)
+            module.exit_json(changed=True, data=existing_segment_group, diff=diff)
     module.exit_json(changed=False, data={})
 
 
@@ -17,6 +17,8 @@ description:
 author:
     - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -149,6 +151,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_server_group import (
     ServerGroupService,
 )
@@ -177,22 +182,34 @@ def core(module):
         server_group.get("id"), server_group.get("name")
     )
     if existing_server_group is not None:
+        diff = field_diff(existing_server_group, server_group)
         id = existing_server_group.get("id")
         existing_server_group.update(server_group)
         existing_server_group["id"] = id
     if state == "present":
         if existing_server_group is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_server_group)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_server_group, diff=diff)
             """Update"""
             server_group = service.update(existing_server_group)
-            module.exit_json(changed=True, data=server_group)
+            module.exit_json(changed=True, data=server_group, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, server_group)
+            if module.check_mode:
+                module.exit_json(changed=True, data=server_group, diff=diff)
             server_group = service.create(server_group)
-            module.exit_json(changed=False, data=server_group)
+            module.exit_json(changed=True, data=server_group, diff=diff)
     elif state == "absent":
         if existing_server_group is not None:
+            diff = dict(before=existing_server_group, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_server_group, diff=diff)
             service.delete(existing_server_group.get("id"))
-            module.exit_json(changed=True, data=existing_server_group)
+            module.exit_json(changed=True, data=existing_server_group, diff=diff)
     module.exit_json(changed=False, data={})
 
 
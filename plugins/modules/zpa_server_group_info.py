@@ -17,6 +17,8 @@ description:
 author:
     - William Guilherme (@willguibr)
 version_added: '1.0.0'
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -17,6 +17,8 @@ description:
 author:
   - William Guilherme (@willguibr)
 version_added: "1.0.0"
+extends_documentation_fragment:
+  - willguibr.zpacloud.fragments.client
 options:
   client_id:
     description: ""
@@ -168,6 +170,9 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
     ZPAClientHelper,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_service_edge_groups import (
     ServiceEdgeGroupService,
 )
@@ -203,22 +208,34 @@ def core(module):
         service_edge.get("id"), service_edge.get("name")
     )
     if existing_edge is not None:
+        diff = field_diff(existing_edge, service_edge)
         id = existing_edge.get("id")
         existing_edge.update(service_edge)
         existing_edge["id"] = id
     if state == "present":
         if existing_edge is not None:
+            if diff is None:
+                """No change"""
+                module.exit_json(changed=False, data=existing_edge)
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_edge, diff=diff)
             """Update"""
             service.update(existing_edge)
-            module.exit_json(changed=True, data=existing_edge)
+            module.exit_json(changed=True, data=existing_edge, diff=diff)
         else:
             """Create"""
+            diff = field_diff(None, service_edge)
+            if module.check_mode:
+                module.exit_json(changed=True, data=service_edge, diff=diff)
             service_edge = service.create(service_edge)
-            module.exit_json(changed=False, data=service_edge)
+            module.exit_json(changed=True, data=service_edge, diff=diff)
     elif state == "absent":
         if existing_edge is not None:
+            diff = dict(before=existing_edge, after={})
+            if module.check_mode:
+                module.exit_json(changed=True, data=existing_edge, diff=diff)
             service.delete(existing_edge.get("id"))
-            module.exit_json(changed=False, data=existing_edge)
+            module.exit_json(changed=True, data=existing_edge, diff=diff)
     module.exit_json(changed=False, data={})
 
 
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Run the ZPA modules in-process on the controller.
+
+The modules only talk to the ZPA API, so shipping them to the target through
+AnsiballZ only adds an interpreter startup, the payload transfer and the
+imports to every task. run_module() calls the module main() in the
+calling process instead, with its arguments injected the way AnsiballZ does,
+and returns its output in the form of a low level command result, for
+the action plugin to parse like the output of a remote module.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import traceback
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes, to_text
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+
+MODULES_PACKAGE = "ansible_collections.willguibr.zpacloud.plugins.modules"
+
+# modules read their arguments and print their result through process globals
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def environment(env):
+    """Temporarily update os.environ, the modules read env fallbacks from it"""
+    saved = dict((k, os.environ.get(k)) for k in env)
+    os.environ.update(dict((k, to_text(v)) for k, v in env.items()))
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def run_module(module_name, module_args, env=None):
+    """
+    Run the collection module module_name with module_args, which include
+    the internal _ansible_* arguments, and return its output as rc, stdout
+    and stderr. An exception raised by the module is reported like the crash of
+    a remote module, with rc 1 and the traceback in stderr.
+    """
+    module = importlib.import_module("%s.%s" % (MODULES_PACKAGE, module_name))
+    stdout = io.StringIO()
+    rc, stderr = 0, ""
+    with _lock, environment(env or {}):
+        basic._ANSIBLE_ARGS = to_bytes(
+            json.dumps(dict(ANSIBLE_MODULE_ARGS=module_args))
+        )
+        if hasattr(basic, "_ANSIBLE_PROFILE"):
+            # ansible-core >= 2.19 also needs the serialization profile of the args
+            basic._ANSIBLE_PROFILE = "legacy"
+        # the token and the connections are kept, the listings are not
+        ZPAClientHelper.invalidate_indexes()
+        ZPAClientHelper.invalidate_memo()
+        saved_stdout = sys.stdout
+        sys.stdout = stdout
+        try:
+            module.main()
+        except SystemExit:
+            pass
+        except Exception:
+            rc, stderr = 1, traceback.format_exc()
+        finally:
+            sys.stdout = saved_stdout
+            basic._ANSIBLE_ARGS = None
+    return dict(rc=rc, stdout=stdout.getvalue(), stderr=stderr)
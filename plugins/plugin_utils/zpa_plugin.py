@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Stand-in for AnsibleModule, so the controller side plugins (inventory,
+lookup) can use ZPAClientHelper and the services of module_utils.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+
+from ansible import constants as C
+from ansible.errors import AnsibleError
+from ansible.module_utils.common.text.converters import jsonify
+from ansible.module_utils.common.validation import (
+    check_type_bool,
+    check_type_float,
+    check_type_int,
+    check_type_str,
+)
+from ansible.utils.display import Display
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+
+display = Display()
+
+TYPE_CHECKERS = dict(
+    bool=check_type_bool,
+    float=check_type_float,
+    int=check_type_int,
+    str=check_type_str,
+)
+
+
+def client_params(params):
+    """
+    The client options from params, completed with their environment
+    fallback and default like AnsibleModule does for the modules.
+    """
+    result = {}
+    for name, spec in ZPAClientHelper.zpa_argument_spec().items():
+        value = params.get(name)
+        if value is None and spec.get("fallback"):
+            for env in spec["fallback"][1]:
+                if os.environ.get(env):
+                    value = os.environ[env]
+                    break
+        if value is None:
+            value = spec.get("default")
+        if value is not None and spec.get("type") in TYPE_CHECKERS:
+            try:
+                value = TYPE_CHECKERS[spec["type"]](value)
+            except (TypeError, ValueError) as e:
+                raise AnsibleError("Invalid value for %s: %s" % (name, e))
+        result[name] = value
+    return result
+
+
+class ZPAPluginModule(object):
+    """The parts of AnsibleModule used by ZPAClientHelper"""
+
+    check_mode = False
+
+    def __init__(self, params):
+        self.params = client_params(params)
+        # same place as the modules run locally, so they share the token cache
+        self._remote_tmp = "~/.ansible/tmp"
+        self.tmpdir = C.DEFAULT_LOCAL_TMP
+
+    def fail_json(self, msg, **kwargs):
+        raise AnsibleError(msg)
+
+    def exit_json(self, **kwargs):
+        pass
+
+    def warn(self, warning):
+        display.warning(warning)
+
+    def log(self, msg):
+        display.vvv(msg)
+
+    def jsonify(self, data):
+        return jsonify(data)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Benchmark the collection modules against the local ZPA API stand-in.
+
+Each scenario runs a module, through its main() and core(), against a
+synthetic tenant of the given size and reports the requests issued, the
+bytes transferred and the wall time. Run it from the collection root,
+installed as ansible_collections/willguibr/zpacloud:
+
+    python tests/benchmark/run.py --size 100 --size 1000
+    python tests/benchmark/run.py --scenario application_segment_info --json out.json
+    python tests/benchmark/run.py --recorded tenant.json
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "..", "..", "..", "..")))
+sys.path.insert(0, HERE)
+
+from ansible.module_utils import basic  # noqa: E402
+from ansible.module_utils.common.text.converters import to_bytes  # noqa: E402
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (  # noqa: E402
+    ZPAClientHelper,
+)
+from zpa_api import Store, ZPAAPIServer  # noqa: E402
+
+CUSTOMER_ID = "216196257331281920"
+
+
+def application(store, i):
+    """Return the module options that describe the seeded application i"""
+    apps = store.collection(
+        "/mgmtconfig/v1/admin/customers/%s/application" % CUSTOMER_ID
+    )
+    app = [a for a in apps.values() if a["name"] == "application-%d" % i][0]
+    return dict(
+        name=app["name"],
+        description=app["description"],
+        enabled=True,
+        health_reporting="ON_ACCESS",
+        is_cname_enabled=True,
+        tcp_port_range=[{"from": "443", "to": "443"}],
+        domain_names=app["domainNames"],
+        segment_group_id=app["segmentGroupId"],
+        server_groups=[dict(id=s["id"]) for s in app["serverGroups"]],
+    )
+
+
+SCENARIOS = [
+    ("segment_group_info", "zpa_segment_group_info", lambda store, size: {}),
+    ("server_group_info", "zpa_server_group_info", lambda store, size: {}),
+    (
+        "app_connector_groups_info",
+        "zpa_app_connector_groups_info",
+        lambda store, size: {},
+    ),
+    (
+        "application_segment_info",
+        "zpa_application_segment_info",
+        lambda store, size: {},
+    ),
+    (
+        "application_segment_info_by_name",
+        "zpa_application_segment_info",
+        lambda store, size: dict(name="application-%d" % (size // 2)),
+    ),
+    (
+        "segment_group_unchanged",
+        "zpa_segment_group",
+        lambda store, size: dict(name="segment-group-0", enabled=True),
+    ),
+    (
+        "application_segment_unchanged",
+        "zpa_application_segment",
+        lambda store, size: application(store, size // 2),
+    ),
+    (
+        "application_segment_update",
+        "zpa_application_segment",
+        lambda store, size: dict(application(store, size // 2), description="updated"),
+    ),
+    (
+        "application_segment_bulk_unchanged",
+        "zpa_application_segment_bulk",
+        lambda store, size: dict(segments=[application(store, i) for i in range(size)]),
+    ),
+    (
+        "application_segment_bulk_create",
+        "zpa_application_segment_bulk",
+        lambda store, size: dict(
+            segments=[
+                dict(application(store, i % size), name="new-application-%d" % i)
+                for i in range(max(1, size // 10))
+            ]
+        ),
+    ),
+]
+
+
+def run_module(module_name, args):
+    """Run a module in-process and return its result"""
+    module = importlib.import_module(
+        "ansible_collections.willguibr.zpacloud.plugins.modules.%s" % module_name
+    )
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps(dict(ANSIBLE_MODULE_ARGS=args)))
+    if hasattr(basic, "_ANSIBLE_PROFILE"):
+        # ansible-core >= 2.19 also needs the serialization profile of the args
+        basic._ANSIBLE_PROFILE = "legacy"
+    stdout = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            module.main()
+    except SystemExit:
+        pass
+    finally:
+        basic._ANSIBLE_ARGS = None
+    try:
+        return json.loads(stdout.getvalue())
+    except ValueError:
+        return dict(failed=True, msg=stdout.getvalue())
+
+
+def run_scenario(server, name, module_name, make_args, size, recorded, client_args):
+    def reset_store():
+        # stores are deterministic, a reset tenant is identical to the previous one
+        server.store = Store()
+        if recorded:
+            server.store.load(recorded)
+        else:
+            server.store.seed(CUSTOMER_ID, size)
+        args = dict(client_args, customer_id=CUSTOMER_ID, base_url=server.url)
+        args.update(make_args(server.store, size))
+        return args
+
+    args = reset_store()
+    if client_args.get("response_cache"):
+        # warm the cache up, the measured run revalidates its responses
+        ZPAClientHelper.invalidate_indexes()
+        ZPAClientHelper.invalidate_memo()
+        run_module(module_name, args)
+        args = reset_store()
+    # a module run is a new process, nothing is shared with the previous one
+    ZPAClientHelper.invalidate_indexes()
+    ZPAClientHelper.invalidate_memo()
+    server.stats.reset()
+    start = time.perf_counter()
+    result = run_module(module_name, args)
+    elapsed = time.perf_counter() - start
+    stats = server.stats.as_dict()
+    stats.update(
+        scenario=name,
+        size=size,
+        seconds=round(elapsed, 3),
+        changed=result.get("changed"),
+        failed=bool(result.get("failed")),
+    )
+    if result.get("failed"):
+        stats["msg"] = result.get("msg")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--size",
+        type=int,
+        action="append",
+        help="number of application segments in the synthetic tenant (default 100)",
+    )
+    parser.add_argument(
+        "--scenario", action="append", help="only run the scenarios with this name"
+    )
+    parser.add_argument(
+        "--recorded", help="replay recorded collections instead of a synthetic tenant"
+    )
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument(
+        "--connection-pool", action="store_true", help="use persistent connections"
+    )
+    parser.add_argument(
+        "--response-cache",
+        action="store_true",
+        help="cache responses, each scenario is run twice to measure revalidation",
+    )
+    parser.add_argument("--json", help="also write the results to this file")
+    opts = parser.parse_args()
+
+    remote_tmp = tempfile.mkdtemp(prefix="zpa-benchmark-")
+    client_args = dict(
+        client_id="benchmark",
+        client_secret="benchmark",
+        rate_limit=0,
+        max_workers=opts.max_workers,
+        connection_pool=opts.connection_pool,
+        response_cache=opts.response_cache,
+        _ansible_remote_tmp=remote_tmp,
+    )
+    server = ZPAAPIServer().start()
+    results = []
+    try:
+        for size in opts.size or [100]:
+            for name, module_name, make_args in SCENARIOS:
+                if opts.scenario and name not in opts.scenario:
+                    continue
+                results.append(
+                    run_scenario(
+                        server,
+                        name,
+                        module_name,
+                        make_args,
+                        size,
+                        opts.recorded,
+                        client_args,
+                    )
+                )
+                r = results[-1]
+                print(
+                    "%-36s %6d %8d requests %12d bytes %9.3fs%s"
+                    % (
+                        r["scenario"],
+                        r["size"],
+                        r["requests"],
+                        r["bytes_sent"] + r["bytes_received"],
+                        r["seconds"],
+                        " FAILED: %s" % r["msg"] if r["failed"] else "",
+                    )
+                )
+    finally:
+        server.stop()
+    if opts.json:
+        with open(opts.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if any(r["failed"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2022, William Guilherme <wguilherme@securitygeek.io>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Local stand-in for the ZPA API, used to benchmark the collection without a
+live tenant.
+
+It implements /signin and the paginated list, get, create, update and
+delete mgmtconfig endpoints used by the services, over an in-memory store
+that is either generated (seed) or loaded from recorded collections (load).
+Every request is counted so the benchmark can report requests issued and
+bytes transferred.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import gzip
+import hashlib
+import json
+import threading
+import urllib.parse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "/mgmtconfig/v1/admin/customers/%s"
+
+# bodies smaller than this are sent as is, like most servers do
+MIN_COMPRESS_SIZE = 1024
+
+
+class Stats(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.by_method = {}
+
+    def record(self, method, received, sent):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+
+    def as_dict(self):
+        with self._lock:
+            return dict(
+                requests=self.requests,
+                bytes_sent=self.bytes_sent,
+                bytes_received=self.bytes_received,
+                by_method=dict(self.by_method),
+            )
+
+
+class Store(object):
+    """Collections of objects keyed by their URL path"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.collections = {}
+        self.next_id = 216196257331280000
+
+    def new_id(self):
+        with self._lock:
+            self.next_id += 1
+            return str(self.next_id)
+
+    def collection(self, path):
+        with self._lock:
+            return self.collections.setdefault(path, OrderedDict())
+
+    def add(self, path, obj):
+        obj = dict(obj)
+        obj.setdefault("id", self.new_id())
+        self.collection(path)[obj["id"]] = obj
+        return obj
+
+    def load(self, filename):
+        """Load recorded collections, a JSON object of path -> list of objects"""
+        with open(filename) as f:
+            recorded = json.load(f)
+        for path, objs in recorded.items():
+            for obj in objs:
+                self.add(path, obj)
+
+    def dump(self, filename):
+        with open(filename, "w") as f:
+            json.dump(
+                dict((p, list(c.values())) for p, c in self.collections.items()), f
+            )
+
+    def seed(self, customer_id, size):
+        """Generate a tenant with size application segments and related objects"""
+        prefix = PREFIX % customer_id
+        groups = max(1, size // 10)
+        connector_groups = [
+            self.add(
+                prefix + "/appConnectorGroup",
+                dict(
+                    name="connector-group-%d" % i,
+                    enabled=True,
+                    location="San Jose, CA, USA",
+                    latitude="37.3382082",
+                    longitude="-121.8863286",
+                    countryCode="US",
+                    upgradeDay="SUNDAY",
+                    upgradeTimeInSecs="66600",
+                    dnsQueryType="IPV4_IPV6",
+                ),
+            )
+            for i in range(groups)
+        ]
+        server_groups = [
+            self.add(
+                prefix + "/serverGroup",
+                dict(
+                    name="server-group-%d" % i,
+                    enabled=True,
+                    dynamicDiscovery=True,
+                    appConnectorGroups=[
+                        dict(
+                            id=connector_groups[i]["id"], name="connector-group-%d" % i
+                        )
+                    ],
+                ),
+            )
+            for i in range(groups)
+        ]
+        segment_groups = [
+            self.add(
+                prefix + "/segmentGroup",
+                dict(
+                    name="segment-group-%d" % i,
+                    enabled=True,
+                    configSpace="DEFAULT",
+                    applications=[],
+                ),
+            )
+            for i in range(groups)
+        ]
+        for i in range(size):
+            segment_group = segment_groups[i % groups]
+            app = self.add(
+                prefix + "/application",
+                dict(
+                    name="application-%d" % i,
+                    description="application %d" % i,
+                    enabled=True,
+                    bypassType="NEVER",
+                    configSpace="DEFAULT",
+                    healthReporting="ON_ACCESS",
+                    icmpAccessType="NONE",
+                    isCnameEnabled=True,
+                    domainNames=["app%d.example.com" % i],
+                    tcpPortRange=[{"from": "443", "to": "443"}],
+                    segmentGroupId=segment_group["id"],
+                    segmentGroupName=segment_group["name"],
+                    serverGroups=[
+                        dict(
+                            id=server_groups[i % groups]["id"],
+                            name=server_groups[i % groups]["name"],
+                        )
+                    ],
+                ),
+            )
+            segment_group["applications"].append(dict(id=app["id"], name=app["name"]))
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _reply(self, status, obj=None, received=0):
+        body = b"" if obj is None else json.dumps(obj).encode("utf-8")
+        etag = None
+        if self.command == "GET" and status == 200:
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        encoding = None
+        if len(body) >= MIN_COMPRESS_SIZE and "gzip" in (
+            self.headers.get("Accept-Encoding") or ""
+        ):
+            encoding, body = "gzip", gzip.compress(body)
+        # recorded before replying so the client never sees an uncounted request
+        self.server.stats.record(self.command, received, len(body))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        """Return (collection path, object id or None, query) for the request"""
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        path = url.path.rstrip("/")
+        parent, last = path.rsplit("/", 1)
+        if parent in self.server.store.collections and self.command != "POST":
+            return parent, last, query
+        return path, None, query
+
+    def _authorized(self, received):
+        if self.headers.get("Authorization") != "Bearer %s" % self.server.token:
+            self._reply(401, dict(id="invalid.token", message="unauthorized"), received)
+            return False
+        return True
+
+    def do_POST(self):
+        body = self._body()
+        if self.path.startswith("/signin"):
+            return self._reply(
+                200,
+                dict(access_token=self.server.token, expires_in=3600),
+                len(body),
+            )
+        if not self._authorized(len(body)):
+            return
+        path, id, query = self._route()
+        obj = self.server.store.add(path, json.loads(body or b"{}"))
+        self._reply(201, obj, len(body))
+
+    def do_GET(self):
+        if not self._authorized(0):
+            return
+        path, id, query = self._route()
+        collection = self.server.store.collection(path)
+        if id is not None:
+            obj = collection.get(id)
+            if obj is None:
+                return self._reply(404, dict(id="resource.not.found"))
+            return self._reply(200, obj)
+        objs = list(collection.values())
+        search = query.get("search")
+        if search:
+            objs = [o for o in objs if search.lower() in str(o.get("name", "")).lower()]
+        page = int(query.get("page", 1))
+        pagesize = int(query.get("pagesize", 20))
+        total_pages = max(1, (len(objs) + pagesize - 1) // pagesize)
+        self._reply(
+            200,
+            dict(
+                totalPages=str(total_pages),
+                list=objs[(page - 1) * pagesize : page * pagesize],
+            ),
+        )
+
+    def do_PUT(self):
+        body = self._body()
+        if not self._authorized(len(body)):
+            return
+        path, id, query = self._route()
+        collection = self.server.store.collection(path)
+        if id not in collection:
+            return self._reply(404, dict(id="resource.not.found"), len(body))
+        obj = json.loads(body or b"{}")
+        obj["id"] = id
+        collection[id] = obj
+        self._reply(204, None, len(body))
+
+    def do_DELETE(self):
+        if not self._authorized(0):
+            return
+        path, id, query = self._route()
+        collection = self.server.store.collection(path)
+        if collection.pop(id, None) is None:
+            return self._reply(404, dict(id="resource.not.found"))
+        self._reply(204)
+
+
+class ZPAAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), store=None):
+        ThreadingHTTPServer.__init__(self, address, Handler)
+        self.store = store or Store()
+        self.stats = Stats()
+        self.token = "benchmark-token"
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
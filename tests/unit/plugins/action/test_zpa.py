@@ -0,0 +1,111 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ansible.plugins.action import ActionBase
+from ansible_collections.willguibr.zpacloud.plugins.action import zpa
+
+
+class TestZPAAction(unittest.TestCase):
+    def setUp(self):
+        task = MagicMock()
+        task.action = "willguibr.zpacloud.zpa_segment_group"
+        task.args = dict(name="web")
+        task.async_val = 0
+        connection = MagicMock()
+        connection.has_native_async = False
+        templar = MagicMock()
+        templar.template.side_effect = lambda value: value
+        self.action = zpa.ActionModule(
+            task, connection, MagicMock(), MagicMock(), templar, None
+        )
+        self.action._update_module_args = self.update_module_args
+        self.action._compute_environment_string = self.compute_environment
+        self.action._execute_module = MagicMock(
+            return_value=dict(changed=False, remote=True)
+        )
+        self.action._remove_tmp_path = MagicMock()
+        patcher = patch.object(ActionBase, "run", return_value=dict(skipped=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def update_module_args(module_name, module_args, task_vars):
+        module_args.update(_ansible_check_mode=False, _ansible_tmpdir="/remote/tmp")
+
+    @staticmethod
+    def compute_environment(env):
+        env.update(ZPA_CLIENT_ID="client")
+
+    def run_local(self, res, task_vars=None):
+        task_vars = (
+            dict(zpa_controller_execution=True) if task_vars is None else task_vars
+        )
+        with patch.object(zpa, "run_module", return_value=res) as run_module:
+            return self.action.run(task_vars=task_vars), run_module
+
+    def test_remote_by_default(self):
+        with patch.dict("os.environ", clear=True):
+            result, run_module = self.run_local({}, task_vars={})
+        run_module.assert_not_called()
+        self.assertEqual(result, dict(skipped=False, changed=False, remote=True))
+        self.action._execute_module.assert_called_once_with(task_vars={}, wrap_async=0)
+        self.action._remove_tmp_path.assert_called_once()
+
+    def test_environment_enables(self):
+        res = dict(rc=0, stdout=json.dumps(dict(changed=True)), stderr="")
+        with patch.dict("os.environ", dict(ZPA_CONTROLLER_EXECUTION="yes")):
+            result, run_module = self.run_local(res, task_vars={})
+        run_module.assert_called_once()
+        self.assertTrue(result["changed"])
+
+    def test_async_falls_back(self):
+        self.action._task.async_val = 30
+        result, run_module = self.run_local({})
+        run_module.assert_not_called()
+        self.action._execute_module.assert_called_once_with(
+            task_vars=dict(zpa_controller_execution=True), wrap_async=True
+        )
+        self.action._remove_tmp_path.assert_not_called()
+
+    def test_local_result(self):
+        res = dict(
+            rc=0,
+            stdout=json.dumps(
+                dict(changed=True, data=dict(id="1"), _ansible_no_log=False)
+            ),
+            stderr="",
+        )
+        result, run_module = self.run_local(res)
+        run_module.assert_called_once_with(
+            "zpa_segment_group",
+            dict(name="web", _ansible_check_mode=False, _ansible_tmpdir=None),
+            dict(ZPA_CLIENT_ID="client"),
+        )
+        self.action._execute_module.assert_not_called()
+        self.assertTrue(result["changed"])
+        self.assertEqual(result["data"], dict(id="1"))
+        self.assertFalse(result["skipped"])
+        # the internal keys are removed like from a remote result
+        self.assertNotIn("_ansible_no_log", result)
+        # the task args are not modified
+        self.assertEqual(self.action._task.args, dict(name="web"))
+
+    def test_local_failure(self):
+        res = dict(
+            rc=0, stdout=json.dumps(dict(failed=True, msg="no such group")), stderr=""
+        )
+        result, run_module = self.run_local(res)
+        self.assertTrue(result["failed"])
+        self.assertEqual(result["msg"], "no such group")
+
+    def test_local_exception(self):
+        res = dict(rc=1, stdout="", stderr="Traceback\nValueError: boom\n")
+        result, run_module = self.run_local(res)
+        self.assertTrue(result["failed"])
+        self.assertEqual(result["module_stderr"], res["stderr"])
+        self.assertEqual(result["rc"], 1)
@@ -0,0 +1,197 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from ansible_collections.willguibr.zpacloud.plugins.callback.zpa_api_stats import (
+    CallbackModule,
+)
+
+APPLICATION = "GET /mgmtconfig/v1/admin/customers/{id}/application/{id}"
+SIGNIN = "POST /signin"
+
+
+def make_result(result, task="task", host="localhost"):
+    runner_result = MagicMock()
+    runner_result._result = result
+    runner_result._task.get_name.return_value = task
+    runner_result._host.get_name.return_value = host
+    return runner_result
+
+
+def api_stats(calls, elapsed, endpoints, **totals):
+    stats = dict(
+        calls=calls,
+        retries=0,
+        logins=0,
+        rate_limited=0,
+        bytes=0,
+        time=elapsed,
+        elapsed=elapsed,
+        endpoints=endpoints,
+    )
+    stats.update(totals)
+    return stats
+
+
+class TestZPAApiStats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.display = MagicMock(verbosity=0)
+        self.callback = CallbackModule(display=self.display)
+        # the options the plugin loader would read from the configuration
+        self.options = dict(top=10, output_format="table", output_file=None)
+        self.callback.get_option = self.options.get
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_tasks(self):
+        self.callback.v2_runner_on_ok(
+            make_result(
+                dict(
+                    changed=False,
+                    api_stats=api_stats(
+                        3,
+                        0.5,
+                        {
+                            SIGNIN: dict(
+                                calls=1,
+                                retries=0,
+                                time=0.1,
+                                max_time=0.1,
+                                bytes=100,
+                                wire_bytes=100,
+                                statuses={"200": 1},
+                            ),
+                            APPLICATION: dict(
+                                calls=2,
+                                retries=1,
+                                time=0.4,
+                                max_time=0.3,
+                                bytes=2000,
+                                wire_bytes=500,
+                                statuses={"200": 1, "503": 1},
+                            ),
+                        },
+                        retries=1,
+                        logins=1,
+                        bytes=2100,
+                        wire_bytes=600,
+                    ),
+                ),
+                task="get segment",
+            )
+        )
+        # a loop, each item returns its own stats, and an older module without wire_bytes
+        self.callback.v2_runner_on_failed(
+            make_result(
+                dict(
+                    failed=True,
+                    results=[
+                        dict(
+                            api_stats=api_stats(
+                                1,
+                                1.5,
+                                {
+                                    APPLICATION: dict(
+                                        calls=1,
+                                        time=1.5,
+                                        max_time=1.5,
+                                        bytes=300,
+                                        statuses={"200": 1},
+                                    )
+                                },
+                                bytes=300,
+                            )
+                        ),
+                        dict(msg="no stats"),
+                    ],
+                ),
+                task="update segments",
+                host="zpa",
+            )
+        )
+
+    def test_totals(self):
+        self.run_tasks()
+        self.assertEqual(
+            self.callback.summary()["totals"],
+            dict(
+                tasks=2,
+                calls=4,
+                retries=1,
+                logins=1,
+                rate_limited=0,
+                bytes=2400,
+                wire_bytes=900,
+                time=2.0,
+            ),
+        )
+
+    def test_endpoints(self):
+        self.run_tasks()
+        summary = self.callback.summary()
+        by_calls = summary["endpoints_by_calls"]
+        self.assertEqual([e["endpoint"] for e in by_calls], [APPLICATION, SIGNIN])
+        self.assertEqual(
+            by_calls[0],
+            dict(
+                endpoint=APPLICATION,
+                calls=3,
+                retries=1,
+                time=1.9,
+                max_time=1.5,
+                bytes=2300,
+                wire_bytes=800,
+                statuses={"200": 2, "503": 1},
+            ),
+        )
+        self.assertEqual(
+            [e["endpoint"] for e in summary["endpoints_by_time"]],
+            [APPLICATION, SIGNIN],
+        )
+        self.assertEqual(
+            [(t["task"], t["host"]) for t in summary["slowest_tasks"]],
+            [("update segments", "zpa"), ("get segment", "localhost")],
+        )
+
+    def test_top(self):
+        self.options["top"] = 1
+        self.run_tasks()
+        summary = self.callback.summary()
+        self.assertEqual(len(summary["endpoints_by_calls"]), 1)
+        self.assertEqual(len(summary["slowest_tasks"]), 1)
+
+    def test_table(self):
+        self.run_tasks()
+        self.callback.v2_playbook_on_stats(MagicMock())
+        self.display.banner.assert_called_once_with("ZPA API STATS")
+        output = self.display.display.call_args[0][0]
+        self.assertIn(
+            "ZPA API: 4 calls in 2 tasks, 1 logins, 1 retries, 0 rate limited, "
+            "2400 bytes (900 received), 2.000s",
+            output,
+        )
+        self.assertIn(APPLICATION, output)
+
+    def test_json_file(self):
+        path = os.path.join(self.tmpdir, "stats.json")
+        self.options.update(output_format="json", output_file=path)
+        self.run_tasks()
+        self.callback.v2_playbook_on_stats(MagicMock())
+        self.display.display.assert_not_called()
+        with open(path) as f:
+            self.assertEqual(json.load(f)["totals"]["calls"], 4)
+
+    def test_nothing_collected(self):
+        self.callback.v2_runner_on_ok(make_result(dict(changed=False)))
+        self.callback.v2_playbook_on_stats(MagicMock())
+        self.display.banner.assert_not_called()
+        self.display.display.assert_not_called()
@@ -0,0 +1,143 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ansible.inventory.data import InventoryData
+from ansible_collections.willguibr.zpacloud.plugins.inventory import zpa
+
+
+def connector(id, name, **kwargs):
+    return dict(
+        kwargs,
+        id=id,
+        name=name,
+        app_connector_group_name="Connectors",
+        country_code="US",
+        current_version="22.1.1",
+        control_channel_status="ZPN_STATUS_AUTHENTICATED",
+    )
+
+
+def edge_group(id, name, edges):
+    return dict(id=id, name=name, service_edges=edges)
+
+
+class TestZPAInventory(unittest.TestCase):
+    def setUp(self):
+        self.plugin = zpa.InventoryModule()
+        self.plugin.inventory = InventoryData()
+        # the options the plugin would read from the zpa.yml file
+        self.options = dict(
+            customer_id="1",
+            sources=["app_connectors", "service_edges"],
+            group_by=["group", "country", "version", "control_channel_status"],
+            strict=False,
+            compose={},
+            groups={},
+            keyed_groups=[],
+        )
+        self.plugin.get_option = self.options.get
+
+    def fetch(self, connectors, edge_groups):
+        connectors_service = MagicMock()
+        connectors_service.iterAll.return_value = iter(connectors)
+        edges_service = MagicMock()
+        edges_service.iterAll.return_value = iter(edge_groups)
+        with patch.object(zpa, "ZPAPluginModule") as module, patch.object(
+            zpa, "AppConnectorControllerService", return_value=connectors_service
+        ), patch.object(zpa, "ServiceEdgeGroupService", return_value=edges_service):
+            module.return_value.params = dict(customer_id="1")
+            return self.plugin._fetch()
+
+    def hostvars(self, name):
+        return self.plugin.inventory.get_host(name).get_vars()
+
+    def groups(self, name):
+        return sorted(g.name for g in self.plugin.inventory.get_host(name).get_groups())
+
+    def test_fetch(self):
+        hosts = self.fetch(
+            [connector("1", "ac1")],
+            [edge_group("10", "Edges", [dict(id="2", name="se1")])],
+        )
+        self.assertEqual(
+            hosts,
+            [
+                ["app_connector", "Connectors", connector("1", "ac1")],
+                [
+                    "service_edge",
+                    "Edges",
+                    dict(
+                        id="2",
+                        name="se1",
+                        service_edge_group_id="10",
+                        service_edge_group_name="Edges",
+                    ),
+                ],
+            ],
+        )
+
+    def test_sources(self):
+        self.options["sources"] = ["service_edges"]
+        hosts = self.fetch(
+            [connector("1", "ac1")],
+            [edge_group("10", "Edges", [dict(id="2", name="se1")])],
+        )
+        self.assertEqual([h[0] for h in hosts], ["service_edge"])
+
+    def test_populate(self):
+        self.plugin._populate(
+            self.fetch(
+                [connector("1", "ac1", private_ip="10.0.0.1")],
+                [edge_group("10", "Edges", [dict(id="2", name="se1")])],
+            )
+        )
+        self.assertEqual(sorted(self.plugin.inventory.hosts), ["ac1", "se1"])
+        self.assertEqual(
+            self.groups("ac1"),
+            [
+                "app_connector_group_Connectors",
+                "app_connectors",
+                "control_channel_ZPN_STATUS_AUTHENTICATED",
+                "country_US",
+                "version_22_1_1",
+            ],
+        )
+        self.assertEqual(
+            self.groups("se1"), ["service_edge_group_Edges", "service_edges"]
+        )
+        hostvars = self.hostvars("ac1")
+        self.assertEqual(hostvars["zpa_type"], "app_connector")
+        self.assertEqual(hostvars["zpa_name"], "ac1")
+        self.assertEqual(hostvars["private_ip"], "10.0.0.1")
+        self.assertNotIn("name", hostvars)
+
+    def test_group_by(self):
+        self.options["group_by"] = ["country"]
+        self.plugin._populate(self.fetch([connector("1", "ac1")], []))
+        self.assertEqual(self.groups("ac1"), ["app_connectors", "country_US"])
+
+    def test_same_names(self):
+        self.plugin._populate(
+            self.fetch(
+                [connector("1", "zpa"), connector("3", "ac")],
+                [edge_group("10", "Edges", [dict(id="2", name="zpa")])],
+            )
+        )
+        self.assertEqual(sorted(self.plugin.inventory.hosts), ["ac", "zpa_1", "zpa_2"])
+        connector_vars, edge_vars = self.hostvars("zpa_1"), self.hostvars("zpa_2")
+        self.assertEqual(
+            (connector_vars["zpa_type"], connector_vars["id"]), ("app_connector", "1")
+        )
+        self.assertEqual(
+            (edge_vars["zpa_type"], edge_vars["id"]), ("service_edge", "2")
+        )
+        self.assertEqual(connector_vars["zpa_name"], "zpa")
+        self.assertEqual(edge_vars["zpa_name"], "zpa")
+        self.assertNotIn("country_code", edge_vars)
+        self.assertEqual(
+            self.groups("zpa_2"), ["service_edge_group_Edges", "service_edges"]
+        )
@@ -0,0 +1,140 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import yaml
+from ansible import constants as C
+from ansible.errors import AnsibleError, AnsibleOptionsError
+from ansible_collections.willguibr.zpacloud.plugins.lookup import zpa_id
+
+SEGMENT_GROUPS = "/mgmtconfig/v1/admin/customers/1/segmentGroup"
+IDPS = "/mgmtconfig/v2/admin/customers/1/idp"
+SCIM_GROUPS = "/userconfig/v1/customers/1/scimgroup/idpId/50"
+
+
+class TestZPAIdLookup(unittest.TestCase):
+    def setUp(self):
+        self.lookup = zpa_id.LookupModule()
+        # what the plugin loader does with the DOCUMENTATION of the plugin
+        self.lookup._load_name = "willguibr.zpacloud.zpa_id"
+        C.config.initialize_plugin_configuration_definitions(
+            "lookup",
+            self.lookup._load_name,
+            yaml.safe_load(zpa_id.DOCUMENTATION)["options"],
+        )
+        self.collections = {
+            SEGMENT_GROUPS: [
+                dict(id="10", name="web"),
+                dict(id="11", name="db"),
+                dict(id="12", name="db"),
+            ],
+            IDPS: [dict(id="50", name="Okta")],
+            SCIM_GROUPS: [dict(id="60", name="Engineering")],
+        }
+        self.client = MagicMock()
+        self.client.iter_paginated_data.side_effect = (
+            lambda base_url, data_key_name: iter(self.collections.get(base_url, []))
+        )
+        for patcher in (
+            patch.object(zpa_id, "ZPAClientHelper", return_value=self.client),
+            patch.dict(zpa_id._id_maps, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_lookup(self, *terms, **kwargs):
+        kwargs.setdefault("object_type", "segment_group")
+        return self.lookup.run(list(terms), {}, customer_id="1", **kwargs)
+
+    def listed(self):
+        return [
+            c[1]["base_url"] for c in self.client.iter_paginated_data.call_args_list
+        ]
+
+    def test_ids(self):
+        self.assertEqual(self.run_lookup("web", "db"), ["10", "11"])
+        self.assertEqual(self.listed(), [SEGMENT_GROUPS])
+        # the map is kept for the next tasks of the run
+        self.assertEqual(self.run_lookup("web"), ["10"])
+        self.assertEqual(self.listed(), [SEGMENT_GROUPS])
+
+    def test_several_matches(self):
+        # the first object with the name is used, like the modules do
+        self.assertEqual(self.run_lookup("db"), ["11"])
+
+    def test_not_found(self):
+        with self.assertRaisesRegex(AnsibleError, "segment_group not found: missing"):
+            self.run_lookup("web", "missing")
+        # a name missing from the map may be a new object, the list is refreshed
+        self.assertEqual(self.listed(), [SEGMENT_GROUPS])
+        self.collections[SEGMENT_GROUPS].append(dict(id="13", name="missing"))
+        self.assertEqual(self.run_lookup("missing"), ["13"])
+        self.assertEqual(self.listed(), [SEGMENT_GROUPS, SEGMENT_GROUPS])
+
+    def test_not_found_warn_or_skip(self):
+        with patch.object(zpa_id, "display") as display:
+            self.assertEqual(
+                self.run_lookup("web", "missing", on_missing="warn"), ["10", None]
+            )
+            display.warning.assert_called_once_with("segment_group not found: missing")
+            self.assertEqual(self.run_lookup("missing", on_missing="skip"), [None])
+            display.warning.assert_called_once()
+
+    def test_id_key(self):
+        self.collections[SEGMENT_GROUPS] = [dict(id="10", name="web", uuid="u-10")]
+        self.assertEqual(self.run_lookup("web", id_key="uuid"), ["u-10"])
+
+    def test_supported_types(self):
+        doc = yaml.safe_load(zpa_id.DOCUMENTATION)
+        self.assertEqual(
+            sorted(doc["options"]["object_type"]["choices"]),
+            sorted(zpa_id.OBJECT_PATHS),
+        )
+        # the IdP of the SCIM objects is looked up by name in the idp collection
+        self.collections = {IDPS: [dict(id="50", name="Okta")]}
+        for object_type, path in zpa_id.OBJECT_PATHS.items():
+            path = path % dict(customer_id="1", idp_id="50")
+            self.collections.setdefault(path, []).append(
+                dict(id=object_type, name="Engineering")
+            )
+        for object_type in zpa_id.OBJECT_PATHS:
+            self.assertEqual(
+                self.run_lookup(
+                    "Engineering", object_type=object_type, idp_name="Okta"
+                ),
+                [object_type],
+            )
+
+    def test_unsupported_type(self):
+        with self.assertRaises(AnsibleOptionsError):
+            self.run_lookup("web", object_type="web_server")
+        self.client.iter_paginated_data.assert_not_called()
+
+    def test_scim_group(self):
+        self.assertEqual(
+            self.run_lookup("Engineering", object_type="scim_group", idp_name="Okta"),
+            ["60"],
+        )
+        self.assertEqual(self.listed(), [IDPS, SCIM_GROUPS])
+        with self.assertRaisesRegex(AnsibleError, "idp_name is required"):
+            self.run_lookup("Engineering", object_type="scim_group")
+        with self.assertRaisesRegex(AnsibleError, "IdP not found: Azure"):
+            self.run_lookup("Engineering", object_type="scim_group", idp_name="Azure")
+
+    def test_file_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        self.assertEqual(
+            self.run_lookup("web", cache_ttl=60, cache_dir=cache_dir), ["10"]
+        )
+        # a new run reads the map from the file
+        zpa_id._id_maps.clear()
+        self.assertEqual(
+            self.run_lookup("db", cache_ttl=60, cache_dir=cache_dir), ["11"]
+        )
+        self.assertEqual(self.listed(), [SEGMENT_GROUPS])
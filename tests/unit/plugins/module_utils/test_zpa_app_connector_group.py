@@ -3,11 +3,15 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import unittest
+from functools import partial
 from unittest.mock import MagicMock
 
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_app_connector_group import (
     AppConnectorGroupService,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
 
 
 class TestAppConnectorGroupService(unittest.TestCase):
@@ -38,8 +42,10 @@ class TestAppConnectorGroupService(unittest.TestCase):
     def test_get_by_name_when_ok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get_paginated_data = MagicMock()
-        rest.get_paginated_data.return_value = [
+        rest.search_by_name = partial(ZPAClientHelper.search_by_name, rest)
+        rest.cached_index.return_value = None
+        rest.iter_paginated_data = MagicMock()
+        rest.iter_paginated_data.return_value = [
             {"name": "bar1", "id": "test1", "connectors": [{"someField": "value1"}]},
             {"name": "bar2", "id": "test2", "connectors": [{"someField": "value2"}]},
         ]
@@ -52,8 +58,8 @@ class TestAppConnectorGroupService(unittest.TestCase):
     def test_get_by_name_when_nok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get = MagicMock()
-        rest.get.return_value.status_code = 400
+        rest.search_by_name = MagicMock()
+        rest.search_by_name.return_value = None
         k = AppConnectorGroupService(module, "", rest)
         self.assertIsNone(k.getByName("test"))
 
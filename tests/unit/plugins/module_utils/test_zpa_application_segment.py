@@ -1,13 +1,20 @@
 from __future__ import absolute_import, division, print_function
 
-
 __metaclass__ = type
 
 import unittest
+from functools import partial
 from unittest.mock import MagicMock
+
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_application_segment import (
     ApplicationSegmentService,
 )
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    field_diff,
+)
 
 
 class TestApplicationSegmentService(unittest.TestCase):
@@ -33,8 +40,10 @@ class TestApplicationSegmentService(unittest.TestCase):
     def test_get_by_name_when_ok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get_paginated_data = MagicMock()
-        rest.get_paginated_data.return_value = [
+        rest.search_by_name = partial(ZPAClientHelper.search_by_name, rest)
+        rest.cached_index.return_value = None
+        rest.iter_paginated_data = MagicMock()
+        rest.iter_paginated_data.return_value = [
             {
                 "name": "bar1",
                 "id": "test1",
@@ -60,8 +69,8 @@ class TestApplicationSegmentService(unittest.TestCase):
     def test_get_by_name_when_nok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get = MagicMock()
-        rest.get.return_value.status_code = 400
+        rest.search_by_name = MagicMock()
+        rest.search_by_name.return_value = None
         k = ApplicationSegmentService(module, "", rest)
         self.assertIsNone(k.getByName("test"))
 
@@ -134,3 +143,29 @@ class TestApplicationSegmentService(unittest.TestCase):
         rest.put.return_value.status_code = 400
         k = ApplicationSegmentService(module, "", rest)
         self.assertIsNone(k.update({"name": "bar", "id": "test"}))
+
+    def test_timeouts_mapped_back(self):
+        k = ApplicationSegmentService(MagicMock(), "", MagicMock())
+        existing = k.mapRespJSONToApp(
+            {
+                "name": "bar",
+                "id": "test",
+                "defaultIdleTimeout": "600",
+                "defaultMaxAge": "3600",
+            }
+        )
+        desired = {
+            "name": "bar",
+            "id": None,
+            "default_idle_timeout": "600",
+            "default_max_age": "3600",
+        }
+        self.assertIsNone(field_diff(existing, desired))
+        desired["default_max_age"] = "7200"
+        self.assertEqual(
+            field_diff(existing, desired),
+            {
+                "before": {"default_max_age": "3600"},
+                "after": {"default_max_age": "7200"},
+            },
+        )
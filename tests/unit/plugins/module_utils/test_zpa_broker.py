@@ -0,0 +1,118 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_broker import (
+    Broker,
+    BrokerClient,
+    BrokerError,
+    broker_path,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    Response,
+)
+
+
+class FakeClient(object):
+    """Answers every call with the number of calls it received so far"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def send(self, method, path, data=None):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if path.endswith("/missing"):
+            return Response(None, {"status": 404, "body": "{}"})
+        if path.endswith("/fail"):
+            raise BrokerError("Reached max retries")
+        body = json.dumps({"calls": calls, "method": method})
+        return Response(None, {"status": 200, "body": body, "etag": "1"})
+
+
+class TestBroker(unittest.TestCase):
+    def test_inflight_gets_sent_once(self):
+        client = FakeClient(delay=0.2)
+        broker = Broker(lambda: client, cache_ttl=0)
+        results = []
+
+        def get():
+            results.append(broker.request("GET", "/app"))
+
+        threads = [threading.Thread(target=get) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]["headers"]["etag"], "1")
+        self.assertTrue(all(r == results[0] for r in results))
+
+    def test_cached_until_write(self):
+        client = FakeClient()
+        broker = Broker(lambda: client, cache_ttl=60)
+        broker.request("GET", "/app")
+        broker.request("GET", "/app")
+        self.assertEqual(client.calls, 1)
+        broker.request("POST", "/app", {"name": "web"})
+        broker.request("GET", "/app")
+        self.assertEqual(client.calls, 3)
+
+    def test_errors_not_cached(self):
+        client = FakeClient()
+        broker = Broker(lambda: client, cache_ttl=60)
+        for i in range(2):
+            self.assertEqual(broker.request("GET", "/missing")["status"], 404)
+            with self.assertRaises(BrokerError):
+                broker.request("GET", "/fail")
+        self.assertEqual(client.calls, 4)
+
+
+class TestBrokerClient(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = broker_path(self.tmpdir, "https://zpa", "id", "1")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_shared_broker(self):
+        a = BrokerClient(self.path, FakeClient, cache_ttl=60, idle_timeout=1)
+        b = BrokerClient(self.path, FakeClient, cache_ttl=60, idle_timeout=1)
+        self.assertEqual(
+            json.loads(a.zpa_request({}, "GET", "/app")["body"])["calls"], 1
+        )
+        self.assertEqual(
+            json.loads(b.zpa_request({}, "GET", "/app")["body"])["calls"], 1
+        )
+        b.zpa_request({}, "PUT", "/app/1", {"name": "web"})
+        self.assertEqual(
+            json.loads(a.zpa_request({}, "GET", "/app")["body"])["calls"], 3
+        )
+        with self.assertRaises(ConnectionError) as e:
+            a.zpa_request({}, "GET", "/fail")
+        self.assertIn("Reached max retries", str(e.exception))
+
+    def test_exits_when_idle(self):
+        client = BrokerClient(self.path, FakeClient, idle_timeout=1)
+        client.zpa_request({}, "GET", "/app")
+        deadline = time.time() + 10
+        while os.path.exists(self.path) and time.time() < deadline:
+            time.sleep(0.2)
+        self.assertFalse(os.path.exists(self.path))
+        # the next call starts a new broker
+        self.assertEqual(client.zpa_request({}, "GET", "/app")["status"], 200)
@@ -0,0 +1,903 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import base64
+import gzip
+import io
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, PropertyMock, patch
+
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ApiStats,
+    Response,
+    ResponseCache,
+    Throttle,
+    TokenCache,
+    ZPAClientHelper,
+    iter_json_list,
+    jwt_expiry,
+    rate_limit_delay,
+)
+
+
+def make_module(tmpdir, **params):
+    module = MagicMock()
+    module._remote_tmp = tmpdir
+    module._socket_path = None
+    module.params = dict(
+        client_id="id", client_secret="secret", customer_id="1", token_cache=True
+    )
+    module.params.update(params)
+    module.jsonify = json.dumps
+    return module
+
+
+def make_response(status_code, json_body):
+    body = b"" if json_body is None else json.dumps(json_body).encode("utf-8")
+    return Response(io.BytesIO(body), {"status": status_code})
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_store_and_load(self):
+        cache = TokenCache(self.cache_dir, "https://zpa", "id", "1")
+        expires_at = time.time() + 3600
+        with cache.lock() as c:
+            self.assertIsNone(c.load())
+            c.store("token", expires_at)
+        with cache.lock() as c:
+            self.assertEqual(c.load(), ("token", expires_at))
+        self.assertEqual(stat.S_IMODE(os.stat(cache.path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(self.cache_dir).st_mode), 0o700)
+
+    def test_load_when_expiring(self):
+        cache = TokenCache(self.cache_dir, "https://zpa", "id", "1")
+        with cache.lock() as c:
+            c.store("token", time.time() + 10)
+            self.assertIsNone(c.load())
+
+    def test_keyed_by_tenant(self):
+        a = TokenCache(self.cache_dir, "https://zpa", "id", "1")
+        b = TokenCache(self.cache_dir, "https://zpa", "id", "2")
+        self.assertNotEqual(a.path, b.path)
+
+    def test_jwt_expiry(self):
+        payload = base64.urlsafe_b64encode(b'{"exp": 1700000000}').rstrip(b"=")
+        token = "e30.%s.sig" % payload.decode("ascii")
+        self.assertEqual(jwt_expiry({}, token), 1700000000)
+        self.assertIsNone(jwt_expiry({}, "opaque"))
+
+
+class TestZPAClientHelperLogin(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_token_reused_across_clients(self):
+        module = make_module(self.tmpdir)
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin) as login:
+            ZPAClientHelper(module)
+            client = ZPAClientHelper(module)
+        self.assertEqual(login.call_count, 1)
+        self.assertEqual(client.headers["Authorization"], "Bearer t1")
+
+    def test_token_cache_disabled(self):
+        module = make_module(self.tmpdir, token_cache=False)
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin) as login:
+            ZPAClientHelper(module)
+            ZPAClientHelper(module)
+        self.assertEqual(login.call_count, 2)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "zpa_token_cache")))
+
+    def test_reauthenticate_on_401(self):
+        module = make_module(self.tmpdir)
+        signins = [
+            make_response(200, {"access_token": "t1", "expires_in": "3600"}),
+            make_response(200, {"access_token": "t2", "expires_in": "3600"}),
+        ]
+        with patch.object(ZPAClientHelper, "login", side_effect=signins):
+            client = ZPAClientHelper(module)
+            with patch.object(
+                ZPAClientHelper,
+                "_request",
+                side_effect=[make_response(401, None), make_response(200, {})],
+            ) as request:
+                resp = client.get("/mgmtconfig/v1/admin/customers/1/application/1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(client.headers["Authorization"], "Bearer t2")
+
+    def test_refresh_before_expiry(self):
+        module = make_module(self.tmpdir, token_cache=False)
+        signins = [
+            make_response(200, {"access_token": "t1", "expires_in": "3600"}),
+            make_response(200, {"access_token": "t2", "expires_in": "3600"}),
+        ]
+        with patch.object(ZPAClientHelper, "login", side_effect=signins) as login:
+            client = ZPAClientHelper(module)
+            self.assertAlmostEqual(client.refresh_at, time.time() + 3300, delta=5)
+            headers = []
+
+            def request(method, url, data, headers_=None):
+                headers.append(client.headers["Authorization"])
+                return make_response(200, {})
+
+            with patch.object(ZPAClientHelper, "_request", side_effect=request):
+                client.send("GET", "/application/1")
+                client.refresh_at = time.time() - 1
+                client.send("GET", "/application/2")
+        self.assertEqual(login.call_count, 2)
+        self.assertEqual(headers, ["Bearer t1", "Bearer t2"])
+
+    def test_retry_after_expiry_uses_new_token(self):
+        module = make_module(self.tmpdir, token_cache=False)
+        signins = [
+            make_response(200, {"access_token": "t1", "expires_in": "3600"}),
+            make_response(200, {"access_token": "t2", "expires_in": "3600"}),
+        ]
+        with patch.object(ZPAClientHelper, "login", side_effect=signins):
+            client = ZPAClientHelper(module)
+            headers = []
+
+            def request(method, url, data, headers_=None):
+                headers.append(client.headers["Authorization"])
+                if len(headers) == 1:
+                    # the token lapses while the request waits to be retried
+                    client.refresh_at = time.time() - 1
+                    return Response(None, {"status": 503, "retry-after": "0"})
+                return make_response(200, {})
+
+            with patch.object(ZPAClientHelper, "_request", side_effect=request):
+                resp = client.send("GET", "/application/1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(headers, ["Bearer t1", "Bearer t2"])
+
+    def test_concurrent_401_signin_once(self):
+        module = make_module(self.tmpdir, token_cache=False)
+        signins = [
+            make_response(200, {"access_token": "t1", "expires_in": "3600"}),
+            make_response(200, {"access_token": "t2", "expires_in": "3600"}),
+        ]
+        with patch.object(ZPAClientHelper, "login", side_effect=signins) as login:
+            client = ZPAClientHelper(module)
+
+            def request(method, url, data, headers=None):
+                time.sleep(0.05)
+                if client.headers["Authorization"] == "Bearer t1":
+                    return make_response(401, None)
+                return make_response(200, {})
+
+            with patch.object(ZPAClientHelper, "_request", side_effect=request):
+                with ThreadPoolExecutor(4) as pool:
+                    statuses = list(
+                        pool.map(
+                            lambda i: client.send(
+                                "GET", "/application/%d" % i
+                            ).status_code,
+                            range(4),
+                        )
+                    )
+        self.assertEqual(statuses, [200] * 4)
+        self.assertEqual(login.call_count, 2)
+
+
+class TestPersistentConnection(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        self.module = make_module(self.tmpdir)
+        self.module._socket_path = "/tmp/zpa-socket"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @patch(
+        "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.Connection"
+    )
+    def test_calls_sent_through_connection(self, connection):
+        connection.return_value.zpa_request.return_value = dict(
+            status=200, headers={"etag": "1"}, body='{"id": "1"}'
+        )
+        with patch.object(ZPAClientHelper, "login") as login:
+            client = ZPAClientHelper(self.module)
+            resp = client.get("/mgmtconfig/v1/admin/customers/1/application/1")
+        login.assert_not_called()
+        connection.assert_called_once_with("/tmp/zpa-socket")
+        params, method, path, data = connection.return_value.zpa_request.call_args[0]
+        self.assertEqual(params["client_secret"], "secret")
+        self.assertEqual(method, "GET")
+        self.assertEqual(path, "/mgmtconfig/v1/admin/customers/1/application/1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json, {"id": "1"})
+
+    @patch(
+        "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.BrokerClient"
+    )
+    def test_calls_sent_through_broker(self, broker):
+        self.module._socket_path = None
+        self.module.params.update(api_broker=True, api_broker_cache_ttl=5)
+        broker.return_value.zpa_request.return_value = dict(
+            status=200, headers={}, body='{"id": "1"}'
+        )
+        with patch.object(ZPAClientHelper, "login") as login:
+            client = ZPAClientHelper(self.module)
+            resp = client.get("/mgmtconfig/v1/admin/customers/1/application/1")
+        login.assert_not_called()
+        path, make_client = broker.call_args[0]
+        self.assertTrue(path.startswith(os.path.join(self.tmpdir, "zpa_broker")))
+        self.assertEqual(broker.call_args[1]["cache_ttl"], 5)
+        self.assertEqual(resp.json, {"id": "1"})
+
+    @patch(
+        "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.Connection"
+    )
+    def test_empty_body(self, connection):
+        connection.return_value.zpa_request.return_value = dict(
+            status=204, headers={}, body=None
+        )
+        client = ZPAClientHelper(self.module)
+        resp = client.delete("/mgmtconfig/v1/admin/customers/1/application/1")
+        self.assertEqual(resp.status_code, 204)
+        self.assertIsNone(resp.json)
+
+    @patch(
+        "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.Connection"
+    )
+    def test_connection_error(self, connection):
+        connection.return_value.zpa_request.side_effect = ConnectionError(
+            "Reached max retries"
+        )
+        self.module.fail_json.side_effect = SystemExit
+        client = ZPAClientHelper(self.module)
+        with self.assertRaises(SystemExit):
+            client.get("/app/1")
+        self.assertIn("Reached max retries", self.module.fail_json.call_args[1]["msg"])
+
+
+class TestLogging(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_client(self, **params):
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        module = make_module(self.tmpdir, token_cache=False, **params)
+        with patch(
+            "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.fetch_url",
+            return_value=(io.BytesIO(signin.body), signin.info),
+        ):
+            client = ZPAClientHelper(module)
+        return client, module
+
+    def send(self, client):
+        resp = io.BytesIO(b'{"list": [{"id": "1"}]}')
+        with patch(
+            "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.fetch_url",
+            return_value=(resp, {"status": 200}),
+        ):
+            return client.send("POST", "/app", {"name": "web"})
+
+    def test_summary(self):
+        client, module = self.make_client()
+        with patch.object(Response, "text", new_callable=PropertyMock) as text:
+            self.send(client)
+        text.assert_not_called()
+        msg = module.log.call_args[0][0]
+        self.assertIn("POST /app: status 200, 23 bytes in", msg)
+        self.assertNotIn("web", msg)
+
+    def test_full_masks_credentials(self):
+        client, module = self.make_client(log_level="full")
+        self.send(client)
+        signin, call = [c[0][0] for c in module.log.call_args_list]
+        self.assertNotIn("client_secret=secret", signin)
+        self.assertNotIn("t1", signin)
+        self.assertIn('{"name": "web"}', call)
+        self.assertIn('{"list": [{"id": "1"}]}', call)
+
+    def test_off(self):
+        client, module = self.make_client(log_level="off")
+        self.send(client)
+        module.log.assert_not_called()
+
+
+class TestApiStats(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_endpoint(self):
+        self.assertEqual(
+            ApiStats.endpoint(
+                "GET", "/mgmtconfig/v1/admin/customers/123/application/456?page=1"
+            ),
+            "GET /mgmtconfig/v1/admin/customers/{id}/application/{id}",
+        )
+
+    def test_retries_per_endpoint(self):
+        stats = ApiStats()
+        stats.retry("POST", "/signin")
+        stats.retry("GET", "mgmtconfig/v1/admin/customers/1/application/2")
+        stats.retry("GET", "/mgmtconfig/v1/admin/customers/1/application/3")
+        stats.retry()
+        result = stats.as_dict()
+        self.assertEqual(result["retries"], 4)
+        self.assertEqual(result["endpoints"]["POST /signin"]["retries"], 1)
+        endpoint = result["endpoints"][
+            "GET /mgmtconfig/v1/admin/customers/{id}/application/{id}"
+        ]
+        self.assertEqual((endpoint["calls"], endpoint["retries"]), (0, 2))
+
+    def test_api_stats_in_results(self):
+        module = make_module(self.tmpdir, token_cache=False, collect_metrics=True)
+        exit_json = module.exit_json
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        responses = [
+            (io.BytesIO(signin.body), signin.info),
+            (None, {"status": 503, "body": b"{}"}),
+            (io.BytesIO(b'{"id": "1"}'), {"status": 200}),
+            (io.BytesIO(signin.body), signin.info),
+            (io.BytesIO(b'{"id": "2"}'), {"status": 200}),
+        ]
+        with patch(
+            "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.fetch_url",
+            side_effect=responses,
+        ), patch("time.sleep"):
+            client = ZPAClientHelper(module)
+            client.throttle.pause = MagicMock()
+            client.get("/mgmtconfig/v1/admin/customers/1/application/1")
+            # clients of the same module share the stats
+            ZPAClientHelper(module).get(
+                "/mgmtconfig/v1/admin/customers/1/application/2"
+            )
+        module.exit_json(changed=False)
+        stats = exit_json.call_args[1]["api_stats"]
+        self.assertEqual(stats["calls"], 5)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["logins"], 2)
+        endpoint = stats["endpoints"][
+            "GET /mgmtconfig/v1/admin/customers/{id}/application/{id}"
+        ]
+        self.assertEqual(endpoint["calls"], 3)
+        self.assertEqual(endpoint["retries"], 1)
+        self.assertEqual(endpoint["statuses"], {"200": 2, "503": 1})
+        self.assertEqual(stats["endpoints"]["POST /signin"]["retries"], 0)
+        self.assertEqual(endpoint["bytes"], 24)
+        self.assertEqual(endpoint["wire_bytes"], 24)
+
+    def test_compressed_bytes(self):
+        module = make_module(self.tmpdir, token_cache=False, collect_metrics=True)
+        exit_json = module.exit_json
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        body = json.dumps({"list": [{"id": "1"}] * 100}).encode("utf-8")
+        compressed = gzip.compress(body)
+        with patch(
+            "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.fetch_url",
+            side_effect=[
+                (io.BytesIO(signin.body), signin.info),
+                (
+                    io.BytesIO(compressed),
+                    {"status": 200, "content-encoding": "gzip"},
+                ),
+            ],
+        ) as fetch:
+            client = ZPAClientHelper(module)
+            resp = client.get("/mgmtconfig/v1/admin/customers/1/application")
+        self.assertEqual(len(resp.json["list"]), 100)
+        self.assertEqual(
+            fetch.call_args[1]["headers"]["Accept-Encoding"], "gzip, deflate"
+        )
+        module.exit_json(changed=False)
+        stats = exit_json.call_args[1]["api_stats"]
+        self.assertEqual(stats["bytes"], len(signin.body) + len(body))
+        self.assertEqual(stats["wire_bytes"], len(signin.body) + len(compressed))
+
+    def test_disabled_by_default(self):
+        module = make_module(self.tmpdir)
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.assertIsNone(ZPAClientHelper(module).metrics)
+
+
+class TestGetPaginatedData(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.client = ZPAClientHelper(make_module(self.tmpdir, max_workers=3))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fake_get(self, total_pages):
+        def get(url):
+            page = int(url.split("page=")[1].split("&")[0])
+            body = {
+                "list": [{"id": "%d-%d" % (page, i)} for i in range(2)],
+                "totalPages": str(total_pages),
+            }
+            return Response(
+                io.BytesIO(json.dumps(body).encode("utf-8")), {"status": 200}
+            )
+
+        return get
+
+    def test_pages_reassembled_in_order(self):
+        with patch.object(self.client, "get", side_effect=self.fake_get(5)) as get:
+            data = self.client.get_paginated_data(base_url="/seg", data_key_name="list")
+        self.assertEqual(get.call_count, 5)
+        self.assertEqual(
+            [d["id"] for d in data],
+            ["%d-%d" % (page, i) for page in range(1, 6) for i in range(2)],
+        )
+
+    def test_single_page(self):
+        with patch.object(self.client, "get", side_effect=self.fake_get(1)) as get:
+            data = self.client.get_paginated_data(base_url="/seg", data_key_name="list")
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(data), 2)
+
+    def test_failed_page(self):
+        with patch.object(
+            self.client, "get", return_value=make_response(500, {"message": "boom"})
+        ):
+            self.client.get_paginated_data(base_url="/seg", data_key_name="list")
+        self.client.module.fail_json.assert_called()
+
+    def test_iter_stops_early(self):
+        with patch.object(self.client, "get", side_effect=self.fake_get(50)) as get:
+            items = self.client.iter_paginated_data(
+                base_url="/seg", data_key_name="list"
+            )
+            self.assertEqual(next(items), {"id": "1-0"})
+            items.close()
+        self.assertEqual(get.call_count, 1)
+
+    def test_iter_bounded_prefetch(self):
+        with patch.object(self.client, "get", side_effect=self.fake_get(50)) as get:
+            for item in self.client.iter_paginated_data(
+                base_url="/seg", data_key_name="list"
+            ):
+                if item["id"] == "2-1":
+                    break
+        # page 1, then page 2 plus the pages prefetched behind it
+        self.assertLessEqual(get.call_count, 2 + self.client.max_workers)
+
+
+class TestResponse(unittest.TestCase):
+    def test_decoded_once(self):
+        resp = Response(io.BytesIO(b'{"id": "1"}'), {"status": 200})
+        with patch(
+            "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.json_loads",
+            side_effect=json.loads,
+        ) as loads:
+            self.assertEqual(resp.json, {"id": "1"})
+            self.assertIs(resp.json, resp.json)
+        self.assertEqual(loads.call_count, 1)
+
+    def test_invalid_body(self):
+        resp = Response(io.BytesIO(b"<html>"), {"status": 502})
+        self.assertIsNone(resp.json)
+        self.assertEqual(resp.text, "<html>")
+
+    def test_error_body(self):
+        resp = Response(None, {"status": 400, "body": b'{"message": "bad"}'})
+        self.assertEqual(resp.json, {"message": "bad"})
+        self.assertEqual(resp.text, '{"message": "bad"}')
+
+    def test_iter_list(self):
+        body = b'{"list": [{"id": "1", "list": []}, {"id": "2"}], "totalPages": "2"}'
+        meta = {}
+        items = Response(io.BytesIO(body), {"status": 200}).iter_list("list", meta)
+        self.assertEqual(next(items), {"id": "1", "list": []})
+        self.assertEqual(list(items), [{"id": "2"}])
+        self.assertEqual(meta, {"totalPages": "2"})
+
+    def test_iter_json_list(self):
+        for text, items, meta in [
+            ('{ "totalPages" : "1", "list" : [ ] }', [], {"totalPages": "1"}),
+            ('{"list": null}', [], {"list": None}),
+            ("[1, 2]", [], {}),
+            ('{"a": {"list": [9]}, "list": [1 , 2 ]}', [1, 2], {"a": {"list": [9]}}),
+        ]:
+            found = {}
+            self.assertEqual(list(iter_json_list(text, "list", found)), items)
+            self.assertEqual(found, meta)
+        with self.assertRaises(ValueError):
+            list(iter_json_list('{"list": [1 2]}', "list", {}))
+
+    def test_compressed_body(self):
+        body = json.dumps({"list": [{"id": str(i)} for i in range(1000)]}).encode()
+        deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        for encoding, compressed in [
+            ("gzip", gzip.compress(body)),
+            ("deflate", zlib.compress(body)),
+            ("deflate", deflate.compress(body) + deflate.flush()),
+        ]:
+            info = {"status": 200, "content-encoding": encoding}
+            with patch(
+                "ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client.CHUNK_SIZE",
+                1024,
+            ):
+                resp = Response(io.BytesIO(compressed), info)
+            self.assertEqual(resp.body, body)
+            self.assertEqual(resp.compressed_size, len(compressed))
+            self.assertNotIn("content-encoding", resp.info)
+            self.assertEqual(resp.copy().json, json.loads(body))
+
+    def test_compressed_error_body(self):
+        info = {
+            "status": 400,
+            "content-encoding": "gzip",
+            "body": gzip.compress(b'{"message": "bad"}'),
+        }
+        self.assertEqual(Response(None, info).json, {"message": "bad"})
+
+    def test_compressed_error_body_with_drained_resp(self):
+        # fetch_url returns the HTTPError as resp, its body already read into info
+        info = {
+            "status": 400,
+            "content-encoding": "gzip",
+            "body": gzip.compress(b'{"message": "bad"}'),
+        }
+        resp = Response(io.BytesIO(b""), info)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json, {"message": "bad"})
+        self.assertEqual(resp.text, '{"message": "bad"}')
+
+    def test_corrupt_compressed_body(self):
+        info = {"status": 200, "content-encoding": "gzip"}
+        resp = Response(io.BytesIO(gzip.compress(b'{"id": "1"}')[:-12] + b"x"), info)
+        self.assertEqual(resp.status_code, -1)
+        self.assertIsNone(resp.json)
+
+
+class TestSearchByName(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.client = ZPAClientHelper(make_module(self.tmpdir))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fake_get(self, search_results, all_items):
+        def get(url):
+            items = search_results if "&search=" in url else all_items
+            return make_response(200, {"totalPages": "1", "list": items})
+
+        return get
+
+    def test_exact_match(self):
+        fake = self.fake_get(
+            [{"name": "web app"}, {"name": "web app 2"}], [{"name": "unused"}]
+        )
+        with patch.object(self.client, "get", side_effect=fake) as get:
+            self.assertEqual(
+                self.client.search_by_name("/app", "web app"), {"name": "web app"}
+            )
+        self.assertEqual(get.call_count, 1)
+        self.assertIn("&search=web%20app", get.call_args[0][0])
+
+    def test_not_found(self):
+        with patch.object(
+            self.client, "get", side_effect=self.fake_get([], [{"name": "web"}])
+        ) as get:
+            self.assertIsNone(self.client.search_by_name("/app", "web"))
+        self.assertEqual(get.call_count, 1)
+
+    def test_ambiguous_falls_back_to_listing(self):
+        fake = self.fake_get([{"name": "WEB"}], [{"name": "WEB"}, {"name": "web"}])
+        with patch.object(self.client, "get", side_effect=fake) as get:
+            self.assertEqual(self.client.search_by_name("/app", "web"), {"name": "web"})
+        self.assertEqual(get.call_count, 2)
+
+
+class TestCollectionIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.client = ZPAClientHelper(make_module(self.tmpdir))
+        ZPAClientHelper.invalidate_indexes()
+        self.items = [
+            {"id": "1", "name": "a", "postureUdid": "u1"},
+            {"id": "2", "name": "b", "postureUdid": "u2"},
+        ]
+
+    def tearDown(self):
+        ZPAClientHelper.invalidate_indexes()
+        shutil.rmtree(self.tmpdir)
+
+    def test_listed_once(self):
+        with patch.object(
+            self.client, "get_paginated_data", return_value=self.items
+        ) as listing:
+            self.assertEqual(
+                self.client.get_index("/posture").get("postureUdid", "u2"),
+                self.items[1],
+            )
+            self.assertIsNone(self.client.get_index("/posture").get("id", "3"))
+        self.assertEqual(listing.call_count, 1)
+
+    def test_lookups_served_from_index(self):
+        with patch.object(self.client, "get_paginated_data", return_value=self.items):
+            self.client.get_index("/app")
+        with patch.object(self.client, "send") as send:
+            self.assertEqual(self.client.get("/app/2").json, self.items[1])
+            self.assertEqual(self.client.search_by_name("/app", "a"), self.items[0])
+            self.client.get("/app/3")
+        self.assertEqual(send.call_count, 1)
+
+    def test_write_invalidates(self):
+        with patch.object(self.client, "get_paginated_data", return_value=self.items):
+            self.client.get_index("/app")
+        with patch.object(
+            ZPAClientHelper, "_request", return_value=make_response(204, None)
+        ):
+            self.client.delete("/app/2")
+        self.assertIsNone(self.client.cached_index("/app"))
+
+
+class TestRequestMemo(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.client = ZPAClientHelper(make_module(self.tmpdir, max_workers=4))
+        self.urls = []
+
+    def tearDown(self):
+        ZPAClientHelper.invalidate_memo()
+        shutil.rmtree(self.tmpdir)
+
+    def request(self, method, url, data, headers=None):
+        self.urls.append(url)
+        time.sleep(0.1)
+        if url.endswith("/missing"):
+            return make_response(404, {"id": "resource.not.found"})
+        return make_response(200, {"id": "1", "name": "idp"})
+
+    def test_inflight_gets_coalesced(self):
+        with patch.object(ZPAClientHelper, "_request", side_effect=self.request):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                resps = list(
+                    pool.map(lambda i: self.client.get("/customers/1/idp/1"), range(4))
+                )
+        self.assertEqual(len(self.urls), 1)
+        self.assertTrue(all(r.json == {"id": "1", "name": "idp"} for r in resps))
+
+    def test_memoized_until_write(self):
+        with patch.object(ZPAClientHelper, "_request", side_effect=self.request):
+            resp = self.client.get("/customers/1/idp/1")
+            # callers get their own copy of the body
+            resp.json["name"] = "changed"
+            self.assertEqual(self.client.get("/customers/1/idp/1").json["name"], "idp")
+            self.client.get("/customers/2/idp/1")
+            self.client.get("/customers/1/missing")
+            self.client.get("/customers/1/missing")
+            self.assertEqual(len(self.urls), 4)
+            self.client.put("/customers/1/segmentGroup/1", {"name": "a"})
+            self.client.get("/customers/1/idp/1")
+            self.client.get("/customers/2/idp/1")
+        self.assertEqual(len(self.urls), 6)
+
+    def test_pages_not_memoized(self):
+        def request(method, url, data, headers=None):
+            self.urls.append(url)
+            return make_response(200, {"list": [{"id": "1"}], "totalPages": "1"})
+
+        with patch.object(ZPAClientHelper, "_request", side_effect=request):
+            for i in range(2):
+                items = list(
+                    self.client.iter_paginated_data("/customers/1/idp", "list")
+                )
+                self.assertEqual(items, [{"id": "1"}])
+        # the second listing is sent again, no page was kept
+        self.assertEqual(len(self.urls), 2)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        self.cache_dir = os.path.join(self.tmpdir, "zpa_response_cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_client(self, **params):
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            return ZPAClientHelper(make_module(self.tmpdir, **params))
+
+    def test_not_modified_served_from_cache(self):
+        client = self.make_client(response_cache=True)
+        responses = [
+            Response(io.BytesIO(b'{"id": "1"}'), {"status": 200, "etag": '"v1"'}),
+            Response(None, {"status": 304}),
+        ]
+        with patch.object(
+            ZPAClientHelper, "_request", side_effect=responses
+        ) as request:
+            self.assertEqual(client.send("GET", "/app/1").json, {"id": "1"})
+            resp = client.send("GET", "/app/1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json, {"id": "1"})
+        self.assertIsNone(request.call_args_list[0][0][3])
+        headers = request.call_args_list[1][0][3]
+        self.assertEqual(headers["If-None-Match"], '"v1"')
+        self.assertEqual(headers["Authorization"], "Bearer t1")
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_disabled_by_default(self):
+        client = self.make_client()
+        response = Response(io.BytesIO(b"{}"), {"status": 200, "etag": '"v1"'})
+        with patch.object(ZPAClientHelper, "_request", return_value=response):
+            client.send("GET", "/app/1")
+        self.assertIsNone(client.response_cache)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_without_validators_not_cached(self):
+        cache = ResponseCache(self.cache_dir, "https://zpa", "id", "1", 1024)
+        cache.store("https://zpa/app/1", b"{}", {"status": 200})
+        self.assertIsNone(cache.load("https://zpa/app/1"))
+
+    def test_least_recently_used_evicted(self):
+        cache = ResponseCache(self.cache_dir, "https://zpa", "id", "1", 450)
+        body = b"x" * 100
+        for i, url in enumerate(["/a", "/b"]):
+            cache.store(url, body, {"last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+            os.utime(cache._path(url), (1000 + i, 1000 + i))
+        cache.touch("/a")
+        cache.store("/c", body, {"etag": '"c"'})
+        self.assertIsNotNone(cache.load("/a"))
+        self.assertIsNone(cache.load("/b"))
+        self.assertEqual(cache.load("/c")["etag"], '"c"')
+
+
+class TestThrottling(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        ZPAClientHelper.invalidate_memo()
+        signin = make_response(200, {"access_token": "t1", "expires_in": "3600"})
+        with patch.object(ZPAClientHelper, "login", return_value=signin):
+            self.client = ZPAClientHelper(make_module(self.tmpdir, rate_limit=0))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_rate_limit_delay(self):
+        self.assertEqual(rate_limit_delay({"retry-after": "3"}), 3.0)
+        self.assertEqual(rate_limit_delay({"x-ratelimit-reset": "7"}), 7.0)
+        self.assertIsNone(
+            rate_limit_delay(
+                {"x-ratelimit-reset": "7", "x-ratelimit-remaining": "5"},
+                exhausted_only=True,
+            )
+        )
+        self.assertEqual(
+            rate_limit_delay(
+                {"x-ratelimit-reset": "7", "x-ratelimit-remaining": "0"},
+                exhausted_only=True,
+            ),
+            7.0,
+        )
+        self.assertIsNone(rate_limit_delay({}))
+        self.assertIsNone(rate_limit_delay(None))
+
+    def test_token_bucket(self):
+        throttle = Throttle(1000, 2)
+        start = time.time()
+        for i in range(12):
+            throttle.acquire()
+        # 2 tokens of burst, then 10 more at 1000 per second
+        self.assertGreaterEqual(time.time() - start, 0.009)
+
+    def test_pause(self):
+        throttle = Throttle(0, 1)
+        throttle.pause(0.05)
+        start = time.time()
+        throttle.acquire()
+        self.assertGreaterEqual(time.time() - start, 0.04)
+
+    def test_not_found_not_retried(self):
+        with patch.object(
+            ZPAClientHelper, "_request", return_value=make_response(404, None)
+        ) as request:
+            resp = self.client.get("/app/1")
+        self.assertEqual(resp.status_code, 404)
+        self.assertEqual(request.call_count, 1)
+
+    def test_rate_limited_retried_after_delay(self):
+        limited = make_response(429, None)
+        limited.info = {"status": 429, "retry-after": "0.05"}
+        with patch.object(
+            ZPAClientHelper,
+            "_request",
+            side_effect=[limited, make_response(200, {})],
+        ) as request:
+            with patch.object(self.client.throttle, "pause") as pause:
+                resp = self.client.get("/app/1")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+        pause.assert_called_once_with(0.05)
+
+    def test_connection_failure_retried_for_get_only(self):
+        def failed():
+            return Response(None, {"status": -1, "msg": "timed out"})
+
+        with patch.object(self.client.throttle, "pause"):
+            with patch.object(
+                ZPAClientHelper,
+                "_request",
+                side_effect=[failed(), make_response(200, {})],
+            ) as request:
+                resp = self.client.get("/app/1")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(request.call_count, 2)
+            # the create may have been applied before the connection failed
+            with patch.object(
+                ZPAClientHelper, "_request", return_value=failed()
+            ) as request:
+                resp = self.client.post("/app", {"name": "web"})
+            self.assertEqual(resp.status_code, -1)
+            self.assertEqual(request.call_count, 1)
+
+    def test_corrupt_body_of_write_not_resent(self):
+        def corrupt():
+            body = gzip.compress(b'{"id": "1"}')[:-12] + b"x"
+            return Response(
+                io.BytesIO(body), {"status": 201, "content-encoding": "gzip"}
+            )
+
+        with patch.object(self.client.throttle, "pause"):
+            with patch.object(
+                ZPAClientHelper, "_request", side_effect=[corrupt(), corrupt()]
+            ) as request:
+                resp = self.client.post("/app", {"name": "web"})
+            self.assertEqual(resp.status_code, -1)
+            self.assertIn("Invalid gzip body", resp.info["msg"])
+            self.assertEqual(request.call_count, 1)
+            with patch.object(
+                ZPAClientHelper,
+                "_request",
+                side_effect=[corrupt(), make_response(200, {"id": "1"})],
+            ) as request:
+                resp = self.client.get("/app/1")
+            self.assertEqual(resp.json, {"id": "1"})
+            self.assertEqual(request.call_count, 2)
@@ -0,0 +1,226 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import unittest
+from unittest.mock import MagicMock
+
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_diff import (
+    differs,
+    field_diff,
+    normalize,
+)
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_policy_access_rule import (
+    PolicyAccessRuleService,
+)
+
+
+class TestNormalize(unittest.TestCase):
+    def test_references_reduce_to_id(self):
+        self.assertEqual(normalize({"id": "1", "name": "a"}), "1")
+
+    def test_lists_are_order_insensitive(self):
+        self.assertEqual(
+            normalize([{"id": "2"}, {"id": "1", "name": "a"}]),
+            normalize([{"id": "1"}, {"id": "2", "enabled": True}]),
+        )
+
+    def test_empty_values(self):
+        for value in (None, "", [], {}, {"description": None}):
+            self.assertIsNone(normalize(value))
+
+    def test_numbers_compare_as_strings(self):
+        self.assertEqual(normalize(900), normalize("900"))
+        self.assertTrue(normalize(True))
+
+
+class TestFieldDiff(unittest.TestCase):
+    def setUp(self):
+        self.existing = {
+            "id": "10",
+            "name": "sg",
+            "enabled": True,
+            "description": "desc",
+            "config_space": "DEFAULT",
+            "servers": [
+                {"id": "2", "name": "b", "enabled": True},
+                {"id": "1", "name": "a", "enabled": True},
+            ],
+            "config": {"name": "lss", "format": "json", "enabled": True},
+        }
+
+    def test_unchanged(self):
+        desired = {
+            "id": None,
+            "name": "sg",
+            "enabled": True,
+            "description": "desc",
+            "config_space": "DEFAULT",
+            "dynamic_discovery": None,
+            "servers": [{"id": "1"}, {"id": "2"}],
+            "config": {"name": "lss", "format": "json"},
+            "default_idle_timeout": "",
+        }
+        self.assertIsNone(field_diff(self.existing, desired))
+
+    def test_changed_fields_only(self):
+        desired = {
+            "name": "sg",
+            "enabled": False,
+            "description": "desc",
+            "servers": [{"id": "1"}],
+        }
+        diff = field_diff(self.existing, desired)
+        self.assertEqual(
+            diff["before"],
+            {"enabled": True, "servers": self.existing["servers"]},
+        )
+        self.assertEqual(diff["after"], {"enabled": False, "servers": [{"id": "1"}]})
+
+    def test_nested_dict_compares_desired_keys(self):
+        self.assertFalse(differs(self.existing["config"], {"name": "lss"}))
+        self.assertTrue(differs(self.existing["config"], {"format": "csv"}))
+
+    def test_create(self):
+        diff = field_diff(None, {"id": None, "name": "sg", "description": None})
+        self.assertEqual(diff, {"before": {}, "after": {"name": "sg"}})
+
+
+def operand(object_type, lhs, rhs, idp_id=None):
+    """An operand as set in the module options"""
+    return dict(
+        id=None,
+        idp_id=idp_id,
+        name=None,
+        lhs=lhs,
+        rhs=rhs,
+        rhs_list=None,
+        object_type=object_type,
+    )
+
+
+class TestPolicyConditions(unittest.TestCase):
+    def setUp(self):
+        service = PolicyAccessRuleService(MagicMock(), "1", MagicMock())
+        # the rule as returned by the API, with the IDs it assigned
+        self.existing = service.mapRespJSONToPolicy(
+            {
+                "id": "216196257331291979",
+                "name": "rule",
+                "action": "ALLOW",
+                "operator": "AND",
+                "conditions": [
+                    {
+                        "id": "1071",
+                        "creationTime": "1650000000",
+                        "modifiedBy": "72057594037928115",
+                        "negated": False,
+                        "operator": "OR",
+                        "operands": [
+                            {
+                                "id": "1072",
+                                "creationTime": "1650000000",
+                                "objectType": "APP",
+                                "lhs": "id",
+                                "rhs": "216196257331291924",
+                                "name": "web",
+                            },
+                            {
+                                "id": "1073",
+                                "objectType": "APP_GROUP",
+                                "lhs": "id",
+                                "rhs": "216196257331291921",
+                                "name": "apps",
+                            },
+                        ],
+                    },
+                    {
+                        "id": "1074",
+                        "negated": False,
+                        "operator": "OR",
+                        "operands": [
+                            {
+                                "id": "1075",
+                                "objectType": "SAML",
+                                "lhs": "216196257331285825",
+                                "rhs": "engineering",
+                                "idpId": "216196257331285702",
+                            },
+                        ],
+                    },
+                ],
+            }
+        )
+
+    def desired(self, *conditions):
+        return dict(
+            id=None,
+            name="rule",
+            action="ALLOW",
+            operator="AND",
+            conditions=list(conditions),
+        )
+
+    def test_unchanged_conditions(self):
+        desired = self.desired(
+            # in another order than the API returns them
+            dict(
+                id=None,
+                negated=False,
+                operator="OR",
+                operands=[
+                    operand(
+                        "SAML",
+                        "216196257331285825",
+                        "engineering",
+                        idp_id="216196257331285702",
+                    )
+                ],
+            ),
+            dict(
+                id=None,
+                negated=None,
+                operator="OR",
+                operands=[
+                    operand("APP_GROUP", "id", "216196257331291921"),
+                    operand("APP", "id", "216196257331291924"),
+                ],
+            ),
+        )
+        self.assertIsNone(field_diff(self.existing, desired))
+
+    def test_changed_operand(self):
+        desired = self.desired(
+            dict(
+                operator="OR",
+                operands=[
+                    operand("APP", "id", "216196257331291924"),
+                    operand("APP_GROUP", "id", "216196257331291999"),
+                ],
+            ),
+            dict(
+                operator="OR",
+                operands=[operand("SAML", "216196257331285825", "engineering")],
+            ),
+        )
+        diff = field_diff(self.existing, desired)
+        self.assertEqual(list(diff["after"]), ["conditions"])
+
+    def test_removed_condition(self):
+        desired = self.desired(
+            dict(
+                operator="OR",
+                operands=[operand("SAML", "216196257331285825", "engineering")],
+            ),
+        )
+        self.assertIsNotNone(field_diff(self.existing, desired))
+
+    def test_removed_operand(self):
+        desired = self.desired(
+            dict(operator="OR", operands=[operand("APP", "id", "216196257331291924")]),
+            dict(
+                operator="OR",
+                operands=[operand("SAML", "216196257331285825", "engineering")],
+            ),
+        )
+        self.assertIsNotNone(field_diff(self.existing, desired))
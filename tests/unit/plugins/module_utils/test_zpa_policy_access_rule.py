@@ -1,10 +1,15 @@
 from __future__ import absolute_import, division, print_function
 
-
 __metaclass__ = type
 
 import unittest
+from functools import partial
 from unittest.mock import MagicMock
+
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    CollectionIndex,
+    ZPAClientHelper,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_policy_access_rule import (
     PolicyAccessRuleService,
 )
@@ -43,8 +48,10 @@ class TestPolicyAccessRuleService(unittest.TestCase):
     def test_get_by_name_when_ok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get_paginated_data = MagicMock()
-        rest.get_paginated_data.return_value = [
+        rest.search_by_name = partial(ZPAClientHelper.search_by_name, rest)
+        rest.cached_index.return_value = None
+        rest.iter_paginated_data = MagicMock()
+        rest.iter_paginated_data.return_value = [
             {
                 "name": "bar1",
                 "id": "test1",
@@ -73,8 +80,8 @@ class TestPolicyAccessRuleService(unittest.TestCase):
     def test_get_by_name_when_nok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get = MagicMock()
-        rest.get.return_value.status_code = 400
+        rest.search_by_name = MagicMock()
+        rest.search_by_name.return_value = None
         k = PolicyAccessRuleService(module, "", rest)
         self.assertIsNone(k.getByNameAndType("test", ""))
 
@@ -152,3 +159,52 @@ class TestPolicyAccessRuleService(unittest.TestCase):
         rest.put.return_value.status_code = 400
         k = PolicyAccessRuleService(module, "", rest)
         self.assertIsNone(k.update({"name": "bar", "id": "test"}, "1"))
+
+    def test_validate_conditions_lists_many_ids_once(self):
+        module = MagicMock()
+        rest = MagicMock()
+        rest.get_index.return_value = CollectionIndex(
+            [{"id": str(i)} for i in range(10)]
+        )
+        operands = [
+            {"objectType": "APP", "lhs": "id", "rhs": str(i)} for i in range(7)
+        ]
+        operands.append({"objectType": "APP", "lhs": "id", "rhs": "3"})
+        operands.append({"objectType": "APP", "lhs": "id", "rhs": "42"})
+        operands.append({"objectType": "CLIENT_TYPE", "lhs": "id", "rhs": "bad"})
+        k = PolicyAccessRuleService(module, "1", rest)
+        check = k.validateConditions([{"operands": operands}])
+        rest.get_index.assert_called_once_with(
+            "/mgmtconfig/v1/admin/customers/1/application"
+        )
+        rest.get.assert_not_called()
+        # every invalid operand is reported
+        self.assertIn('"42"', check)
+        self.assertIn('"bad"', check)
+        self.assertEqual(check.count("[WARN]"), 2)
+
+    def test_validate_conditions_gets_few_ids(self):
+        module = MagicMock()
+        rest = MagicMock()
+        rest.max_workers = 2
+
+        def get(path, fail_safe=False):
+            response = MagicMock()
+            response.status_code = 404 if path.endswith("/2") else 200
+            return response
+
+        rest.get.side_effect = get
+        operands = [
+            {"objectType": "APP_GROUP", "lhs": "id", "rhs": "1"},
+            {"objectType": "APP_GROUP", "lhs": "id", "rhs": "1"},
+            {"objectType": "APP_GROUP", "lhs": "id", "rhs": "2"},
+        ]
+        k = PolicyAccessRuleService(module, "1", rest)
+        check = k.validateConditions(
+            [{"operands": operands[:2]}, {"operands": operands[2:]}]
+        )
+        self.assertEqual(rest.get.call_count, 2)
+        rest.get_index.assert_not_called()
+        self.assertEqual(check.count("[WARN]"), 1)
+        self.assertIn('"2"', check)
+        self.assertTrue(k.validateConditions([{"operands": operands[:2]}]))
@@ -1,10 +1,14 @@
 from __future__ import absolute_import, division, print_function
 
-
 __metaclass__ = type
 
 import unittest
+from functools import partial
 from unittest.mock import MagicMock
+
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_client import (
+    ZPAClientHelper,
+)
 from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_server_group import (
     ServerGroupService,
 )
@@ -43,8 +47,10 @@ class TestServerGroupService(unittest.TestCase):
     def test_get_by_name_when_ok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get_paginated_data = MagicMock()
-        rest.get_paginated_data.return_value = [
+        rest.search_by_name = partial(ZPAClientHelper.search_by_name, rest)
+        rest.cached_index.return_value = None
+        rest.iter_paginated_data = MagicMock()
+        rest.iter_paginated_data.return_value = [
             {
                 "name": "bar1",
                 "id": "test1",
@@ -73,8 +79,8 @@ class TestServerGroupService(unittest.TestCase):
     def test_get_by_name_when_nok(self):
         module = MagicMock()
         rest = MagicMock()
-        rest.get = MagicMock()
-        rest.get.return_value.status_code = 400
+        rest.search_by_name = MagicMock()
+        rest.search_by_name.return_value = None
         k = ServerGroupService(module, "", rest)
         self.assertIsNone(k.getByName("test"))
 
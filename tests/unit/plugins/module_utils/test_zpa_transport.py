@@ -0,0 +1,120 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ansible_collections.willguibr.zpacloud.plugins.module_utils.zpa_transport import (
+    PooledTransport,
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.ports.add(self.client_address[1])
+        status = 404 if self.path.endswith("/missing") else 200
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.path.endswith("/close"):
+            # drop the connection without telling the client, like an idle timeout
+            self.close_connection = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.server.posts.append(self.path)
+        if self.path.endswith("/slow"):
+            time.sleep(1)
+            self.close_connection = True
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledTransport(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.ports = set()
+        self.server.posts = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        transport = PooledTransport(pool_size=2)
+        for i in range(5):
+            resp, info = transport.request("GET", "%s/item/%d?page=1" % (self.url, i))
+            self.assertEqual(info["status"], 200)
+            self.assertEqual(json.loads(resp.read())["path"], "/item/%d?page=1" % i)
+        transport.close()
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_error_body_in_info(self):
+        transport = PooledTransport()
+        resp, info = transport.request("GET", "%s/missing" % self.url)
+        self.assertEqual(info["status"], 404)
+        self.assertEqual(json.loads(info["body"])["path"], "/missing")
+        self.assertEqual(info["content-type"], "application/json")
+        transport.close()
+
+    def test_post_body(self):
+        transport = PooledTransport()
+        resp, info = transport.request("POST", "%s/signin" % self.url, data="a=b")
+        self.assertEqual(resp.read(), b"a=b")
+        transport.close()
+
+    def test_idle_connection_discarded(self):
+        transport = PooledTransport(idle_timeout=0)
+        transport.request("GET", "%s/a" % self.url)
+        transport.request("GET", "%s/b" % self.url)
+        transport.close()
+        self.assertEqual(len(self.server.ports), 2)
+
+    def test_connection_error(self):
+        transport = PooledTransport()
+        self.server.shutdown()
+        self.server.server_close()
+        resp, info = transport.request("GET", "%s/a" % self.url, timeout=1)
+        self.assertIsNone(resp)
+        self.assertEqual(info["status"], -1)
+
+    def test_stale_connection_retried(self):
+        transport = PooledTransport()
+        transport.request("GET", "%s/close" % self.url)
+        resp, info = transport.request("POST", "%s/segment" % self.url, data="a=b")
+        self.assertEqual(info["status"], 200)
+        self.assertEqual(self.server.posts, ["/segment"])
+        transport.close()
+
+    def test_timeout_not_resent(self):
+        transport = PooledTransport()
+        transport.request("GET", "%s/a" % self.url, timeout=0.2)
+        resp, info = transport.request(
+            "POST", "%s/slow" % self.url, data="a=b", timeout=0.2
+        )
+        self.assertIsNone(resp)
+        self.assertEqual(info["status"], -1)
+        time.sleep(1.5)
+        # sent on the kept-alive connection once, never replayed on a new one
+        self.assertEqual(self.server.posts, ["/slow"])
+        transport.close()
@@ -0,0 +1,208 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ansible_collections.willguibr.zpacloud.plugins.modules import (
+    zpa_application_segment_bulk as bulk,
+)
+
+
+def existing_apps():
+    return [
+        dict(
+            id="1",
+            name="web",
+            segment_group_id="10",
+            domain_names=["web.example.com"],
+            tcp_port_range=[{"from": "443", "to": "443"}],
+        ),
+        dict(
+            id="2",
+            name="db",
+            segment_group_id="10",
+            domain_names=["db.example.com"],
+        ),
+        dict(
+            id="3",
+            name="legacy",
+            segment_group_id="20",
+            domain_names=["legacy.example.com"],
+        ),
+    ]
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class TestPlan(unittest.TestCase):
+    def test_match_by_id_then_name(self):
+        segments = [
+            # matched by id, so renamed rather than created
+            dict(id="2", name="database", domain_names=["db.example.com"]),
+            dict(name="web", domain_names=["www.example.com"]),
+            dict(name="new", segment_group_id="10", domain_names=["new.example.com"]),
+        ]
+        actions = bulk.plan(existing_apps(), segments, purge=False)
+        self.assertEqual([a[0] for a in actions], ["update", "update", "create"])
+        rename, web, new = actions
+        self.assertEqual(rename[1]["id"], "2")
+        self.assertEqual(rename[1]["name"], "database")
+        self.assertEqual(
+            rename[2], dict(before={"name": "db"}, after={"name": "database"})
+        )
+        self.assertEqual(web[1]["id"], "1")
+        self.assertEqual(web[1]["domain_names"], ["www.example.com"])
+        # options the segment does not set are not managed
+        self.assertEqual(
+            web[2],
+            dict(
+                before={"domain_names": ["web.example.com"]},
+                after={"domain_names": ["www.example.com"]},
+            ),
+        )
+        self.assertIsNone(new[1]["id"])
+
+    def test_unchanged(self):
+        segments = [
+            dict(name="web", domain_names=["web.example.com"], segment_group_id="10"),
+            dict(id="2", name="db"),
+        ]
+        actions = bulk.plan(existing_apps(), segments, purge=False)
+        self.assertEqual(
+            [(a[0], a[1]["id"], a[2]) for a in actions],
+            [("none", "1", None), ("none", "2", None)],
+        )
+
+    def test_absent(self):
+        segments = [
+            dict(name="db", state="absent"),
+            dict(name="missing", state="absent"),
+        ]
+        actions = bulk.plan(existing_apps(), segments, purge=False)
+        self.assertEqual([a[0] for a in actions], ["delete", "none"])
+        self.assertEqual(actions[0][1]["id"], "2")
+        self.assertEqual(actions[1][1]["name"], "missing")
+        self.assertIsNone(actions[1][2])
+
+    def test_purge(self):
+        segments = [dict(name="web"), dict(name="db", state="absent")]
+        actions = bulk.plan(existing_apps(), segments, purge=True)
+        self.assertEqual(
+            [(a[0], a[1]["id"]) for a in actions],
+            [("none", "1"), ("delete", "2"), ("delete", "3")],
+        )
+        actions = bulk.plan(existing_apps(), segments, purge=False)
+        self.assertEqual([a[0] for a in actions], ["none", "delete"])
+
+
+class TestCore(unittest.TestCase):
+    def run_core(self, segments, purge=False, check_mode=False, service=None):
+        module = MagicMock()
+        module.check_mode = check_mode
+        module.params = dict(customer_id="1", segments=segments, purge=purge)
+        module.exit_json.side_effect = ModuleExit
+        module.fail_json.side_effect = ModuleExit
+        if service is None:
+            service = MagicMock()
+            service.create.side_effect = lambda app: dict(app, id="100")
+        service.getAll.return_value = existing_apps()
+        service.update.side_effect = lambda app: None if app["name"] == "db" else app
+        service.delete.return_value = 204
+        client = MagicMock()
+        client.max_workers = 2
+        with patch.object(bulk, "ZPAClientHelper", return_value=client), patch.object(
+            bulk, "ApplicationSegmentService", return_value=service
+        ):
+            with self.assertRaises(ModuleExit):
+                bulk.core(module)
+        return module, service
+
+    def test_results_and_summary(self):
+        module, service = self.run_core(
+            [
+                dict(name="web", domain_names=["web.example.com"]),
+                dict(
+                    name="new", segment_group_id="10", domain_names=["new.example.com"]
+                ),
+            ],
+            purge=True,
+        )
+        module.fail_json.assert_not_called()
+        kwargs = module.exit_json.call_args[1]
+        self.assertTrue(kwargs["changed"])
+        self.assertEqual(
+            kwargs["summary"],
+            dict(created=1, updated=0, deleted=2, unchanged=1, failed=0),
+        )
+        self.assertEqual(
+            [(r["name"], r["action"], r["id"]) for r in kwargs["results"]],
+            [
+                ("web", "none", "1"),
+                ("new", "create", "100"),
+                ("db", "delete", "2"),
+                ("legacy", "delete", "3"),
+            ],
+        )
+        service.detach_from_segment_group.assert_any_call("2", "10")
+        self.assertEqual(service.delete.call_count, 2)
+
+    def test_deletes_after_writes(self):
+        events = []
+
+        def create(app):
+            time.sleep(0.1)
+            events.append("create")
+            return dict(app, id="100")
+
+        def detach(app_id, segment_group_id):
+            events.append("detach")
+
+        service = MagicMock()
+        service.create.side_effect = create
+        service.detach_from_segment_group.side_effect = detach
+        self.run_core(
+            [
+                dict(
+                    name="new", segment_group_id="10", domain_names=["new.example.com"]
+                ),
+                dict(name="db", state="absent"),
+            ],
+            service=service,
+        )
+        self.assertEqual(events, ["create", "detach"])
+
+    def test_failed_item_reported(self):
+        module, service = self.run_core(
+            [
+                dict(name="web", domain_names=["www.example.com"]),
+                dict(name="db", domain_names=["db2.example.com"]),
+            ]
+        )
+        module.exit_json.assert_not_called()
+        kwargs = module.fail_json.call_args[1]
+        self.assertEqual(kwargs["msg"], "1 application segment(s) failed")
+        self.assertTrue(kwargs["changed"])
+        self.assertEqual(
+            kwargs["summary"],
+            dict(created=0, updated=1, deleted=0, unchanged=0, failed=1),
+        )
+        web, db = kwargs["results"]
+        self.assertEqual((web["action"], web.get("failed")), ("update", None))
+        self.assertTrue(db["failed"])
+        self.assertFalse(db["changed"])
+        self.assertEqual(db["msg"], "failed to update application segment")
+
+    def test_check_mode(self):
+        module, service = self.run_core([dict(name="new")], purge=True, check_mode=True)
+        kwargs = module.exit_json.call_args[1]
+        self.assertEqual(
+            kwargs["summary"],
+            dict(created=1, updated=0, deleted=3, unchanged=0, failed=0),
+        )
+        service.create.assert_not_called()
+        service.delete.assert_not_called()
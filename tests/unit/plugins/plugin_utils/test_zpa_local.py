@@ -0,0 +1,79 @@
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import sys
+import types
+import unittest
+from unittest.mock import patch
+
+from ansible.module_utils import basic
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.willguibr.zpacloud.plugins.plugin_utils import zpa_local
+
+MODULE = zpa_local.MODULES_PACKAGE + ".zpa_fake"
+
+
+def fake_module(main):
+    module = types.ModuleType(MODULE)
+    module.main = main
+    return module
+
+
+def echo_main():
+    module = AnsibleModule(argument_spec=dict(name=dict(type="str")))
+    module.exit_json(
+        changed=False, name=module.params["name"], env=os.environ.get("ZPA_FAKE")
+    )
+
+
+def fail_main():
+    module = AnsibleModule(argument_spec=dict(name=dict(type="str")))
+    module.fail_json(msg="no such %s" % module.params["name"])
+
+
+def crash_main():
+    raise ValueError("boom")
+
+
+class TestRunModule(unittest.TestCase):
+    def run_module(self, main, env=None):
+        with patch.dict(sys.modules, {MODULE: fake_module(main)}):
+            return zpa_local.run_module("zpa_fake", dict(name="web"), env)
+
+    def test_result(self):
+        saved_stdout = sys.stdout
+        res = self.run_module(echo_main, dict(ZPA_FAKE="1"))
+        self.assertEqual((res["rc"], res["stderr"]), (0, ""))
+        data = json.loads(res["stdout"])
+        self.assertFalse(data["changed"])
+        self.assertEqual((data["name"], data["env"]), ("web", "1"))
+        # the process globals are restored
+        self.assertIs(sys.stdout, saved_stdout)
+        self.assertIsNone(basic._ANSIBLE_ARGS)
+        self.assertNotIn("ZPA_FAKE", os.environ)
+
+    def test_failure(self):
+        res = self.run_module(fail_main)
+        self.assertEqual(res["rc"], 0)
+        data = json.loads(res["stdout"])
+        self.assertTrue(data["failed"])
+        self.assertEqual(data["msg"], "no such web")
+
+    def test_exception(self):
+        saved_stdout = sys.stdout
+        res = self.run_module(crash_main)
+        self.assertEqual((res["rc"], res["stdout"]), (1, ""))
+        self.assertIn("ValueError: boom", res["stderr"])
+        self.assertIs(sys.stdout, saved_stdout)
+        self.assertIsNone(basic._ANSIBLE_ARGS)
+
+    def test_environment_restored(self):
+        with patch.dict(os.environ, dict(ZPA_FAKE="saved")):
+            with zpa_local.environment(dict(ZPA_FAKE=1, ZPA_OTHER="x")):
+                self.assertEqual(os.environ["ZPA_FAKE"], "1")
+                self.assertEqual(os.environ["ZPA_OTHER"], "x")
+            self.assertEqual(os.environ["ZPA_FAKE"], "saved")
+            self.assertNotIn("ZPA_OTHER", os.environ)